@@ -0,0 +1,5 @@
+"""
+Performance benchmarks for ScriptSpliter.
+
+Run with ``make bench`` or ``python -m benchmarks.run``.
+"""
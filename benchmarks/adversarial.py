@@ -0,0 +1,79 @@
+"""
+Parse-time benchmark on adversarial inputs.
+
+Each case is generated at doubling sizes; a growth ratio near 2 per
+doubling means parse time stays linear, near 4 means quadratic.
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import Callable, Dict, List
+
+from script_spliter import patterns
+from script_spliter.parser import JavaScriptParser
+
+
+CASES: Dict[str, Callable[[int], str]] = {
+    # Arrow-function heads whose parameter list is never closed
+    "unclosed_arrow_heads": lambda n: ("const f = (a" + " " * 50) * n,
+    # One parameter list that runs to the end of the file
+    "unclosed_params": lambda n: "const f = (" + "a, " * n + "\n",
+    # Export list without a closing brace
+    "unclosed_export": lambda n: "export {" + " a " * n,
+    # Import specifier list without a closing brace
+    "unclosed_import": lambda n: "import {" + "a, " * n,
+    # Many require( calls with no string argument
+    "bare_require": lambda n: "require( " * n,
+    # Long run of whitespace between declaration keywords
+    "keyword_soup": lambda n: ("const " + " " * 20 + "let ") * n,
+}
+
+
+def time_parse(source: str) -> float:
+    """Return the wall time of constructing and running the parser."""
+    start = time.perf_counter()
+    JavaScriptParser(source).parse()
+    return time.perf_counter() - start
+
+
+def main(argv=None) -> int:
+    """Run every adversarial case at doubling sizes and report growth."""
+    parser = argparse.ArgumentParser(description="Benchmark parse time on adversarial input")
+    parser.add_argument("--start", type=int, default=1000, help="Smallest repetition count")
+    parser.add_argument("--steps", type=int, default=4, help="Number of doublings")
+    parser.add_argument("-o", "--output", help="Write JSON results to this file")
+    args = parser.parse_args(argv)
+    
+    print(f"pattern backend: {patterns.BACKEND}", file=sys.stderr)
+    results: List[Dict] = []
+    for name, generate in CASES.items():
+        previous = None
+        for step in range(args.steps):
+            n = args.start * (2 ** step)
+            source = generate(n)
+            seconds = time_parse(source)
+            growth = seconds / previous if previous else None
+            previous = seconds
+            results.append({
+                "case": name,
+                "repetitions": n,
+                "source_bytes": len(source),
+                "seconds": round(seconds, 6),
+                "growth": round(growth, 2) if growth else None,
+            })
+            growth_text = f"x{growth:.2f}" if growth else ""
+            print(f"{name:22} {len(source):>10} bytes  {seconds:8.3f}s  {growth_text}", file=sys.stderr)
+    
+    text = json.dumps({"backend": patterns.BACKEND, "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""
+Compare two benchmark result files produced by ``benchmarks.run``.
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict, Tuple
+
+
+def load_timings(path: str) -> Dict[Tuple[str, str], Dict[str, float]]:
+    """Map (scenario, stage) to its measurements."""
+    with open(path) as f:
+        data = json.load(f)
+    timings = {}
+    for result in data.get("results", []):
+        for stage, values in result.get("stages", {}).items():
+            timings[(result["scenario"], stage)] = values
+    return timings
+
+
+def main(argv=None) -> int:
+    """Print per-stage ratios; exit non-zero if any stage regressed past the threshold."""
+    parser = argparse.ArgumentParser(description="Compare ScriptSpliter benchmark results")
+    parser.add_argument("base", help="Baseline results JSON")
+    parser.add_argument("head", help="New results JSON")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="Time ratio (head/base) above which a stage counts as a regression"
+    )
+    args = parser.parse_args(argv)
+    
+    base = load_timings(args.base)
+    head = load_timings(args.head)
+    
+    regressions = 0
+    print(f"{'scenario':10} {'stage':9} {'base s':>10} {'head s':>10} {'ratio':>7} {'peak MB':>8}")
+    for key in sorted(set(base) & set(head)):
+        scenario, stage = key
+        before = base[key]["seconds"]
+        after = head[key]["seconds"]
+        ratio = after / before if before else float("inf")
+        flag = ""
+        if ratio > args.threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        peak_mb = head[key].get("peak_bytes", 0) / (1024 * 1024)
+        print(f"{scenario:10} {stage:9} {before:10.4f} {after:10.4f} {ratio:7.2f} {peak_mb:8.1f}{flag}")
+    
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""
+Synthetic JavaScript bundle generator for benchmarks.
+"""
+
+import argparse
+import random
+import sys
+from dataclasses import dataclass, asdict
+from typing import List
+
+
+@dataclass
+class BundleSpec:
+    """Shape of a synthetic bundle."""
+    symbols: int = 1000  # Top-level functions, classes, and assignments
+    body_lines: int = 6  # Statements per function/method body
+    nesting_depth: int = 2  # Depth of nested blocks inside bodies
+    dependency_density: float = 2.0  # Average references to other symbols
+    minify: bool = False  # Emit everything on a single line
+    literal_noise: float = 0.0  # Chance per statement of a tricky literal (regex, template, comment)
+    seed: int = 0
+
+
+def generate_bundle(spec: BundleSpec) -> str:
+    """Generate JavaScript source matching the given spec."""
+    rng = random.Random(spec.seed)
+    names = [_symbol_name(i) for i in range(spec.symbols)]
+    chunks: List[str] = []
+    
+    for i, name in enumerate(names):
+        refs = _pick_references(rng, names, i, spec.dependency_density)
+        kind = i % 5
+        if kind == 0:
+            chunks.append(_const(name, rng, refs))
+        elif kind == 1:
+            chunks.append(_function(name, spec, rng, refs))
+        elif kind == 2:
+            chunks.append(_arrow(name, spec, rng, refs))
+        elif kind == 3:
+            chunks.append(_class(name, spec, rng, refs))
+        else:
+            chunks.append(_function(name, spec, rng, refs, is_async=True))
+    
+    source = "\n\n".join(chunks) + "\n"
+    if spec.minify:
+        source = _minify(source)
+    return source
+
+
+def _symbol_name(index: int) -> str:
+    return f"sym{index}"
+
+
+def _pick_references(rng: random.Random, names: List[str], index: int, density: float) -> List[str]:
+    if len(names) < 2 or density <= 0:
+        return []
+    count = int(density) + (1 if rng.random() < density - int(density) else 0)
+    refs = set()
+    for _ in range(count):
+        other = rng.randrange(len(names))
+        if other != index:
+            refs.add(names[other])
+    return sorted(refs)
+
+
+# Balanced statements whose literals contain braces, quotes, slashes and
+# semicolons that a naive scanner would count as code
+LITERAL_SNIPPETS = [
+    "result = result.replace(/\\}+/g, '');",
+    "result = result.replace(/[\"'{]/g, \"\");",
+    "if (/^\\{/.test(result)) result = '';",
+    "result = result.length / 2 / 1 > 3 ? result : '';",
+    "result += `{${result.length}}`;",
+    "result += `${`${'}'}`}` + `;${{ a: 1 }.a}`;",
+    "result += `${'`'}{`;",
+    "result += `multi\nline { template`;",
+    "result += \"{ not a block; \\\" still string\";",
+    "result += '}' + \"{\" + '\\'';",
+    "/* } unbalanced { in a comment; */ result += '';",
+    "result += [1, 2].map((x) => `${x}}`).join(';');",
+    "result = typeof result === 'string' ? result.split(/;/)[0] : result;",
+]
+
+
+def _statements(spec: BundleSpec, rng: random.Random, refs: List[str], indent: int, depth: int) -> List[str]:
+    pad = "  " * indent
+    lines = []
+    for n in range(spec.body_lines):
+        if spec.literal_noise and rng.random() < spec.literal_noise:
+            lines.append(pad + rng.choice(LITERAL_SNIPPETS))
+        if refs and n < len(refs):
+            lines.append(f"{pad}result = result + String({refs[n]});")
+        else:
+            lines.append(f"{pad}result += \"v{rng.randrange(1000)}\";  // step {n}")
+    if depth > 0:
+        lines.append(f"{pad}if (result.length > {rng.randrange(100)}) {{")
+        lines.extend(_statements(spec, rng, [], indent + 1, depth - 1))
+        lines.append(f"{pad}}}")
+    return lines
+
+
+def _body(spec: BundleSpec, rng: random.Random, refs: List[str], indent: int) -> str:
+    pad = "  " * indent
+    lines = [f"{pad}let result = '';"]
+    lines.extend(_statements(spec, rng, refs, indent, spec.nesting_depth))
+    lines.append(f"{pad}return result;")
+    return "\n".join(lines)
+
+
+def _const(name: str, rng: random.Random, refs: List[str]) -> str:
+    values = ", ".join(f"k{j}: {ref}" for j, ref in enumerate(refs)) or f"k: {rng.randrange(1000)}"
+    return f"const {name} = {{ {values} }};"
+
+
+def _function(name: str, spec: BundleSpec, rng: random.Random, refs: List[str], is_async: bool = False) -> str:
+    prefix = "async " if is_async else ""
+    return f"{prefix}function {name}(a, b) {{\n{_body(spec, rng, refs, 1)}\n}}"
+
+
+def _arrow(name: str, spec: BundleSpec, rng: random.Random, refs: List[str]) -> str:
+    return f"const {name} = (a, b) => {{\n{_body(spec, rng, refs, 1)}\n}};"
+
+
+def _class(name: str, spec: BundleSpec, rng: random.Random, refs: List[str]) -> str:
+    return (
+        f"class {name} {{\n"
+        f"  constructor() {{\n    this.value = 0;\n  }}\n\n"
+        f"  run(a, b) {{\n{_body(spec, rng, refs, 2)}\n  }}\n"
+        f"}}"
+    )
+
+
+def _minify(source: str) -> str:
+    """Strip comments, indentation and newlines (keeps statements intact)."""
+    out = []
+    for line in source.split("\n"):
+        code = line.split("//", 1)[0].strip()
+        if code:
+            out.append(code)
+    return " ".join(out) + "\n"
+
+
+def main(argv=None) -> int:
+    """Write a synthetic bundle to a file or stdout."""
+    parser = argparse.ArgumentParser(description="Generate a synthetic JavaScript bundle")
+    parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+    parser.add_argument("--symbols", type=int, default=BundleSpec.symbols)
+    parser.add_argument("--body-lines", type=int, default=BundleSpec.body_lines)
+    parser.add_argument("--nesting-depth", type=int, default=BundleSpec.nesting_depth)
+    parser.add_argument("--dependency-density", type=float, default=BundleSpec.dependency_density)
+    parser.add_argument("--minify", action="store_true")
+    parser.add_argument("--literal-noise", type=float, default=BundleSpec.literal_noise)
+    parser.add_argument("--seed", type=int, default=BundleSpec.seed)
+    args = parser.parse_args(argv)
+    
+    spec = BundleSpec(
+        symbols=args.symbols,
+        body_lines=args.body_lines,
+        nesting_depth=args.nesting_depth,
+        dependency_density=args.dependency_density,
+        minify=args.minify,
+        literal_noise=args.literal_noise,
+        seed=args.seed,
+    )
+    source = generate_bundle(spec)
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(source)
+        print(f"Wrote {len(source)} bytes ({asdict(spec)}) to {args.output}", file=sys.stderr)
+    else:
+        sys.stdout.write(source)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""
+Stage timing benchmarks for ScriptSpliter.
+
+Times ``JavaScriptParser.parse``, ``DependencyAnalyzer``,
+``ModuleGenerator.generate_modules`` and ``write_files`` on synthetic
+bundles and writes JSON results that ``benchmarks.compare`` can diff
+across commits.
+"""
+
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, replace
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from script_spliter import patterns
+from script_spliter.parser import JavaScriptParser
+from script_spliter.analyzer import DependencyAnalyzer
+from script_spliter.generator import ModuleGenerator, ModuleConfig
+
+from .generate import BundleSpec, generate_bundle
+
+
+SCENARIOS: Dict[str, BundleSpec] = {
+    "small": BundleSpec(symbols=200),
+    "medium": BundleSpec(symbols=1000),
+    "large": BundleSpec(symbols=3000),
+    "deep": BundleSpec(symbols=500, nesting_depth=8),
+    "dense": BundleSpec(symbols=1000, dependency_density=8.0),
+    "minified": BundleSpec(symbols=1000, minify=True),
+}
+
+DEFAULT_SCENARIOS = ["small", "medium", "deep", "dense", "minified"]
+
+STAGES = ["parse", "analyze", "generate", "write"]
+
+
+def run_pipeline(source: str, output_dir: str, measure: Callable) -> Dict[str, int]:
+    """Run every stage through ``measure(stage_name, fn)`` and return counters."""
+    parser = JavaScriptParser(source)
+    blocks = measure("parse", parser.parse)
+    
+    def analyze():
+        analyzer = DependencyAnalyzer(blocks)
+        grouping = analyzer.get_module_suggestions()
+        analyzer.detect_circular_dependencies()
+        analyzer.get_import_order()
+        return analyzer, grouping
+    
+    analyzer, grouping = measure("analyze", analyze)
+    
+    generator = ModuleGenerator(blocks, analyzer, ModuleConfig(format="esm"))
+    modules = measure("generate", lambda: generator.generate_modules(grouping))
+    measure("write", lambda: generator.write_files(output_dir))
+    
+    return {
+        "blocks": len(blocks),
+        "edges": sum(len(block.dependencies) for block in blocks),
+        "modules": len(modules),
+    }
+
+
+def time_stages(source: str, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Best-of-N wall time per stage, plus peak traced memory from one extra run."""
+    best: Dict[str, float] = {}
+    counters: Dict[str, int] = {}
+    
+    for _ in range(repeat):
+        def timed(stage, fn):
+            gc.collect()
+            start = time.perf_counter()
+            result = fn()
+            elapsed = time.perf_counter() - start
+            best[stage] = min(elapsed, best.get(stage, elapsed))
+            return result
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            counters = run_pipeline(source, tmp, timed)
+    
+    peaks: Dict[str, int] = {}
+    
+    def traced(stage, fn):
+        gc.collect()
+        tracemalloc.start()
+        try:
+            return fn()
+        finally:
+            peaks[stage] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        run_pipeline(source, tmp, traced)
+    
+    stages = {
+        stage: {"seconds": round(best[stage], 6), "peak_bytes": peaks[stage]}
+        for stage in STAGES
+    }
+    return {"stages": stages, "counters": counters}
+
+
+def git_revision() -> str:
+    """Return the current commit hash, or an empty string outside a checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main(argv=None) -> int:
+    """Run the benchmark scenarios and write JSON results."""
+    parser = argparse.ArgumentParser(description="Benchmark ScriptSpliter stages")
+    parser.add_argument(
+        "-s", "--scenario",
+        action="append",
+        choices=sorted(SCENARIOS),
+        help="Scenario to run (repeatable; default: %s)" % ", ".join(DEFAULT_SCENARIOS)
+    )
+    parser.add_argument("--symbols", type=int, help="Override symbol count for every scenario")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing runs per scenario (best is kept)")
+    parser.add_argument("-o", "--output", help="Write JSON results to this file")
+    args = parser.parse_args(argv)
+    
+    results: List[Dict] = []
+    for name in args.scenario or DEFAULT_SCENARIOS:
+        spec = SCENARIOS[name]
+        if args.symbols:
+            spec = replace(spec, symbols=args.symbols)
+        source = generate_bundle(spec)
+        measured = time_stages(source, max(1, args.repeat))
+        results.append({
+            "scenario": name,
+            "spec": asdict(spec),
+            "source_bytes": len(source.encode("utf-8")),
+            **measured,
+        })
+        
+        timings = "  ".join(
+            f"{stage}={measured['stages'][stage]['seconds']:.3f}s" for stage in STAGES
+        )
+        print(f"{name:10} {len(source):>10} bytes  {timings}", file=sys.stderr)
+    
+    payload = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "pattern_backend": patterns.BACKEND,
+        "platform": platform.platform(),
+        "results": results,
+    }
+    
+    text = json.dumps(payload, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
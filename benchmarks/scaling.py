@@ -0,0 +1,89 @@
+"""
+Analyzer scaling benchmark on large synthetic block lists.
+
+Blocks are built directly (no parsing) with a fixed number of random
+dependencies each, at doubling counts up to 100k by default. Grouping,
+packing and ordering modules must stay linear: a growth ratio near 2 per
+doubling is linear, near 4 is quadratic.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from typing import Dict, List
+
+from script_spliter.analyzer import DependencyAnalyzer
+from script_spliter.parser import CodeBlock
+
+
+def make_blocks(count: int, dependencies: int, seed: int) -> List[CodeBlock]:
+    """Create blocks that each depend on up to ``dependencies`` earlier blocks."""
+    rng = random.Random(seed)
+    blocks = []
+    for i in range(count):
+        deps = {f"sym{rng.randrange(i)}" for _ in range(dependencies)} if i else set()
+        blocks.append(CodeBlock(
+            name=f"sym{i}",
+            type="function",
+            start_line=i * 5,
+            end_line=i * 5 + 4,
+            content="",
+            dependencies=deps,
+        ))
+    return blocks
+
+
+def time_analysis(blocks: List[CodeBlock], target_lines: int) -> Dict[str, float]:
+    """Time graph construction and module suggestions."""
+    start = time.perf_counter()
+    analyzer = DependencyAnalyzer(blocks)
+    built = time.perf_counter()
+    analyzer.get_module_suggestions(target_lines)
+    done = time.perf_counter()
+    return {"build": built - start, "suggest": done - built, "total": done - start}
+
+
+def main(argv=None) -> int:
+    """Run the analyzer at doubling block counts and report growth."""
+    parser = argparse.ArgumentParser(description="Benchmark analyzer scaling on large block lists")
+    parser.add_argument("--start", type=int, default=12500, help="Smallest block count")
+    parser.add_argument("--steps", type=int, default=4, help="Number of doublings")
+    parser.add_argument("--dependencies", type=int, default=2, help="Random dependencies per block")
+    parser.add_argument("--target-lines", type=int, default=200, help="Module size target for packing")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="Write JSON results to this file")
+    args = parser.parse_args(argv)
+    
+    results = []
+    previous = None
+    for step in range(args.steps):
+        count = args.start * (2 ** step)
+        blocks = make_blocks(count, args.dependencies, args.seed)
+        timings = time_analysis(blocks, args.target_lines)
+        growth = timings["total"] / previous if previous else None
+        previous = timings["total"]
+        results.append({
+            "blocks": count,
+            **{stage: round(seconds, 6) for stage, seconds in timings.items()},
+            "growth": round(growth, 2) if growth else None,
+        })
+        growth_text = f"x{growth:.2f}" if growth else ""
+        print(
+            f"{count:>8} blocks  build {timings['build']:7.3f}s  "
+            f"suggest {timings['suggest']:7.3f}s  {growth_text}",
+            file=sys.stderr
+        )
+    
+    text = json.dumps({"results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
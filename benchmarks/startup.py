@@ -0,0 +1,139 @@
+"""
+CLI startup benchmark.
+
+Measures the import time of the package and of ``script_spliter.cli`` with
+``python -X importtime`` in fresh interpreters, plus the wall time of a
+small ``--dependents`` query end to end. Results use the ``benchmarks.run`` JSON
+layout (scenario "startup"), so ``benchmarks.compare`` can diff them.
+
+Absolute times depend on the machine, so the pass/fail check is that
+importing the CLI loads none of the modules only some commands need
+(``LAZY_MODULES``); ``--budget-ms`` adds a time limit.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+from benchmarks.generate import BundleSpec, generate_bundle
+
+# Modules that ``import script_spliter.cli`` must not load: they serve
+# generation, archives, the symbol index, the daemon, project mode, YAML configs,
+# the first parse (the ``regex`` pattern backend) or profiling
+LAZY_MODULES = (
+    "script_spliter.generator", "script_spliter.sourcemap", "script_spliter.targets",
+    "script_spliter.index", "script_spliter.server", "script_spliter.config",
+    "script_spliter.project",
+    "regex", "yaml", "sqlite3", "asyncio", "tarfile", "zipfile", "gzip", "hashlib",
+    "cProfile", "tracemalloc",
+)
+
+
+def import_times(module: str) -> Dict[str, Tuple[int, int]]:
+    """Import module in a fresh interpreter; map each imported module to (self, cumulative) µs."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def median_import(module: str, repeat: int) -> Tuple[float, Dict[str, Tuple[int, int]]]:
+    """Median cumulative import time of module in seconds, and the last run's breakdown."""
+    samples = []
+    times = {}
+    for _ in range(repeat):
+        times = import_times(module)
+        samples.append(times[module][1] / 1e6)
+    return statistics.median(samples), times
+
+
+def median_command(args: List[str], repeat: int) -> float:
+    """Median wall time of a command in seconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main(argv=None) -> int:
+    """Report startup costs; exit non-zero when the CLI import loads lazy modules."""
+    parser = argparse.ArgumentParser(description="Benchmark ScriptSpliter CLI startup")
+    parser.add_argument("--repeat", type=int, default=7, help="Runs per measurement (median)")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imported modules to list")
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        help="Also fail when importing script_spliter.cli takes longer than this"
+    )
+    parser.add_argument("-o", "--output", help="Write JSON results to this file")
+    args = parser.parse_args(argv)
+    
+    package_seconds, _ = median_import("script_spliter", args.repeat)
+    cli_seconds, breakdown = median_import("script_spliter.cli", args.repeat)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        bundle = os.path.join(tmp, "bundle.js")
+        with open(bundle, "w", encoding="utf-8") as f:
+            f.write(generate_bundle(BundleSpec(symbols=50)))
+        query_seconds = median_command(
+            [sys.executable, "-m", "script_spliter.cli", bundle, "--dependents", "sym0"], args.repeat
+        )
+    
+    slowest = sorted(breakdown.items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+    print(f"import script_spliter      {package_seconds * 1000:8.1f} ms", file=sys.stderr)
+    print(f"import script_spliter.cli  {cli_seconds * 1000:8.1f} ms", file=sys.stderr)
+    print(f"--dependents, small bundle{query_seconds * 1000:8.1f} ms", file=sys.stderr)
+    print("Slowest imports of script_spliter.cli (self time):", file=sys.stderr)
+    for name, (self_us, cumulative_us) in slowest:
+        print(f"  {name:40} {self_us / 1000:7.1f} ms  (cumulative {cumulative_us / 1000:.1f} ms)",
+              file=sys.stderr)
+    
+    eager = [name for name in LAZY_MODULES if name in breakdown]
+    for name in eager:
+        print(f"import script_spliter.cli loads {name}, which should be imported lazily",
+              file=sys.stderr)
+    
+    payload = {
+        "python": sys.version.split()[0],
+        "results": [{
+            "scenario": "startup",
+            "stages": {
+                "import_package": {"seconds": round(package_seconds, 6)},
+                "import_cli": {"seconds": round(cli_seconds, 6)},
+                "query_command": {"seconds": round(query_seconds, 6)},
+            },
+            "modules": sorted(name for name in breakdown if name.startswith("script_spliter")),
+            "eager_lazy_modules": eager,
+        }],
+    }
+    text = json.dumps(payload, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    
+    over_budget = args.budget_ms is not None and cli_seconds * 1000 > args.budget_ms
+    if over_budget:
+        print(f"import script_spliter.cli is over budget ({cli_seconds * 1000:.1f} ms > "
+              f"{args.budget_ms:.0f} ms)", file=sys.stderr)
+    return 1 if eager or over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
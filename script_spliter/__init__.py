@@ -2,22 +2,72 @@
 ScriptSpliter - Convert large JavaScript files into modular components.
 """
 
+from typing import TYPE_CHECKING
+
 __version__ = "0.1.0"
 __author__ = "Script Spliter Team"
 
-from .spliter import ScriptSpliter
-from .parser import JavaScriptParser, CodeBlock
-from .analyzer import DependencyAnalyzer
-from .generator import ModuleGenerator, ModuleConfig
-from .config import ConfigLoader, GroupingBuilder
-
-__all__ = [
-    'ScriptSpliter',
-    'JavaScriptParser',
-    'CodeBlock',
-    'DependencyAnalyzer',
-    'ModuleGenerator',
-    'ModuleConfig',
-    'ConfigLoader',
-    'GroupingBuilder',
-]
+# Public names and the submodules defining them. Submodules are imported on
+# first attribute access, so ``import script_spliter`` (and the CLI) only
+# pay for what is used.
+_EXPORTS = {
+    'ScriptSpliter': 'spliter',
+    'JavaScriptParser': 'parser',
+    'CodeBlock': 'parser',
+    'DependencyAnalyzer': 'analyzer',
+    'ModuleGenerator': 'generator',
+    'ModuleConfig': 'generator',
+    'ConfigLoader': 'config',
+    'GroupingBuilder': 'config',
+    'Profiler': 'profiling',
+    'StageStats': 'profiling',
+    'Event': 'events',
+    'EventBus': 'events',
+    'Observer': 'events',
+    'ChromeTraceExporter': 'events',
+    'BlockFilter': 'filters',
+    'SymbolIndex': 'index',
+    'SymbolTable': 'symbols',
+    'SourceMap': 'sourcemap',
+    'SourceMapBuilder': 'sourcemap',
+    'OutputTarget': 'targets',
+    'DirectoryTarget': 'targets',
+    'MemoryTarget': 'targets',
+    'StreamTarget': 'targets',
+    'ArchiveTarget': 'targets',
+    'ProjectSpliter': 'project',
+    'SplitServer': 'server',
+    'SpliterCache': 'server',
+}
+
+__all__ = list(_EXPORTS)
+
+if TYPE_CHECKING:
+    from .spliter import ScriptSpliter
+    from .parser import JavaScriptParser, CodeBlock
+    from .analyzer import DependencyAnalyzer
+    from .generator import ModuleGenerator, ModuleConfig
+    from .config import ConfigLoader, GroupingBuilder
+    from .profiling import Profiler, StageStats
+    from .events import Event, EventBus, Observer, ChromeTraceExporter
+    from .filters import BlockFilter
+    from .index import SymbolIndex
+    from .symbols import SymbolTable
+    from .sourcemap import SourceMap, SourceMapBuilder
+    from .targets import OutputTarget, DirectoryTarget, MemoryTarget, StreamTarget, ArchiveTarget
+    from .project import ProjectSpliter
+    from .server import SplitServer, SpliterCache
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    value = getattr(import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
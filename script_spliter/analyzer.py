@@ -2,161 +2,563 @@
 Dependency analyzer for JavaScript code blocks.
 """
 
-from typing import Dict, Set, List, Tuple
-from dataclasses import dataclass
-from collections import defaultdict
+from array import array
+from collections.abc import Mapping
+from itertools import accumulate, chain, compress
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, Optional, Set, List, Tuple
+from .events import EventBus, CACHE_HIT, CACHE_MISS
+from .symbols import SymbolTable
 
 
-@dataclass
-class DependencyGraph:
-    """Represents the dependency relationships between code blocks."""
-    dependencies: Dict[str, Set[str]]  # block_name -> set of dependencies
-    reverse_dependencies: Dict[str, Set[str]]  # block_name -> set of dependents
+# Bytes counted as one line when sizing blocks of minified sources
+BYTES_PER_LINE = 40
+
+# Maps closure mask bytes (0/1) to binary digits for int bitsets
+_FLAG_DIGITS = bytes.maketrans(b'\x00\x01', b'01')
+
+
+def strongly_connected_components(
+    nodes: Iterable[Hashable],
+    successors: Callable[[Hashable], Iterable[Hashable]]
+) -> List[List[Hashable]]:
+    """
+    Find strongly connected components with an iterative Tarjan walk.
     
-    def get_all_dependencies(self, name: str) -> Set[str]:
-        """Get all direct and transitive dependencies."""
-        visited = set()
-        stack = [name]
+    Components are returned in reverse topological order: every component
+    appears after all components it depends on.
+    """
+    index_of: Dict[Hashable, int] = {}
+    lowlink: Dict[Hashable, int] = {}
+    on_stack: Set[Hashable] = set()
+    stack: List[Hashable] = []
+    components: List[List[Hashable]] = []
+    counter = 0
+    
+    for root in nodes:
+        if root in index_of:
+            continue
+        index_of[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(successors(root)))]
         
-        while stack:
-            current = stack.pop()
-            if current in visited:
+        while work:
+            node, neighbors = work[-1]
+            advanced = False
+            for neighbor in neighbors:
+                if neighbor not in index_of:
+                    index_of[neighbor] = lowlink[neighbor] = counter
+                    counter += 1
+                    stack.append(neighbor)
+                    on_stack.add(neighbor)
+                    work.append((neighbor, iter(successors(neighbor))))
+                    advanced = True
+                    break
+                if neighbor in on_stack and index_of[neighbor] < lowlink[node]:
+                    lowlink[node] = index_of[neighbor]
+            if advanced:
                 continue
-            visited.add(current)
             
-            deps = self.dependencies.get(current, set())
-            stack.extend(deps - visited)
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                if lowlink[node] < lowlink[parent]:
+                    lowlink[parent] = lowlink[node]
+            if lowlink[node] == index_of[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+    
+    return components
+
+
+def dependency_tree(name: str, successors: Callable[[str], Iterable[str]]) -> Dict:
+    """
+    Build a nested dependency tree rooted at name.
+    
+    Each node is ``{"name": ..., "dependencies": [...]}`` with children in
+    sorted order. Every block is expanded once, at its first occurrence in
+    depth-first order: a name already on the current path is reported as
+    ``{"name": ..., "circular": True}`` and any later occurrence as
+    ``{"name": ..., "repeated": True}``, so the tree stays linear in the
+    size of the dependency closure.
+    """
+    root = {"name": name, "dependencies": []}
+    expanded = {name}
+    on_path = {name}
+    stack = [(root, iter(sorted(successors(name))))]
+    
+    while stack:
+        node, children = stack[-1]
+        for child in children:
+            if child in on_path:
+                node["dependencies"].append({"name": child, "circular": True})
+            elif child in expanded:
+                node["dependencies"].append({"name": child, "repeated": True})
+            else:
+                subtree = {"name": child, "dependencies": []}
+                node["dependencies"].append(subtree)
+                expanded.add(child)
+                on_path.add(child)
+                stack.append((subtree, iter(sorted(successors(child)))))
+                break
+        else:
+            stack.pop()
+            on_path.discard(node["name"])
+    
+    return root
+
+
+class AdjacencyView(Mapping):
+    """Read-only ``name -> set of names`` view over one direction of a DependencyGraph."""
+    
+    def __init__(self, graph: "DependencyGraph", offsets: array, targets: array, keys: List[int]):
+        self._graph = graph
+        self._offsets = offsets
+        self._targets = targets
+        self._keys = keys
+        self._key_set = set(keys)
+    
+    def __getitem__(self, name: str) -> Set[str]:
+        node = self._graph.ids.get(name)
+        if node is None or node not in self._key_set:
+            raise KeyError(name)
+        names = self._graph.names
+        return {names[target] for target in self._targets[self._offsets[node]:self._offsets[node + 1]]}
+    
+    def __iter__(self) -> Iterator[str]:
+        names = self._graph.names
+        return (names[node] for node in self._keys)
+    
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class DependencyGraph:
+    """
+    Represents the dependency relationships between code blocks.
+    
+    Nodes are the integer IDs of a SymbolTable (``names[i]`` is node ``i``),
+    normally the one the parser filled in source order, and edges are stored
+    CSR-style in integer arrays: the dependencies of node ``i`` are
+    ``targets[offsets[i]:offsets[i + 1]]`` and its dependents are
+    ``reverse_targets[reverse_offsets[i]:reverse_offsets[i + 1]]``, both
+    sorted by ID. ``dependencies`` and ``reverse_dependencies`` are
+    read-only name-keyed views over the same arrays.
+    """
+    
+    def __init__(self, dependencies: Mapping, symbols: Optional[SymbolTable] = None):
+        """
+        Build the graph from a mapping of block name to dependency names.
         
-        visited.discard(name)
-        return visited
+        Args:
+            dependencies: Block name -> names of the blocks it depends on
+            symbols: Symbol table supplying node IDs (default: a new table);
+                names it does not know yet are interned
+        """
+        if symbols is None:
+            symbols = SymbolTable()
+        intern = symbols.intern
+        block_ids = []
+        rows = {}
+        for name, deps in dependencies.items():
+            node = intern(name)
+            block_ids.append(node)
+            rows[node] = sorted(intern(dep) for dep in deps)
+        node_count = len(symbols)
+        
+        offsets = array('l', [0])
+        targets = array('l')
+        for node in range(node_count):
+            row = rows.get(node)
+            if row:
+                targets.extend(row)
+            offsets.append(len(targets))
+        
+        # Reverse adjacency by counting sort; scanning sources in ID order
+        # leaves every row of dependents sorted.
+        counts = [0] * (node_count + 1)
+        for target in targets:
+            counts[target + 1] += 1
+        reverse_offsets = array('l', accumulate(counts))
+        reverse_targets = array('l', [0]) * len(targets)
+        fill = list(reverse_offsets)
+        for source in sorted(rows):
+            for target in rows[source]:
+                reverse_targets[fill[target]] = source
+                fill[target] += 1
+        
+        self.symbols = symbols
+        self.names = symbols.names
+        self.ids = symbols.ids
+        self.node_count = node_count
+        self.block_ids = block_ids
+        self.offsets = offsets
+        self.targets = targets
+        self.reverse_offsets = reverse_offsets
+        self.reverse_targets = reverse_targets
+        self.dependencies = AdjacencyView(self, offsets, targets, block_ids)
+        self.reverse_dependencies = AdjacencyView(
+            self, reverse_offsets, reverse_targets,
+            [node for node in range(node_count) if reverse_offsets[node] != reverse_offsets[node + 1]]
+        )
     
-    def get_all_dependents(self, name: str) -> Set[str]:
-        """Get all direct and transitive dependents."""
-        visited = set()
-        stack = [name]
+    def __len__(self) -> int:
+        return self.node_count
+    
+    @property
+    def edge_count(self) -> int:
+        """Number of dependency edges."""
+        return len(self.targets)
+    
+    def successors(self, node: int) -> array:
+        """Get the IDs of the nodes that node depends on."""
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+    
+    def predecessors(self, node: int) -> array:
+        """Get the IDs of the nodes that depend on node."""
+        return self.reverse_targets[self.reverse_offsets[node]:self.reverse_offsets[node + 1]]
+    
+    def closure_mask(self, nodes: Iterable[int], reverse: bool = False) -> bytearray:
+        """
+        Mark the given nodes and everything reachable from them.
+        
+        Args:
+            nodes: Seed node IDs
+            reverse: Follow dependents instead of dependencies
+        
+        Returns:
+            One byte per node, 1 for the nodes in the closure
+        """
+        if reverse:
+            offsets, targets = self.reverse_offsets, self.reverse_targets
+        else:
+            offsets, targets = self.offsets, self.targets
+        
+        seen = bytearray(self.node_count)
+        stack = []
+        for node in nodes:
+            if not seen[node]:
+                seen[node] = 1
+                stack.append(node)
         
         while stack:
-            current = stack.pop()
-            if current in visited:
-                continue
-            visited.add(current)
-            
-            dependents = self.reverse_dependencies.get(current, set())
-            stack.extend(dependents - visited)
+            node = stack.pop()
+            for target in targets[offsets[node]:offsets[node + 1]]:
+                if not seen[target]:
+                    seen[target] = 1
+                    stack.append(target)
+        
+        return seen
+    
+    def get_closure_bits(self, names: Iterable[str], reverse: bool = False) -> int:
+        """
+        Get a closure as a Python-int bitset (bit ``i`` set for node ``i``).
         
-        visited.discard(name)
-        return visited
+        Bitsets make unions, intersections and overlap tests between
+        closures single big-integer operations; ``names_of_bits`` maps a
+        bitset back to names.
+        """
+        digits = self.closure_mask(self._node_ids(names), reverse).translate(_FLAG_DIGITS)
+        digits.reverse()
+        return int(digits.decode('ascii') or '0', 2)
+    
+    def names_of_bits(self, bits: int) -> List[str]:
+        """Get the names of the nodes set in a bitset, in ID order."""
+        digits = bin(bits)[:1:-1]
+        return [self.names[node] for node, digit in enumerate(digits) if digit == '1']
+    
+    def get_all_dependencies(self, name: str) -> Set[str]:
+        """Get all direct and transitive dependencies."""
+        node = self.ids.get(name)
+        if node is None:
+            return set()
+        mask = self.closure_mask([node])
+        mask[node] = 0
+        return set(compress(self.names, mask))
+    
+    def get_all_dependents(self, name: str) -> Set[str]:
+        """Get all direct and transitive dependents."""
+        node = self.ids.get(name)
+        if node is None:
+            return set()
+        mask = self.closure_mask([node], reverse=True)
+        mask[node] = 0
+        return set(compress(self.names, mask))
+    
+    def get_dependents_closure(self, names: Iterable[str]) -> Set[str]:
+        """Get the given blocks and everything that transitively depends on them."""
+        return set(compress(self.names, self.closure_mask(self._node_ids(names), reverse=True)))
+    
+    def _node_ids(self, names: Iterable[str]) -> List[int]:
+        """Map names to node IDs, skipping unknown names."""
+        ids = self.ids
+        return [ids[name] for name in names if name in ids]
 
 
 class DependencyAnalyzer:
-    """Analyzes dependencies between code blocks."""
+    """
+    Analyzes dependencies between code blocks.
     
-    def __init__(self, blocks):
-        """Initialize with a list of CodeBlock objects."""
+    Graph computations (cycles, import order, groups, closures and module
+    suggestions) are computed lazily and memoized. Results are shared
+    between callers and must be treated as read-only. Call ``invalidate()``
+    (or ``set_blocks()``) after the blocks or their dependencies change.
+    """
+    
+    def __init__(
+        self,
+        blocks,
+        events: Optional[EventBus] = None,
+        size_by_bytes: bool = False,
+        symbols: Optional[SymbolTable] = None
+    ):
+        """
+        Initialize with a list of CodeBlock objects.
+        
+        Args:
+            blocks: Parsed code blocks
+            events: Optional event bus for cache hit/miss events
+            size_by_bytes: Size blocks by their character span (in units of
+                BYTES_PER_LINE) instead of line count, for minified sources
+            symbols: Symbol table shared with the parser (``parser.symbols``);
+                graph node IDs are its symbol IDs. A new table is created
+                when omitted.
+        """
         self.blocks = blocks
+        self.events = events
+        self.size_by_bytes = size_by_bytes
+        self.symbols = symbols if symbols is not None else SymbolTable()
+        self._cache: Dict[Any, Any] = {}
+        self.graph = self._build_graph()
+        self.source_order = self._build_source_order()
+    
+    def set_blocks(self, blocks) -> None:
+        """Replace the analyzed blocks and drop all memoized results."""
+        self.blocks = blocks
+        self.invalidate()
+    
+    def invalidate(self) -> None:
+        """Rebuild the graph and drop memoized results after blocks changed."""
+        self._cache.clear()
         self.graph = self._build_graph()
+        self.source_order = self._build_source_order()
+    
+    def _cached(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the memoized value for key, computing it on first use."""
+        try:
+            value = self._cache[key]
+        except KeyError:
+            if self.events:
+                self.events.emit(CACHE_MISS, cache="analyzer", key=str(key))
+            value = self._cache[key] = compute()
+            return value
+        if self.events:
+            self.events.emit(CACHE_HIT, cache="analyzer", key=str(key))
+        return value
     
     def _build_graph(self) -> DependencyGraph:
         """Build the dependency graph."""
-        dependencies = {}
-        reverse_dependencies = defaultdict(set)
+        return DependencyGraph(
+            {block.name: block.dependencies for block in self.blocks if block.name},
+            self.symbols
+        )
+    
+    def _build_source_order(self) -> List[int]:
+        """
+        List the graph's nodes by source position (built once per graph).
         
-        for block in self.blocks:
-            dependencies[block.name] = block.dependencies.copy()
-            
-            for dep in block.dependencies:
-                reverse_dependencies[dep].add(block.name)
+        A name declared by several blocks sits at its last declaration;
+        dependency names without a block come first, in ID order.
+        """
+        ids = self.graph.ids
+        last = {}
+        for position, block in enumerate(self.blocks):
+            if block.name:
+                last[ids[block.name]] = position
         
-        return DependencyGraph(
-            dependencies=dependencies,
-            reverse_dependencies=dict(reverse_dependencies)
+        order = [node for node in range(self.graph.node_count) if node not in last]
+        order.extend(
+            ids[block.name] for position, block in enumerate(self.blocks)
+            if block.name and last[ids[block.name]] == position
         )
+        return order
+    
+    def _in_source_order(self, parts: List[Iterable[int]]) -> List[List[int]]:
+        """
+        Order the nodes of each of several disjoint parts by source position.
+        
+        Labels every node with its part and makes a single pass over
+        ``source_order``, so all parts are ordered in O(nodes) without
+        sorting.
+        """
+        labels = array('l', [-1]) * self.graph.node_count
+        for index, part in enumerate(parts):
+            for node in part:
+                labels[node] = index
+        
+        ordered: List[List[int]] = [[] for _ in parts]
+        for node in self.source_order:
+            index = labels[node]
+            if index >= 0:
+                ordered[index].append(node)
+        return ordered
     
     def get_logical_groups(self) -> List[Set[str]]:
         """Group related blocks by their dependencies."""
+        names = self.graph.names
+        return self._cached(
+            "groups",
+            lambda: [{names[node] for node in group} for group in self._get_group_ids()]
+        )
+    
+    def _get_group_ids(self) -> List[List[int]]:
+        """Logical groups as node IDs, each in source order (memoized)."""
+        return self._cached("group_ids", self._compute_logical_groups)
+    
+    def _compute_logical_groups(self) -> List[List[int]]:
+        graph = self.graph
+        assigned = bytearray(len(graph))
         groups = []
-        visited = set()
         
-        # Start with blocks that have no dependencies (leaf nodes)
-        for block in self.blocks:
-            if not block.dependencies:
-                if block.name and block.name not in visited:
-                    group = self._build_group(block.name) - visited
-                    if group:
-                        groups.append(group)
-                        visited.update(group)
-        
-        # Then process remaining blocks
-        for block in self.blocks:
-            if block.name and block.name not in visited:
-                group = self._build_group(block.name) - visited
-                if group:
-                    groups.append(group)
-                    visited.update(group)
-        
-        return groups
-    
-    def _build_group(self, start_name: str) -> Set[str]:
-        """Build a group containing a block and its direct dependencies."""
-        group = {start_name}
-        group.update(self.graph.get_all_dependencies(start_name))
+        # Start with blocks that have no dependencies (leaf nodes), then
+        # process the remaining blocks
+        leaves = [node for node in graph.block_ids if graph.offsets[node] == graph.offsets[node + 1]]
+        for start in chain(leaves, graph.block_ids):
+            if not assigned[start]:
+                groups.append(self._build_group(start, assigned))
+        
+        return self._in_source_order(groups)
+    
+    def _build_group(self, start: int, assigned: bytearray) -> List[int]:
+        """
+        Build a group containing a block and its unassigned transitive dependencies.
+        
+        Assigned blocks are closed under dependencies (each earlier group holds
+        the full closure of its start), so the walk stops at them. Marks the
+        group's nodes as assigned.
+        """
+        offsets, targets = self.graph.offsets, self.graph.targets
+        assigned[start] = 1
+        group = [start]
+        stack = [start]
+        
+        while stack:
+            node = stack.pop()
+            for dep in targets[offsets[node]:offsets[node + 1]]:
+                if not assigned[dep]:
+                    assigned[dep] = 1
+                    group.append(dep)
+                    stack.append(dep)
+        
         return group
     
+    def get_closure(self, name: str) -> Set[str]:
+        """Get all transitive dependencies of a block (memoized per block)."""
+        closures = self._cached("closures", dict)
+        closure = closures.get(name)
+        if closure is None:
+            closure = closures[name] = self.graph.get_all_dependencies(name)
+        return closure
+    
+    def get_dependents(self, name: str) -> Set[str]:
+        """Get all transitive dependents of a block (memoized per block)."""
+        dependents = self._cached("dependents", dict)
+        result = dependents.get(name)
+        if result is None:
+            result = dependents[name] = self.graph.get_all_dependents(name)
+        return result
+    
+    def get_affected(self, names: Iterable[str]) -> Set[str]:
+        """Get the given blocks plus every block that transitively depends on them."""
+        return self.graph.get_dependents_closure(names)
+    
+    def get_strongly_connected_components(self) -> List[List[str]]:
+        """Get strongly connected components, dependencies first."""
+        return self._cached("scc", self._compute_sccs)
+    
+    def _compute_sccs(self) -> List[List[str]]:
+        graph = self.graph
+        names = graph.names
+        components = strongly_connected_components(graph.block_ids, graph.successors)
+        return [[names[node] for node in component] for component in components]
+    
     def get_import_order(self) -> List[str]:
         """Get the order in which modules should be imported."""
+        return self._cached("import_order", self._compute_import_order)
+    
+    def _compute_import_order(self) -> List[str]:
+        graph = self.graph
+        offsets, targets, names = graph.offsets, graph.targets, graph.names
         result = []
-        visited = set()
-        
-        def visit(name: str):
-            if name in visited or name is None:
-                return
-            visited.add(name)
-            
-            for dep in self.graph.dependencies.get(name, set()):
-                visit(dep)
-            
-            result.append(name)
+        visited = bytearray(len(graph))
         
         # Start with blocks that have fewest dependencies
-        blocks_by_dep_count = sorted(
-            (b for b in self.blocks if b.name),
-            key=lambda b: len(b.dependencies)
+        by_dep_count = sorted(
+            graph.block_ids, key=lambda node: offsets[node + 1] - offsets[node]
         )
         
-        for block in blocks_by_dep_count:
-            visit(block.name)
+        # Iterative post-order walk; deep dependency chains would overflow
+        # the interpreter stack with recursion.
+        for root in by_dep_count:
+            if visited[root]:
+                continue
+            visited[root] = 1
+            stack = [(root, iter(targets[offsets[root]:offsets[root + 1]]))]
+            
+            while stack:
+                node, deps = stack[-1]
+                for dep in deps:
+                    if not visited[dep]:
+                        visited[dep] = 1
+                        stack.append((dep, iter(targets[offsets[dep]:offsets[dep + 1]])))
+                        break
+                else:
+                    stack.pop()
+                    result.append(names[node])
         
         return result
     
     def detect_circular_dependencies(self) -> List[List[str]]:
         """Detect circular dependencies in the code."""
+        return self._cached("cycles", self._compute_cycles)
+    
+    def _compute_cycles(self) -> List[List[str]]:
+        graph = self.graph
+        offsets, targets, names = graph.offsets, graph.targets, graph.names
         cycles = []
-        visited = set()
-        rec_stack = set()
+        visited = bytearray(len(graph))
         
-        def dfs(node: str, path: List[str]) -> None:
-            visited.add(node)
-            rec_stack.add(node)
-            path.append(node)
+        for root in graph.block_ids:
+            if visited[root]:
+                continue
             
-            for neighbor in self.graph.dependencies.get(node, set()):
-                if neighbor not in visited:
-                    dfs(neighbor, path)
-                elif neighbor in rec_stack:
-                    # Found a cycle; guard against missing neighbor in path.
-                    if neighbor in path:
-                        cycle_start = path.index(neighbor)
-                        cycle = path[cycle_start:] + [neighbor]
-                    else:
-                        cycle = [node, neighbor, node]
-                    cycles.append(cycle)
+            # Iterative DFS; path_index maps each node on the current path
+            # (the recursion stack) to its position in path.
+            path = [root]
+            path_index = {root: 0}
+            visited[root] = 1
+            stack = [iter(targets[offsets[root]:offsets[root + 1]])]
             
-            path.pop()
-            rec_stack.discard(node)
-        
-        for block in self.blocks:
-            if block.name and block.name not in visited:
-                dfs(block.name, [])
+            while stack:
+                for neighbor in stack[-1]:
+                    if not visited[neighbor]:
+                        visited[neighbor] = 1
+                        path_index[neighbor] = len(path)
+                        path.append(neighbor)
+                        stack.append(iter(targets[offsets[neighbor]:offsets[neighbor + 1]]))
+                        break
+                    if neighbor in path_index:
+                        cycles.append([names[node] for node in path[path_index[neighbor]:]] + [names[neighbor]])
+                else:
+                    stack.pop()
+                    del path_index[path.pop()]
         
         return cycles
     
@@ -166,13 +568,28 @@ class DependencyAnalyzer:
         max_blocks_per_module: int = 0
     ) -> Dict[str, List[str]]:
         """Suggest how to group blocks into modules."""
+        return self._cached(
+            ("suggestions", target_lines_per_module, max_blocks_per_module),
+            lambda: self._compute_module_suggestions(
+                target_lines_per_module, max_blocks_per_module
+            )
+        )
+    
+    def _compute_module_suggestions(
+        self,
+        target_lines_per_module: int,
+        max_blocks_per_module: int
+    ) -> Dict[str, List[str]]:
         suggestions = {}
-        groups = self.get_logical_groups()
-        packed_groups = self._pack_groups(groups, target_lines_per_module, max_blocks_per_module)
+        block_names = self.graph.names
+        groups = self._get_group_ids()
+        packed_groups = self._in_source_order(
+            self._pack_groups(groups, target_lines_per_module, max_blocks_per_module)
+        )
         
         for i, group in enumerate(packed_groups):
             # Generate a module name based on the blocks in the group
-            names = self._order_blocks(group)
+            names = [block_names[node] for node in group]
             if len(names) == 1:
                 module_name = names[0]
             else:
@@ -185,29 +602,28 @@ class DependencyAnalyzer:
 
     def _pack_groups(
         self,
-        groups: List[Set[str]],
+        groups: List[List[int]],
         target_lines_per_module: int,
         max_blocks_per_module: int
-    ) -> List[List[str]]:
-        """Combine small groups into larger modules based on size thresholds."""
+    ) -> List[List[int]]:
+        """Combine small groups (node IDs in source order) into larger modules based on size thresholds."""
         if target_lines_per_module <= 0 and max_blocks_per_module <= 0:
-            return [self._order_blocks(group) for group in groups]
+            return groups
 
-        block_sizes = {
-            block.name: (block.end_line - block.start_line + 1)
-            for block in self.blocks
-            if block.name
-        }
+        ids = self.graph.ids
+        block_sizes = array('l', [0]) * self.graph.node_count
+        for block in self.blocks:
+            if block.name:
+                block_sizes[ids[block.name]] = self._block_size(block)
 
-        packed: List[List[str]] = []
-        current: List[str] = []
+        packed: List[List[int]] = []
+        current: List[int] = []
         current_lines = 0
         current_blocks = 0
 
         for group in groups:
-            ordered = self._order_blocks(group)
-            group_lines = sum(block_sizes.get(name, 0) for name in ordered)
-            group_blocks = len(ordered)
+            group_lines = sum(block_sizes[node] for node in group)
+            group_blocks = len(group)
 
             needs_new = False
             if current:
@@ -222,7 +638,7 @@ class DependencyAnalyzer:
                 current_lines = 0
                 current_blocks = 0
 
-            current.extend(ordered)
+            current.extend(group)
             current_lines += group_lines
             current_blocks += group_blocks
 
@@ -231,7 +647,9 @@ class DependencyAnalyzer:
 
         return packed
 
-    def _order_blocks(self, block_names: Set[str]) -> List[str]:
-        """Order block names by their appearance in the source."""
-        order_map = {block.name: i for i, block in enumerate(self.blocks) if block.name}
-        return sorted(block_names, key=lambda name: order_map.get(name, 0))
+    def _block_size(self, block) -> int:
+        """Size of a block in lines (or line-equivalents of bytes for minified sources)."""
+        if self.size_by_bytes:
+            span = block.end_offset - block.start_offset
+            return max(1, -(-span // BYTES_PER_LINE))
+        return block.end_line - block.start_line + 1
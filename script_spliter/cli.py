@@ -5,16 +5,26 @@ Command-line interface for ScriptSpliter.
 import sys
 import argparse
 import json
+from importlib import import_module
 from pathlib import Path
 
 try:
     from .spliter import ScriptSpliter
+    from .profiling import Profiler
+    from .events import EventBus, ChromeTraceExporter
 except ImportError:  # Allow running as a script without package context.
     from script_spliter.spliter import ScriptSpliter
+    from script_spliter.profiling import Profiler
+    from script_spliter.events import EventBus, ChromeTraceExporter
 
 
 def main():
     """Main CLI entry point."""
+    if sys.argv[1:2] == ["serve"]:
+        return _serve_main(sys.argv[2:])
+    if sys.argv[1:2] == ["project"]:
+        return _project_main(sys.argv[2:])
+    
     parser = argparse.ArgumentParser(
         description="Split large JavaScript files into structured modules",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -29,19 +39,53 @@ Examples:
   # Generate analysis report without splitting
   script-spliter input.js --analyze
 
+  # Stream the analysis as NDJSON records for tooling
+  script-spliter input.js --analyze --output-format ndjson
+
+  # Emit source maps for the split modules
+  script-spliter input.js -o output/ --source-maps
+
+  # Cache-friendly output: name.[hash].js files plus manifest.json / importmap.json
+  script-spliter input.js -o output/ --content-hash
+
+  # Flatten the browser request chain: preload hints and a load plan
+  script-spliter input.js -o output/ --load-plan
+
+  # Split a bundle from a pipe and stream the files as NDJSON records
+  cat bundle.js | script-spliter - -o - > files.ndjson
+
+  # Write everything into one archive instead of many small files
+  script-spliter input.js --archive modules.tar.gz
+
   # Use custom grouping configuration
   script-spliter input.js -o output/ --config grouping.json
+
+  # Leave vendored code out and fold blocks under 5 lines into their neighbors
+  script-spliter input.js -o output/ --exclude 'vendor_*' --exclude 1-120 --min-block-size 5
+
+  # Answer repeated queries from an on-disk index (built on first use)
+  script-spliter input.js --index --deps myFunction
+
+  # Which modules must be invalidated when lines 120-180 change?
+  script-spliter input.js --impact 120-180 --output-format json
+
+  # Keep parsed files in a daemon and answer JSON requests (see: script-spliter serve -h)
+  script-spliter serve --socket /tmp/script-spliter.sock
+
+  # Split several bundles together, shipping their common code once (see: script-spliter project -h)
+  script-spliter project home.js checkout.js -o output/
         """
     )
     
     parser.add_argument(
         "input",
-        help="Path to the JavaScript file to split"
+        help="Path to the JavaScript file to split ('-' reads standard input)"
     )
     
     parser.add_argument(
         "-o", "--output",
-        help="Output directory for generated modules",
+        help="Output directory for generated modules ('-' streams the files to standard "
+             "output as NDJSON records)",
         default="./output"
     )
     
@@ -57,6 +101,38 @@ Examples:
         help="Path to custom grouping configuration file (JSON)"
     )
     
+    parser.add_argument(
+        "--settings",
+        metavar="FILE",
+        help="Splitter settings file (JSON or YAML); its include_patterns, exclude_patterns "
+             "and min_block_size are applied"
+    )
+    
+    parser.add_argument(
+        "--include",
+        action="append",
+        default=[],
+        metavar="PATTERN",
+        help="Keep only blocks whose name matches this glob or whose lines overlap this "
+             "line range (START[-END]); repeatable"
+    )
+    
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        metavar="PATTERN",
+        help="Leave out blocks whose name matches this glob or whose lines overlap this "
+             "line range (START[-END]); repeatable"
+    )
+    
+    parser.add_argument(
+        "--min-block-size",
+        type=int,
+        metavar="LINES",
+        help="Merge blocks shorter than this many lines into a neighboring block"
+    )
+    
     parser.add_argument(
         "--no-auto-group",
         action="store_true",
@@ -89,12 +165,60 @@ Examples:
         help="Max blocks per module when auto-grouping (0 disables limit)"
     )
     
+    parser.add_argument(
+        "--source-maps",
+        action="store_true",
+        help="Write a v3 source map next to each module, composed with the input bundle's "
+             "own source map when it has one"
+    )
+    
+    parser.add_argument(
+        "--input-source-map",
+        metavar="FILE",
+        help="Source map of the input bundle (default: follow its sourceMappingURL comment)"
+    )
+    
+    parser.add_argument(
+        "--content-hash",
+        action="store_true",
+        help="Name module files name.[hash].js after their first block and content, and write "
+             "manifest.json (plus importmap.json for esm) for long-term caching"
+    )
+    
+    parser.add_argument(
+        "--load-plan",
+        action="store_true",
+        help="Write load-plan.json (modules by dependency depth) and, for esm, preload.html "
+             "with <link rel=\"modulepreload\"> hints"
+    )
+    
+    parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="Strip comments and collapse whitespace in the generated modules and report "
+             "the bytes saved"
+    )
+    
+    parser.add_argument(
+        "--archive",
+        metavar="FILE",
+        help="Write the modules, index and report into one zip, tar or tar.gz archive "
+             "(chosen by extension) instead of the output directory"
+    )
+    
     parser.add_argument(
         "--analyze",
         action="store_true",
         help="Analyze code without generating files"
     )
     
+    parser.add_argument(
+        "--output-format",
+        choices=["text", "json", "ndjson"],
+        default="text",
+        help="Format of the --analyze, --dependents and --impact output (default: text)"
+    )
+    
     parser.add_argument(
         "--blocks-info",
         action="store_true",
@@ -107,12 +231,60 @@ Examples:
         help="Show dependency tree for a specific block"
     )
 
+    parser.add_argument(
+        "--dependents",
+        metavar="BLOCK_NAME",
+        help="List the blocks that transitively depend on a block and exit"
+    )
+
+    parser.add_argument(
+        "--impact",
+        metavar="FILE_OR_LINE_RANGE",
+        help="Report the blocks and generated modules transitively affected by a change "
+             "to a line range ([FILE:]START[-END]) or a generated module file, and exit"
+    )
+
+    parser.add_argument(
+        "--index",
+        nargs="?",
+        const="",
+        metavar="FILE",
+        help="Answer --blocks-info/--deps/--dependents from a symbol index and exit; the index "
+             "is built or refreshed when missing or stale (default FILE: <input>.index.sqlite)"
+    )
+
     parser.add_argument(
         "--dry-run",
         action="store_true",
         help="Show what would be generated without writing files"
     )
 
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print per-stage time, memory and counters to stderr"
+    )
+
+    parser.add_argument(
+        "--profile-stage",
+        metavar="STAGE",
+        help="Run the named stage (read, scan, extract, filter, dependencies, analyze, grouping, "
+             "generate, write, report, index) under cProfile"
+    )
+
+    parser.add_argument(
+        "--profile-output",
+        metavar="FILE",
+        default="script-spliter.prof",
+        help="File for --profile-stage cProfile stats (default: script-spliter.prof)"
+    )
+
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="Write a Chrome trace_event JSON file of the run (open in chrome://tracing or Perfetto)"
+    )
+
     parser.add_argument(
         "-v", "--verbose",
         action="store_true",
@@ -120,78 +292,164 @@ Examples:
     )
     
     args = parser.parse_args()
+    if args.input == "-" and args.index is not None:
+        parser.error("--index needs an input file, not standard input")
+    if args.archive and args.output == "-":
+        parser.error("--archive and -o - are mutually exclusive")
+    if args.index is not None and (args.settings or args.include or args.exclude
+                                   or args.min_block_size):
+        parser.error("--index answers queries for the whole file; it cannot be combined with "
+                     "--settings, --include, --exclude or --min-block-size")
+    
+    # Keep standard output for the NDJSON file records when streaming
+    log = sys.stderr if args.output == "-" else sys.stdout
     
     try:
         # Initialize spliter
         if args.verbose:
-            print(f"Reading source file: {args.input}")
+            print(f"Reading source file: {args.input}", file=log)
+        
+        profiler = None
+        if args.profile or args.profile_stage:
+            profiler = Profiler(
+                cprofile_stage=args.profile_stage,
+                cprofile_path=args.profile_output if args.profile_stage else None
+            )
+        
+        events = EventBus()
+        tracer = None
+        if args.trace:
+            tracer = events.subscribe(ChromeTraceExporter())
+        
+        # Answer queries from the symbol index when requested
+        if args.index is not None and not args.impact:
+            SymbolIndex = _submodule("index").SymbolIndex
+            index_path = args.index or SymbolIndex.default_path(args.input)
+            index = SymbolIndex.open(index_path, args.input)
+            if index is None:
+                if args.verbose:
+                    print(f"Building symbol index: {index_path}")
+                spliter = _open_spliter(args, profiler, events)
+                index = spliter.build_index(index_path)
+            elif args.verbose:
+                print(f"Using symbol index: {index_path}")
+            with index:
+                if args.blocks_info:
+                    _print_blocks_info(index.get_blocks_info())
+                if args.deps:
+                    _print_dependency_tree(args.deps, index.get_dependency_tree(args.deps))
+                if args.dependents:
+                    _print_dependents(
+                        args.dependents, index.get_all_dependents(args.dependents),
+                        args.output_format
+                    )
+            _report_instrumentation(profiler, tracer, args.trace)
+            return 0
         
-        spliter = ScriptSpliter(args.input)
+        spliter = _open_spliter(args, profiler, events)
         
         # Display blocks info if requested
         if args.blocks_info:
-            print("\nDetected Code Blocks:")
-            print("-" * 70)
-            blocks_info = spliter.get_blocks_info()
-            for block in blocks_info:
-                deps_str = f" -> {', '.join(block['dependencies'])}" if block['dependencies'] else ""
-                print(f"  {block['name']:30} [{block['type']:10}] Lines {block['lines']:15}{deps_str}")
-            print()
+            _print_blocks_info(spliter.get_blocks_info())
         
         # Show dependency tree if requested
         if args.deps:
-            tree = spliter.get_dependency_tree(args.deps)
-            print(f"\nDependency Tree for '{args.deps}':")
-            print("-" * 70)
-            _print_tree(tree)
-            print()
+            _print_dependency_tree(args.deps, spliter.get_dependency_tree(args.deps))
+        
+        # Reverse-dependency and impact queries
+        if args.dependents or args.impact:
+            if args.dependents:
+                _print_dependents(
+                    args.dependents, spliter.get_dependents(args.dependents), args.output_format
+                )
+            if args.impact:
+                custom_grouping = _load_grouping(args) if args.config else None
+                impact = spliter.get_impact(
+                    args.impact,
+                    custom_grouping=custom_grouping,
+                    target_module_lines=args.max_lines,
+                    max_blocks_per_module=args.max_blocks,
+                    auto_group=not args.no_auto_group,
+                    content_hash=args.content_hash,
+                    format=args.format,
+                    include_comments=not args.no_comments,
+                    minify=args.minify
+                )
+                _print_impact(impact, args.output_format)
+            _report_instrumentation(profiler, tracer, args.trace)
+            return 0
         
         # Show analysis report if requested
         if args.analyze:
-            print(spliter.get_analysis())
+            spliter.write_analysis(
+                sys.stdout,
+                output_format=args.output_format,
+                target_module_lines=args.max_lines,
+                max_blocks_per_module=args.max_blocks
+            )
+            _report_instrumentation(profiler, tracer, args.trace)
             return 0
         
         # Load custom grouping if provided
         custom_grouping = None
         if args.config:
-            if args.verbose:
-                print(f"Loading custom grouping from: {args.config}")
-            with open(args.config, 'r') as f:
-                custom_grouping = json.load(f)
+            custom_grouping = _load_grouping(args, log)
         
         # Split the file
         if args.verbose:
-            print(f"Splitting JavaScript file...")
-            print(f"Output format: {args.format}")
-            print(f"Output directory: {args.output}")
+            print(f"Splitting JavaScript file...", file=log)
+            print(f"Output format: {args.format}", file=log)
+            print(f"Output: {args.archive or args.output}", file=log)
         
-        file_paths = spliter.split(
-            output_dir=args.output,
-            format=args.format,
-            auto_group=not args.no_auto_group,
-            custom_grouping=custom_grouping,
-            include_comments=not args.no_comments,
-            include_report=not args.no_report,
-            target_module_lines=args.max_lines,
-            max_blocks_per_module=args.max_blocks,
-            dry_run=args.dry_run
-        )
+        targets = _submodule("targets")
+        if args.archive:
+            output = targets.ArchiveTarget(args.archive)
+        elif args.output == "-":
+            output = targets.StreamTarget(sys.stdout)
+        else:
+            output = targets.DirectoryTarget(args.output)
+        # Finish the archive or stream even when the split fails midway
+        with output:
+            file_paths = spliter.split(
+                output_dir=output,
+                format=args.format,
+                auto_group=not args.no_auto_group,
+                custom_grouping=custom_grouping,
+                include_comments=not args.no_comments,
+                include_report=not args.no_report,
+                target_module_lines=args.max_lines,
+                max_blocks_per_module=args.max_blocks,
+                dry_run=args.dry_run,
+                source_maps=args.source_maps,
+                input_source_map=args.input_source_map,
+                content_hash=args.content_hash,
+                load_plan=args.load_plan,
+                minify=args.minify
+            )
         
         # Display results
         if args.dry_run:
-            print("\nDry run - no files written.")
+            print("\nDry run - no files written.", file=log)
         else:
-            print("\nSuccessfully split JavaScript file.")
-        print("\nGenerated files:")
-        print("-" * 70)
+            print("\nSuccessfully split JavaScript file.", file=log)
+        print("\nGenerated files:", file=log)
+        print("-" * 70, file=log)
         for name, path in file_paths.items():
             if name != "report":
-                print(f"  {name:20} -> {path}")
+                print(f"  {name:20} -> {path}", file=log)
         
         if "report" in file_paths:
-            print(f"  {'analysis report':20} -> {file_paths['report']}")
+            print(f"  {'analysis report':20} -> {file_paths['report']}", file=log)
+        
+        if args.minify:
+            before = spliter.generator.minify_input_bytes
+            after = spliter.generator.minify_output_bytes
+            saved = 100 * (before - after) / before if before else 0
+            print(f"\nMinified block code: {before} -> {after} bytes ({saved:.1f}% smaller)",
+                  file=log)
         
-        print()
+        print(file=log)
+        _report_instrumentation(profiler, tracer, args.trace)
         return 0
         
     except FileNotFoundError as e:
@@ -208,19 +466,274 @@ Examples:
         return 1
 
 
+def _serve_main(argv):
+    """Entry point of ``script-spliter serve``."""
+    parser = argparse.ArgumentParser(
+        prog="script-spliter serve",
+        description="Run a split daemon that keeps parsed files in memory and answers "
+                    "JSON requests (split, analyze, blocks, deps, dependents, impact, stats)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Newline-delimited JSON over a Unix domain socket
+  script-spliter serve --socket /tmp/script-spliter.sock
+  echo '{"op": "deps", "path": "/src/app.js", "block": "init"}' | nc -U /tmp/script-spliter.sock
+
+  # HTTP on localhost: POST a JSON request, optionally naming the op in the URL
+  script-spliter serve --http 8765
+  curl -H 'Content-Type: application/json' -d '{"path": "/src/app.js", "output": "/src/out"}' http://127.0.0.1:8765/split
+        """
+    )
+    listen = parser.add_mutually_exclusive_group(required=True)
+    listen.add_argument(
+        "--socket",
+        metavar="PATH",
+        help="Listen on a Unix domain socket"
+    )
+    listen.add_argument(
+        "--http",
+        metavar="PORT",
+        type=int,
+        help="Listen for HTTP POST requests on 127.0.0.1:PORT"
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=8,
+        help="Number of parsed files to keep in memory (default: 8)"
+    )
+    parser.add_argument(
+        "-v", "--verbose",
+        action="store_true",
+        help="Log each request to stderr"
+    )
+    args = parser.parse_args(argv)
+    
+    try:
+        _submodule("server").serve(
+            socket_path=args.socket,
+            port=args.http,
+            cache_size=args.cache_size,
+            log=sys.stderr if args.verbose else None
+        )
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def _project_main(argv):
+    """Entry point of ``script-spliter project``."""
+    parser = argparse.ArgumentParser(
+        prog="script-spliter project",
+        description="Split several bundles over one dependency graph: blocks identical across "
+                    "bundles go into shared chunks, and each bundle gets an entry module",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Shared chunks plus home.js / checkout.js entries and project.json
+  script-spliter project home.js checkout.js -o output/
+
+  # Parse with two worker processes, CommonJS output
+  script-spliter project pages/*.js -o output/ -j 2 --format commonjs
+        """
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="+",
+        metavar="input",
+        help="Paths to the JavaScript bundles"
+    )
+    parser.add_argument(
+        "-o", "--output",
+        default="./output",
+        help="Output directory for the chunks and entry modules"
+    )
+    parser.add_argument(
+        "-f", "--format",
+        choices=["esm", "commonjs", "scripts"],
+        default="esm",
+        help="Output module format (default: esm; scripts also writes <bundle>.html)"
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        help="Worker processes for parsing (default: one per bundle, up to the CPU count)"
+    )
+    parser.add_argument(
+        "--no-comments",
+        action="store_true",
+        help="Don't include comments in generated files"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Show what would be generated without writing files"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print per-stage time, memory and counters to stderr"
+    )
+    args = parser.parse_args(argv)
+    
+    profiler = Profiler() if args.profile else None
+    try:
+        project = _submodule("project").ProjectSpliter(
+            args.inputs, jobs=args.jobs, profiler=profiler
+        )
+        file_paths = project.split(
+            args.output,
+            format=args.format,
+            include_comments=not args.no_comments,
+            dry_run=args.dry_run
+        )
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    
+    stats = project.get_stats()
+    if args.dry_run:
+        print("\nDry run - no files written.")
+    else:
+        print("\nSuccessfully split project.")
+    print("\nGenerated files:")
+    print("-" * 70)
+    for name, path in file_paths.items():
+        print(f"  {name:20} -> {path}")
+    print(f"\n{stats['bundles']} bundles, {stats['blocks']} blocks: {stats['distinct_blocks']} "
+          f"distinct, {stats['shared_blocks']} shared in {stats['chunks']} chunks")
+    print(f"Bytes: {stats['source_bytes']} in the bundles, {stats['output_bytes']} generated "
+          f"({stats['duplicate_bytes']} duplicate bytes removed)")
+    print()
+    _report_instrumentation(profiler, None, None)
+    return 0
+
+
+def _submodule(name):
+    """Import a package submodule that only some commands need, on first use."""
+    return import_module(f"script_spliter.{name}")
+
+
+def _report_instrumentation(profiler, tracer, trace_path):
+    """Print the profile summary and write the trace file when enabled."""
+    if profiler is not None:
+        print(profiler.format_summary(), file=sys.stderr)
+        if profiler.cprofile_path and profiler.cprofile_stage in profiler.stages:
+            print(f"\ncProfile stats for '{profiler.cprofile_stage}' -> {profiler.cprofile_path}",
+                  file=sys.stderr)
+    if tracer is not None:
+        tracer.write(trace_path)
+        print(f"Trace written to {trace_path}", file=sys.stderr)
+
+
+def _open_spliter(args, profiler, events):
+    """Create the spliter for the input file, or for standard input when it is '-'."""
+    block_filter = _block_filter(args)
+    if args.input == "-":
+        return ScriptSpliter.from_source(
+            sys.stdin.buffer.read(), name="<stdin>", profiler=profiler, events=events,
+            block_filter=block_filter
+        )
+    return ScriptSpliter(args.input, profiler=profiler, events=events, block_filter=block_filter)
+
+
+def _block_filter(args):
+    """Build the block filter from --settings, --include, --exclude and --min-block-size."""
+    if not (args.settings or args.include or args.exclude or args.min_block_size):
+        return None
+    
+    BlockFilter = _submodule("filters").BlockFilter
+    include, exclude, min_block_size = [], [], 0
+    if args.settings:
+        settings = _submodule("config").ConfigLoader.load_from_file(args.settings)
+        include, exclude = list(settings.include_patterns), list(settings.exclude_patterns)
+        min_block_size = settings.min_block_size
+    if args.min_block_size is not None:
+        min_block_size = args.min_block_size
+    block_filter = BlockFilter(include + args.include, exclude + args.exclude, min_block_size)
+    return block_filter or None
+
+
+def _load_grouping(args, log=None):
+    """Load the custom grouping file given with --config."""
+    if args.verbose:
+        print(f"Loading custom grouping from: {args.config}", file=log)
+    with open(args.config, 'r') as f:
+        return json.load(f)
+
+
+def _print_dependents(name, dependents, output_format="text"):
+    """Print the transitive dependents of one block."""
+    if output_format != "text":
+        print(json.dumps({"name": name, "dependents": dependents},
+                         indent=2 if output_format == "json" else None))
+        return
+    print(f"\nDependents of '{name}' ({len(dependents)}):")
+    print("-" * 70)
+    for dependent in dependents:
+        print(f"  {dependent}")
+    print()
+
+
+def _print_impact(impact, output_format="text"):
+    """Print the blocks and modules affected by a change."""
+    if output_format != "text":
+        print(json.dumps(impact, indent=2 if output_format == "json" else None))
+        return
+    print(f"\nImpact of '{impact['target']}':")
+    print("-" * 70)
+    print(f"  Changed blocks ({len(impact['changed_blocks'])}): "
+          f"{', '.join(impact['changed_blocks']) or '-'}")
+    print(f"  Affected blocks: {len(impact['affected_blocks'])}")
+    print(f"\n  Affected modules ({len(impact['affected_modules'])}):")
+    for module_name, file_name in zip(impact['affected_modules'], impact['affected_files']):
+        print(f"    {module_name:20} -> {file_name}")
+    print()
+
+
+def _print_blocks_info(blocks_info):
+    """Print the detected code blocks table."""
+    print("\nDetected Code Blocks:")
+    print("-" * 70)
+    for block in blocks_info:
+        deps_str = f" -> {', '.join(block['dependencies'])}" if block['dependencies'] else ""
+        print(f"  {block['name']:30} [{block['type']:10}] Lines {block['lines']:15}{deps_str}")
+    print()
+
+
+def _print_dependency_tree(name, tree):
+    """Print the dependency tree of one block."""
+    print(f"\nDependency Tree for '{name}':")
+    print("-" * 70)
+    if tree:
+        _print_tree(tree)
+    else:
+        print(f"  No block named '{name}'")
+    print()
+
+
 def _print_tree(node, prefix="", is_last=True):
     """Pretty-print a dependency tree."""
-    if isinstance(node, dict):
+    stack = [(node, prefix, is_last)]
+    while stack:
+        node, prefix, is_last = stack.pop()
+        if not isinstance(node, dict):
+            continue
         connector = "└─ " if is_last else "├─ "
-        if "circular" in node and node["circular"]:
+        if node.get("circular"):
             print(prefix + connector + f"{node['name']} (circular dependency)")
+        elif node.get("repeated"):
+            print(prefix + connector + f"{node['name']} (see above)")
         else:
             print(prefix + connector + f"{node['name']}")
             deps = node.get("dependencies", [])
-            for i, dep in enumerate(deps):
-                is_last = i == len(deps) - 1
-                child_prefix = prefix + ("    " if is_last else "│   ")
-                _print_tree(dep, child_prefix, is_last)
+            for i in reversed(range(len(deps))):
+                child_is_last = i == len(deps) - 1
+                child_prefix = prefix + ("    " if child_is_last else "│   ")
+                stack.append((deps[i], child_prefix, child_is_last))
 
 
 if __name__ == "__main__":
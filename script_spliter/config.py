@@ -6,7 +6,6 @@ import json
 from typing import Dict, Any, Optional
 from pathlib import Path
 from dataclasses import dataclass, asdict
-import yaml
 
 
 @dataclass
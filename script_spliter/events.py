@@ -0,0 +1,116 @@
+"""
+Structured instrumentation events for ScriptSpliter.
+
+Components emit events to an ``EventBus``. Emission sites check the bus
+first (``if events:``), so nothing is built when no observer is subscribed.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List
+
+
+# Event names
+STAGE_START = "stage_start"
+STAGE_END = "stage_end"
+BLOCK_PARSED = "block_parsed"
+MODULE_WRITTEN = "module_written"
+CACHE_HIT = "cache_hit"
+CACHE_MISS = "cache_miss"
+
+
+@dataclass
+class Event:
+    """A single instrumentation event."""
+    name: str
+    timestamp: float  # time.perf_counter() seconds
+    data: Dict[str, Any] = field(default_factory=dict)
+
+
+class Observer:
+    """Base class for event observers."""
+    
+    def on_event(self, event: Event) -> None:
+        """Handle an event. Called synchronously on the emitting thread."""
+        raise NotImplementedError
+
+
+class EventBus:
+    """Dispatches events to subscribed observers."""
+    
+    def __init__(self):
+        self.observers: List[Observer] = []
+    
+    def __bool__(self) -> bool:
+        return bool(self.observers)
+    
+    def subscribe(self, observer: Observer) -> Observer:
+        """Register an observer; returns it for convenience."""
+        self.observers.append(observer)
+        return observer
+    
+    def unsubscribe(self, observer: Observer) -> None:
+        """Remove a previously registered observer."""
+        if observer in self.observers:
+            self.observers.remove(observer)
+    
+    def emit(self, name: str, /, **data) -> None:
+        """Send an event to all observers."""
+        if not self.observers:
+            return
+        event = Event(name, time.perf_counter(), data)
+        for observer in self.observers:
+            observer.on_event(event)
+    
+    @contextmanager
+    def span(self, stage: str, /, **data) -> Iterator[None]:
+        """Emit stage_start/stage_end around the enclosed code."""
+        if not self.observers:
+            yield
+            return
+        self.emit(STAGE_START, stage=stage, **data)
+        try:
+            yield
+        finally:
+            self.emit(STAGE_END, stage=stage, **data)
+
+
+class ChromeTraceExporter(Observer):
+    """Collects events in Chrome ``trace_event`` format (chrome://tracing, Perfetto)."""
+    
+    def __init__(self):
+        self.trace_events: List[Dict[str, Any]] = []
+        self._pid = os.getpid()
+    
+    def on_event(self, event: Event) -> None:
+        record: Dict[str, Any] = {
+            "ts": event.timestamp * 1_000_000,
+            "pid": self._pid,
+            "tid": threading.get_ident(),
+        }
+        if event.name in (STAGE_START, STAGE_END):
+            record["name"] = event.data.get("stage", "stage")
+            record["ph"] = "B" if event.name == STAGE_START else "E"
+            record["cat"] = "stage"
+        else:
+            record["name"] = event.name
+            record["ph"] = "i"
+            record["s"] = "t"
+            record["cat"] = "event"
+        args = {k: v for k, v in event.data.items() if k != "stage"}
+        if args:
+            record["args"] = args
+        self.trace_events.append(record)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the trace as a ``trace_event`` JSON object."""
+        return {"traceEvents": self.trace_events, "displayTimeUnit": "ms"}
+    
+    def write(self, path: str) -> None:
+        """Write the trace to a JSON file."""
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, default=str)
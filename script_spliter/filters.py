@@ -0,0 +1,155 @@
+"""
+Block filtering between parsing and analysis.
+"""
+
+import re
+from fnmatch import translate
+from typing import TYPE_CHECKING, Iterable, List, Tuple
+
+from .analyzer import BYTES_PER_LINE
+
+if TYPE_CHECKING:
+    from .config import SplitterConfig
+    from .parser import CodeBlock
+
+
+# A pattern naming a 1-based, inclusive line range: START[-END]
+LINE_RANGE_PATTERN = re.compile(r'(\d+)(?:-(\d+))?')
+
+
+class PatternMatcher:
+    """
+    Matches blocks against a list of patterns, compiled once.
+    
+    A pattern is either a glob on the block name (``vendor_*``) or a line
+    range (``120-480``, 1-based and inclusive) that matches every block
+    overlapping it. All globs are combined into one regular expression.
+    """
+    
+    def __init__(self, patterns: Iterable[str]):
+        """
+        Compile patterns.
+        
+        Args:
+            patterns: Name globs and line ranges
+        """
+        globs = []
+        self.ranges: List[Tuple[int, int]] = []
+        for pattern in patterns:
+            match = LINE_RANGE_PATTERN.fullmatch(pattern.strip())
+            if match:
+                start = int(match.group(1))
+                self.ranges.append((start, int(match.group(2) or start)))
+            else:
+                globs.append(translate(pattern))
+        self.regex = re.compile("|".join(f"(?:{glob})" for glob in globs)) if globs else None
+    
+    def __bool__(self) -> bool:
+        return self.regex is not None or bool(self.ranges)
+    
+    def matches(self, block: "CodeBlock") -> bool:
+        """Check if the block's name or line span matches any pattern."""
+        if self.regex is not None and self.regex.match(block.name or ""):
+            return True
+        first, last = block.start_line + 1, block.end_line + 1
+        return any(first <= end and last >= start for start, end in self.ranges)
+
+
+class BlockFilter:
+    """
+    Drops excluded blocks and folds small blocks into their neighbors.
+    
+    Applied by ``JavaScriptParser.parse`` after top-level extraction and
+    before dependency extraction, so excluded blocks are never tokenized and
+    never reach the analyzer or the generated modules. A block smaller than
+    ``min_block_size`` lines is merged into the preceding kept block (or the
+    following one when it comes first); merging never spans an excluded
+    block, so excluded code is not pulled back in.
+    """
+    
+    def __init__(
+        self,
+        include_patterns: Iterable[str] = (),
+        exclude_patterns: Iterable[str] = (),
+        min_block_size: int = 0
+    ):
+        """
+        Configure the filter.
+        
+        Args:
+            include_patterns: Keep only blocks matching one of these (name
+                globs or line ranges); empty keeps every block
+            exclude_patterns: Drop blocks matching one of these
+            min_block_size: Merge blocks with fewer lines into a neighbor
+                (minified sources count BYTES_PER_LINE characters as a line)
+        """
+        self.include = PatternMatcher(include_patterns)
+        self.exclude = PatternMatcher(exclude_patterns)
+        self.min_block_size = min_block_size
+    
+    @classmethod
+    def from_config(cls, config: "SplitterConfig") -> "BlockFilter":
+        """Build the filter described by a splitter configuration."""
+        return cls(config.include_patterns, config.exclude_patterns, config.min_block_size)
+    
+    def __bool__(self) -> bool:
+        return bool(self.include) or bool(self.exclude) or self.min_block_size > 0
+    
+    def is_excluded(self, block: "CodeBlock") -> bool:
+        """Check if a block is filtered out by the include/exclude patterns."""
+        if self.include and not self.include.matches(block):
+            return True
+        return bool(self.exclude) and self.exclude.matches(block)
+    
+    def plan(
+        self,
+        blocks: List["CodeBlock"],
+        size_by_bytes: bool = False
+    ) -> Tuple[List[Tuple["CodeBlock", List["CodeBlock"]]], List["CodeBlock"]]:
+        """
+        Decide which blocks to keep, merge and drop.
+        
+        Args:
+            blocks: Parsed blocks in source order
+            size_by_bytes: Size blocks by character span (minified sources)
+        
+        Returns:
+            (groups, excluded): one (host, members) pair per output block, in
+            source order, where members are the source-ordered blocks to
+            merge and host is the one whose name and type the result keeps;
+            and the excluded blocks
+        """
+        groups: List[Tuple["CodeBlock", List["CodeBlock"]]] = []
+        excluded: List["CodeBlock"] = []
+        run_start = 0  # First group of the current run of kept blocks
+        pending: List["CodeBlock"] = []  # Small blocks before the run's first large one
+        
+        for block in blocks:
+            if self.is_excluded(block):
+                excluded.append(block)
+                if pending:
+                    groups.append((self._largest(pending, size_by_bytes), pending))
+                    pending = []
+                run_start = len(groups)
+            elif self._size(block, size_by_bytes) >= self.min_block_size:
+                groups.append((block, pending + [block]))
+                pending = []
+            elif len(groups) > run_start:
+                groups[-1][1].append(block)
+            else:
+                pending.append(block)
+        
+        if pending:
+            groups.append((self._largest(pending, size_by_bytes), pending))
+        return groups, excluded
+    
+    def _largest(self, blocks: List["CodeBlock"], size_by_bytes: bool) -> "CodeBlock":
+        """Pick the host of a group of small blocks."""
+        return max(blocks, key=lambda block: self._size(block, size_by_bytes))
+    
+    @staticmethod
+    def _size(block: "CodeBlock", size_by_bytes: bool) -> int:
+        """Size of a block in lines (or line-equivalents of bytes)."""
+        if size_by_bytes:
+            return max(1, -(-(block.end_offset - block.start_offset) // BYTES_PER_LINE))
+        return block.end_line - block.start_line + 1
@@ -3,9 +3,17 @@ Module generator for splitting JavaScript code into separate files.
 """
 
 import os
-from typing import Dict, List, Set, Optional
+import re
+import json
+import hashlib
+from typing import Any, Dict, Iterator, List, Set, Optional, TextIO, Tuple, Union
 from pathlib import Path
 from dataclasses import dataclass
+from .analyzer import strongly_connected_components
+from .events import EventBus, MODULE_WRITTEN
+from .parser import CodeBlock, JavaScriptParser
+from .sourcemap import SourceMap, SourceMapBuilder
+from .targets import OutputTarget, open_target
 
 
 @dataclass
@@ -15,28 +23,104 @@ class ModuleConfig:
     include_source_maps: bool = False
     add_comments: bool = True
     preserve_original: bool = True
+    source_name: str = "source.js"  # Original source path listed in source maps
+    content_hash: bool = False  # Name module files name.[hash].js and write a manifest
+    load_plan: bool = False  # Write load-plan.json (and preload.html for esm)
+    minify: bool = False  # Strip comments and collapse whitespace in block code
 
 
 class ModuleGenerator:
     """Generates separate module files from parsed code blocks."""
     
-    def __init__(self, blocks, analyzer, config: ModuleConfig):
-        """Initialize with code blocks, analyzer, and configuration."""
+    # Lines longer than this (minified code) get a source map segment after
+    # every statement boundary instead of one per line
+    LONG_LINE = 200
+    SEGMENT_BOUNDARY = re.compile(r'[;{}]')
+    
+    # Hex digits of the content hash kept in file names
+    HASH_LENGTH = 8
+    
+    def __init__(
+        self,
+        blocks,
+        analyzer,
+        config: ModuleConfig,
+        events: Optional[EventBus] = None,
+        input_source_map: Optional[SourceMap] = None,
+        parser: Optional[JavaScriptParser] = None
+    ):
+        """
+        Initialize with code blocks, analyzer, configuration, and an optional event bus.
+        
+        Args:
+            blocks: Parsed code blocks
+            analyzer: Dependency analyzer for the blocks
+            config: Module generation options
+            events: Optional event bus for instrumentation events
+            input_source_map: Map of the original bundle to its own sources; when
+                given, module source maps point through it to those sources
+            parser: Parser that produced the blocks; required by ``config.minify``,
+                which compacts blocks from its scan of the source
+        """
+        if config.minify and parser is None:
+            raise ValueError("Minified output needs the parser that produced the blocks")
         self.blocks = blocks
         self.analyzer = analyzer
         self.config = config
+        self.events = events
+        self.input_source_map = input_source_map
         self.modules: Dict[str, str] = {}
+        self.source_maps: Dict[str, str] = {}
+        self.module_files: Dict[str, str] = {}
+        self.module_hashes: Dict[str, str] = {}
+        self.module_dependencies: Dict[str, List[str]] = {}
+        self.module_depths: Dict[str, int] = {}
+        self.load_order: List[str] = []
         self.index_content = ""
         self.block_to_module: Dict[str, str] = {}
+        self.bytes_written = 0
+        self.parser = parser
+        self.minify_input_bytes = 0  # Block code before and after compaction
+        self.minify_output_bytes = 0
+        self._compacted: Dict[int, Tuple[str, List[Tuple[int, int, int]]]] = {}
+        
+        # Blocks by symbol ID (a name can belong to more than one block)
+        self.symbols = analyzer.symbols
+        self._blocks_by_symbol: Dict[int, List[CodeBlock]] = {}
+        for block in blocks:
+            if block.name:
+                self._blocks_by_symbol.setdefault(self.symbols.intern(block.name), []).append(block)
+    
+    def _blocks_named(self, block_name: str) -> List[CodeBlock]:
+        """Get the blocks with the given name, in source order."""
+        symbol_id = self.symbols.get(block_name)
+        if symbol_id is None:
+            return []
+        return self._blocks_by_symbol.get(symbol_id, [])
+    
+    def _declared_names(self, block_name: str) -> List[str]:
+        """Get the names a block declares: its own plus those of blocks merged into it."""
+        names = [block_name]
+        for block in self._blocks_named(block_name):
+            names.extend(block.merged_names)
+        return names
     
     def generate_modules(self, grouping: Dict[str, List[str]]) -> Dict[str, str]:
         """Generate module files based on grouping."""
         self.modules = {}
+        self.source_maps = {}
+        self.module_hashes = {}
         self.block_to_module = {
             block_name: module_name
             for module_name, block_names in grouping.items()
             for block_name in block_names
         }
+        self.module_dependencies = self._compute_module_dependencies(grouping)
+        self.module_depths = self._compute_module_depths(grouping)
+        self.load_order = sorted(grouping, key=lambda name: (self.module_depths[name], name))
+        self.module_files = {module_name: f"{module_name}.js" for module_name in grouping}
+        if self.config.content_hash:
+            self._hash_module_files(grouping)
         
         for module_name, block_names in grouping.items():
             module_content = self._generate_module(module_name, block_names)
@@ -47,35 +131,131 @@ class ModuleGenerator:
         
         return self.modules
     
-    def _generate_module(self, module_name: str, block_names: List[str]) -> str:
-        """Generate content for a single module."""
+    def _compute_module_dependencies(self, grouping: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """Map each module to the other modules its blocks depend on, sorted by name."""
+        block_to_module = self.block_to_module
+        dependencies = {}
+        for module_name, block_names in grouping.items():
+            modules = set()
+            for block_name in block_names:
+                for block in self._blocks_named(block_name):
+                    for dep in block.dependencies:
+                        dep_module = block_to_module.get(dep)
+                        if dep_module is not None:
+                            modules.add(dep_module)
+            modules.discard(module_name)
+            dependencies[module_name] = sorted(modules)
+        return dependencies
+    
+    def _compute_module_depths(self, grouping: Dict[str, List[str]]) -> Dict[str, int]:
+        """
+        Compute each module's dependency depth.
+        
+        A module that imports nothing has depth 0; otherwise its depth is one
+        more than the deepest module it imports. Modules that import each
+        other share a depth. Loading modules by increasing depth loads every
+        dependency first, and all modules of one depth can load in parallel.
+        """
+        dependencies = self.module_dependencies
+        depths: Dict[str, int] = {}
+        for component in strongly_connected_components(grouping, dependencies.__getitem__):
+            members = set(component)
+            depth = max(
+                (
+                    depths[dep] + 1
+                    for module_name in component
+                    for dep in dependencies[module_name]
+                    if dep not in members
+                ),
+                default=0
+            )
+            for module_name in component:
+                depths[module_name] = depth
+        return depths
+    
+    def _hash_module_files(self, grouping: Dict[str, List[str]]) -> None:
+        """
+        Name module files by a hash of their content and their dependencies' hashes.
+        
+        Imports name the hashed files of their dependencies, so a module's
+        hash covers the hashes of the modules it imports (Merkle style) and a
+        change propagates only to its dependents. Modules that import each
+        other (one strongly connected component) are hashed jointly and share
+        a hash. Content is hashed as generated with unhashed import paths and
+        without the source map comment.
+        """
+        dependencies = self.module_dependencies
+        hashes = self.module_hashes
+        components = strongly_connected_components(grouping, dependencies.__getitem__)
+        for component in components:
+            members = set(component)
+            digest = hashlib.sha256()
+            for module_name in sorted(component):
+                content = self._generate_module(module_name, grouping[module_name], source_map=False)
+                digest.update(module_name.encode("utf-8") + b"\0" + content.encode("utf-8"))
+            external = {dep for module_name in component for dep in dependencies[module_name]}
+            for dep in sorted(external - members):
+                digest.update(hashes[dep].encode("ascii"))
+            value = digest.hexdigest()[:self.HASH_LENGTH]
+            for module_name in component:
+                hashes[module_name] = value
+        
+        self.module_files = {
+            module_name: f"{module_name}.{hashes[module_name]}.js" for module_name in grouping
+        }
+    
+    def _module_file(self, module_name: str) -> str:
+        """File name of a module (``name.js``, or ``name.[hash].js`` with content hashing)."""
+        return self.module_files.get(module_name, f"{module_name}.js")
+    
+    def _module_path(self, module_name: str) -> str:
+        """Relative import path of a module's file (without ``.js`` for CommonJS)."""
+        file_name = self._module_file(module_name)
+        if self.config.format == "commonjs":
+            return f"./{file_name[:-3]}"
+        return f"./{file_name}"
+    
+    def _generate_module(self, module_name: str, block_names: List[str], source_map: bool = True) -> str:
+        """
+        Generate content for a single module.
+        
+        Args:
+            module_name: Module to generate
+            block_names: Blocks of the module, in output order
+            source_map: Also build the module's source map when enabled in the config
+        """
+        include_source_map = source_map and self.config.include_source_maps
+        minify = self.config.minify
         lines = []
         
         # Add header comment
-        if self.config.add_comments:
+        if self.config.add_comments and not minify:
             lines.append(f"// Module: {module_name}")
             lines.append("// Auto-generated by ScriptSpliter")
             lines.append("")
         
-        # Collect all dependencies for blocks in this module
-        all_deps = set()
-        for block_name in block_names:
-            for block in self.blocks:
-                if block.name == block_name:
-                    all_deps.update(block.dependencies)
-        
         # Import dependencies from other modules
         imports = self._generate_imports(module_name, block_names)
         if imports:
             lines.extend(imports)
             lines.append("")
         
-        # Add block contents
+        # Add block contents, noting the generated line each block starts on
+        placed = []
+        generated_line = sum(line.count("\n") + 1 for line in lines)
         for block_name in block_names:
-            for block in self.blocks:
-                if block.name == block_name:
-                    lines.append(block.content)
+            for block in self._blocks_named(block_name):
+                runs = None
+                if minify:
+                    content, runs = self._compact(block)
+                    lines.append(content)
+                else:
+                    content = block.content
+                    lines.append(content)
                     lines.append("")
+                if include_source_map:
+                    placed.append((generated_line, block, runs))
+                    generated_line += content.count("\n") + (1 if minify else 2)
         
         # Generate exports
         exports = self._generate_exports(block_names)
@@ -83,7 +263,121 @@ class ModuleGenerator:
             lines.append("")
             lines.extend(exports)
         
-        return "\n".join(lines).strip() + "\n"
+        text = "\n".join(lines)
+        content = text.strip() + "\n"
+        if not include_source_map:
+            return content
+        
+        # Leading whitespace removed by strip() shifts everything after it
+        leading = text[:len(text) - len(text.lstrip())]
+        file_name = self.module_files[module_name]
+        self.source_maps[module_name] = self._generate_source_map(file_name, placed, leading)
+        return content + f"//# sourceMappingURL={file_name}.map\n"
+    
+    def _compact(self, block: CodeBlock) -> Tuple[str, List[Tuple[int, int, int]]]:
+        """Compact a block's code once, counting the bytes saved."""
+        compacted = self._compacted.get(id(block))
+        if compacted is None:
+            compacted = self._compacted[id(block)] = self.parser.compact(*self.parser.block_span(block))
+            self.minify_input_bytes += len(block.content.encode("utf-8"))
+            self.minify_output_bytes += len(compacted[0].encode("utf-8"))
+        return compacted
+    
+    def _generate_source_map(
+        self,
+        file_name: str,
+        placed: List[Tuple[int, CodeBlock, Optional[List[Tuple[int, int, int]]]]],
+        leading: str
+    ) -> str:
+        """
+        Build the v3 source map of one module from its block placements.
+        
+        Block content is copied verbatim, so each content line maps to its
+        source line at a fixed column offset; no text is compared. Compacted
+        blocks map each run of text they copied verbatim.
+        
+        Args:
+            file_name: Module file the map belongs to
+            placed: (generated line, block, compaction runs or None) in module order
+            leading: Text stripped from the start of the module
+        """
+        input_map = self.input_source_map
+        if input_map is not None:
+            builder = SourceMapBuilder(
+                file_name, input_map.sources, input_map.names, input_map.sources_content
+            )
+        else:
+            builder = SourceMapBuilder(file_name, [self.config.source_name])
+        
+        line_shift = leading.count("\n")
+        column_shift = len(leading) - (leading.rfind("\n") + 1)
+        boundary = self.SEGMENT_BOUNDARY
+        for generated_line, block, runs in placed:
+            generated_line -= line_shift
+            if runs is not None:
+                self._add_compacted_spans(builder, generated_line, block, runs, input_map)
+                continue
+            texts = block.content.split("\n")
+            if (
+                input_map is None and generated_line > 0 and not block.start_column
+                and max(map(len, texts)) <= self.LONG_LINE
+            ):
+                # Whole lines copied from column 0
+                builder.add_lines(generated_line, block.start_line, len(texts))
+                continue
+            
+            for offset, text in enumerate(texts):
+                if generated_line + offset < 0:
+                    continue
+                skip = column_shift if generated_line + offset == 0 else 0
+                boundaries = ()
+                if input_map is None and len(text) > self.LONG_LINE:
+                    boundaries = [match.end() - skip for match in boundary.finditer(text, skip)]
+                builder.add_span(
+                    generated_line + offset,
+                    0,
+                    block.start_line + offset,
+                    (block.start_column if offset == 0 else 0) + skip,
+                    len(text) - skip,
+                    input_map,
+                    boundaries
+                )
+        
+        return builder.to_json()
+    
+    def _add_compacted_spans(
+        self,
+        builder: SourceMapBuilder,
+        generated_line: int,
+        block: CodeBlock,
+        runs: List[Tuple[int, int, int]],
+        input_map: Optional[SourceMap]
+    ) -> None:
+        """Map the verbatim runs of a compacted block, one span per run line."""
+        text = self._compacted[id(block)][0]
+        position_of = self.parser.position_of
+        line, line_start, scanned = generated_line, 0, 0
+        for text_offset, source_offset, length in runs:
+            newlines = text.count("\n", scanned, text_offset)
+            if newlines:
+                line += newlines
+                line_start = text.rfind("\n", scanned, text_offset) + 1
+            original_line, original_column = position_of(source_offset)
+            column = text_offset - line_start
+            # A run spans lines only inside multi-line literals
+            pieces = text[text_offset:text_offset + length].split("\n")
+            for index, piece in enumerate(pieces):
+                if index:
+                    line += 1
+                    original_line += 1
+                    column = original_column = 0
+                if line >= 0:
+                    builder.add_span(
+                        line, column, original_line, original_column, len(piece), input_map
+                    )
+            if len(pieces) > 1:
+                line_start = text.rfind("\n", text_offset, text_offset + length) + 1
+            scanned = text_offset + length
     
     def _generate_imports(self, current_module: str, block_names: List[str]) -> List[str]:
         """Generate import statements for dependencies."""
@@ -91,13 +385,10 @@ class ModuleGenerator:
         dependencies = set()
         
         # Find all external dependencies (from other modules)
+        members = set(block_names)
         for block_name in block_names:
-            for block in self.blocks:
-                if block.name == block_name:
-                    for dep in block.dependencies:
-                        # Check if this dependency is in another module
-                        if dep not in block_names:
-                            dependencies.add(dep)
+            for block in self._blocks_named(block_name):
+                dependencies.update(block.dependencies - members)
         
         if not dependencies:
             return imports
@@ -107,13 +398,15 @@ class ModuleGenerator:
                 # Find which module this dependency belongs to
                 dep_module = self._find_module_for_block(dep)
                 if dep_module and dep_module != current_module:
-                    imports.append(f"import {{ {dep} }} from './{dep_module}.js';")
+                    names = ', '.join(self._declared_names(dep))
+                    imports.append(f"import {{ {names} }} from '{self._module_path(dep_module)}';")
         
         elif self.config.format == "commonjs":
             for dep in sorted(dependencies):
                 dep_module = self._find_module_for_block(dep)
                 if dep_module and dep_module != current_module:
-                    imports.append(f"const {{ {dep} }} = require('./{dep_module}');")
+                    names = ', '.join(self._declared_names(dep))
+                    imports.append(f"const {{ {names} }} = require('{self._module_path(dep_module)}');")
         
         elif self.config.format == "scripts":
             # No imports needed for script format
@@ -126,12 +419,14 @@ class ModuleGenerator:
         exports = []
         
         if self.config.format == "esm":
-            export_items = [name for name in block_names if name]
+            export_items = [name for block_name in block_names if block_name
+                            for name in self._declared_names(block_name)]
             if export_items:
                 exports.append(f"export {{ {', '.join(export_items)} }};")
         
         elif self.config.format == "commonjs":
-            export_items = [name for name in block_names if name]
+            export_items = [name for block_name in block_names if block_name
+                            for name in self._declared_names(block_name)]
             if export_items:
                 exports.append("module.exports = {")
                 for name in export_items:
@@ -152,7 +447,9 @@ class ModuleGenerator:
         """Generate an index/entry file."""
         lines = []
         
-        if self.config.add_comments:
+        if self.config.add_comments and self.config.format == "scripts":
+            lines.append("<!-- Main index file, auto-generated by ScriptSpliter -->")
+        elif self.config.add_comments:
             lines.append("// Main index file")
             lines.append("// Auto-generated by ScriptSpliter")
             lines.append("")
@@ -161,50 +458,160 @@ class ModuleGenerator:
         
         if self.config.format == "esm":
             for module_name in module_names:
-                lines.append(f"export * from './{module_name}.js';")
+                lines.append(f"export * from '{self._module_path(module_name)}';")
         
         elif self.config.format == "commonjs":
             lines.append("module.exports = {")
             for module_name in module_names:
-                lines.append(f"  ...require('./{module_name}'),")
+                lines.append(f"  ...require('{self._module_path(module_name)}'),")
             lines.append("};")
         
         elif self.config.format == "scripts":
-            lines.append("<!-- Include all modules -->")
-            for module_name in module_names:
-                lines.append(f"<script src=\"{module_name}.js\"></script>")
+            # Deferred scripts run in document order, dependencies first
+            lines.append("<!-- Include all modules in dependency order -->")
+            for module_name in self.load_order:
+                lines.append(f"<script defer src=\"{self._module_file(module_name)}\"></script>")
         
         return "\n".join(lines).strip() + "\n"
     
-    def write_files(self, output_dir: str) -> Dict[str, str]:
-        """Write generated modules to files."""
-        output_path = Path(output_dir)
-        output_path.mkdir(parents=True, exist_ok=True)
-        
+    def write_files(self, output: Union[str, Path, OutputTarget]) -> Dict[str, str]:
+        """
+        Write generated modules, their source maps, the index and any manifests.
+        
+        Args:
+            output: Output directory, or a target (memory, stream, ...) that
+                receives each file as it is written
+        
+        Returns:
+            Dictionary mapping module names (and "index", "manifest", ...) to
+            file locations
+        """
+        target = open_target(output)
         file_paths = {}
+        self.bytes_written = 0
+        
+        def write(key: str, name: str, data: bytes) -> str:
+            location = file_paths[key] = target.write(name, data)
+            self.bytes_written += len(data)
+            return location
         
         # Write modules
         for module_name, content in self.modules.items():
-            file_ext = ".js" if self.config.format != "scripts" else ".js"
-            file_name = f"{module_name}{file_ext}"
-            file_path = output_path / file_name
+            file_name = self._module_file(module_name)
+            data = content.encode("utf-8")
+            location = write(module_name, file_name, data)
+            if self.events:
+                self.events.emit(
+                    MODULE_WRITTEN, module=module_name, path=location, bytes=len(data)
+                )
             
-            with open(file_path, 'w') as f:
-                f.write(content)
-            
-            file_paths[module_name] = str(file_path)
+            source_map = self.source_maps.get(module_name)
+            if source_map is not None:
+                write(f"{module_name}.map", f"{file_name}.map", source_map.encode("utf-8"))
         
         # Write index
         index_name = "index.js" if self.config.format != "scripts" else "index.html"
-        index_path = output_path / index_name
+        write("index", index_name, self.index_content.encode("utf-8"))
         
-        with open(index_path, 'w') as f:
-            f.write(self.index_content)
+        # Write the manifest (and import map) of hashed file names
+        if self.config.content_hash:
+            for name, document in self.get_manifest_files().items():
+                write(name, f"{name}.json", (json.dumps(document, indent=2) + "\n").encode("utf-8"))
         
-        file_paths["index"] = str(index_path)
+        # Write the load plan and preload hints
+        if self.config.load_plan:
+            for name, text in self.get_load_plan_files().items():
+                write(name.split(".")[0], name, text.encode("utf-8"))
         
         return file_paths
     
+    def get_load_plan(self) -> Dict[str, Any]:
+        """
+        Describe how to load the generated modules without a request waterfall.
+        
+        Returns:
+            ``levels`` lists module files by dependency depth (each level only
+            needs the previous ones, so a level can be fetched in parallel),
+            ``order`` is the flattened dependency order, and ``modules`` gives
+            each module's file, depth and imported modules
+        """
+        levels: List[List[str]] = []
+        for module_name in self.load_order:
+            depth = self.module_depths[module_name]
+            while len(levels) <= depth:
+                levels.append([])
+            levels[depth].append(self._module_file(module_name))
+        
+        return {
+            "format": self.config.format,
+            "entry": "index.html" if self.config.format == "scripts" else "index.js",
+            "critical_chain": len(levels),
+            "order": [self._module_file(module_name) for module_name in self.load_order],
+            "levels": levels,
+            "modules": {
+                module_name: {
+                    "file": self._module_file(module_name),
+                    "depth": self.module_depths[module_name],
+                    "imports": self.module_dependencies[module_name],
+                }
+                for module_name in self.load_order
+            },
+        }
+    
+    def get_load_plan_files(self) -> Dict[str, str]:
+        """
+        Render the load plan files.
+        
+        Returns:
+            ``load-plan.json``, plus for ESM ``preload.html`` with one
+            ``<link rel="modulepreload">`` per module in dependency order and
+            the entry script, so the browser fetches every module up front
+        """
+        files = {"load-plan.json": json.dumps(self.get_load_plan(), indent=2) + "\n"}
+        if self.config.format == "esm":
+            lines = []
+            if self.config.add_comments:
+                lines.append("<!-- Module preload hints, auto-generated by ScriptSpliter -->")
+            for module_name in self.load_order:
+                lines.append(f"<link rel=\"modulepreload\" href=\"{self._module_file(module_name)}\">")
+            lines.append("<script type=\"module\" src=\"index.js\"></script>")
+            files["preload.html"] = "\n".join(lines) + "\n"
+        return files
+    
+    def get_manifest_files(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Build the JSON documents that map stable module names to hashed files.
+        
+        Returns:
+            ``{"manifest": {...}}``, plus ``"importmap"`` (a browser import map
+            from ``./name.js`` to ``./name.[hash].js``) for the ESM format
+        """
+        members: Dict[str, List[str]] = {}
+        for block_name, module_name in self.block_to_module.items():
+            members.setdefault(module_name, []).append(block_name)
+        
+        manifest = {}
+        for module_name in self.modules:
+            entry = {
+                "file": self._module_file(module_name),
+                "hash": self.module_hashes.get(module_name),
+                "imports": self.module_dependencies.get(module_name, []),
+                "blocks": members.get(module_name, []),
+            }
+            if module_name in self.source_maps:
+                entry["map"] = entry["file"] + ".map"
+            manifest[module_name] = entry
+        
+        documents = {"manifest": manifest}
+        if self.config.format == "esm":
+            documents["importmap"] = {
+                "imports": {
+                    f"./{module_name}.js": self._module_path(module_name)
+                    for module_name in sorted(self.modules)
+                }
+            }
+        return documents
+    
     def get_file_extension(self) -> str:
         """Get the appropriate file extension for the format."""
         if self.config.format == "scripts":
@@ -215,11 +622,14 @@ class ModuleGenerator:
 class CodeAnalysisReport:
     """Generates a report about the code split."""
     
-    def __init__(self, blocks, modules, analyzer):
-        """Initialize with code blocks, modules, and analyzer."""
+    OUTPUT_FORMATS = ("text", "json", "ndjson")
+    
+    def __init__(self, blocks, modules, analyzer, grouping: Optional[Dict[str, List[str]]] = None):
+        """Initialize with code blocks, modules, analyzer, and optional module grouping."""
         self.blocks = blocks
         self.modules = modules
         self.analyzer = analyzer
+        self.grouping = grouping or {}
     
     def generate_report(self) -> str:
         """Generate a comprehensive analysis report."""
@@ -278,3 +688,93 @@ class CodeAnalysisReport:
         lines.append("=" * 60)
         
         return "\n".join(lines)
+    
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Yield the analysis as flat records, one per block, edge, cycle, etc."""
+        block_types: Dict[str, int] = {}
+        for block in self.blocks:
+            block_types[block.type] = block_types.get(block.type, 0) + 1
+        
+        yield {
+            "record": "summary",
+            "total_blocks": len(self.blocks),
+            "total_modules": len(self.modules) or len(self.grouping),
+            "blocks_by_type": dict(sorted(block_types.items())),
+        }
+        
+        for block in self.blocks:
+            yield {
+                "record": "block",
+                "name": block.name,
+                "type": block.type,
+                "start_line": block.start_line + 1,
+                "end_line": block.end_line + 1,
+                "exported": block.is_exported,
+                "dependencies": sorted(block.dependencies),
+            }
+        
+        for block in self.blocks:
+            for dep in sorted(block.dependencies):
+                yield {"record": "edge", "from": block.name, "to": dep}
+        
+        for cycle in self.analyzer.detect_circular_dependencies():
+            yield {"record": "cycle", "path": cycle}
+        
+        for i, block_name in enumerate(self.analyzer.get_import_order(), 1):
+            yield {"record": "import_order", "position": i, "name": block_name}
+        
+        for module_name, block_names in self.grouping.items():
+            yield {"record": "module", "name": module_name, "blocks": list(block_names)}
+    
+    def write(self, stream: TextIO, output_format: str = "text") -> None:
+        """Write the report to a stream as text, a JSON document, or NDJSON records."""
+        if output_format == "text":
+            stream.write(self.generate_report())
+            stream.write("\n")
+        elif output_format == "ndjson":
+            for record in self.iter_records():
+                stream.write(json.dumps(record))
+                stream.write("\n")
+        elif output_format == "json":
+            self._write_json(stream)
+        else:
+            raise ValueError(
+                f"Invalid output format: {output_format}. "
+                f"Must be one of {', '.join(self.OUTPUT_FORMATS)}"
+            )
+    
+    def _write_json(self, stream: TextIO) -> None:
+        """Write records as one JSON object, with a list per record kind."""
+        sections = {
+            "block": "blocks",
+            "edge": "edges",
+            "cycle": "cycles",
+            "import_order": "import_order",
+            "module": "modules",
+        }
+        stream.write("{")
+        current = None
+        first_in_section = True
+        seen = set()
+        for record in self.iter_records():
+            kind = record.pop("record")
+            if kind == "summary":
+                stream.write(f'"summary": {json.dumps(record)}')
+                continue
+            if kind != current:
+                if current is not None:
+                    stream.write("]")
+                stream.write(f', "{sections[kind]}": [')
+                current = kind
+                seen.add(kind)
+                first_in_section = True
+            if not first_in_section:
+                stream.write(", ")
+            stream.write(json.dumps(record))
+            first_in_section = False
+        if current is not None:
+            stream.write("]")
+        for kind, key in sections.items():
+            if kind not in seen:
+                stream.write(f', "{key}": []')
+        stream.write("}\n")
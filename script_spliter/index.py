@@ -0,0 +1,281 @@
+"""
+On-disk symbol index for answering block and dependency queries without reparsing.
+"""
+
+import os
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Union
+
+from .analyzer import dependency_tree
+
+
+PathLike = Union[str, Path]
+
+SCHEMA = """
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE blocks (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    type TEXT NOT NULL,
+    start_line INTEGER NOT NULL,
+    end_line INTEGER NOT NULL,
+    start_offset INTEGER NOT NULL,
+    end_offset INTEGER NOT NULL,
+    exported INTEGER NOT NULL,
+    export_default INTEGER NOT NULL
+);
+CREATE INDEX blocks_by_name ON blocks (name);
+CREATE TABLE edges (
+    source TEXT NOT NULL,
+    target TEXT NOT NULL,
+    PRIMARY KEY (source, target)
+) WITHOUT ROWID;
+CREATE INDEX edges_by_target ON edges (target, source);
+CREATE TABLE exports (
+    name TEXT PRIMARY KEY,
+    target TEXT NOT NULL
+);
+"""
+
+
+class SymbolIndex:
+    """
+    SQLite index of the blocks, dependency edges and exports of one source file.
+    
+    The index records the size and modification time of the source it was
+    built from; ``open`` refuses an index whose source has changed since, so
+    callers fall back to parsing and rebuilding it.
+    """
+    
+    SCHEMA_VERSION = 1
+    SUFFIX = ".index.sqlite"
+    
+    def __init__(self, connection: sqlite3.Connection, path: Path):
+        """
+        Wrap an open index connection.
+        
+        Args:
+            connection: SQLite connection to an index file
+            path: Path of the index file
+        """
+        self.connection = connection
+        self.path = path
+    
+    @classmethod
+    def default_path(cls, source_file: PathLike) -> Path:
+        """Return the default index location: next to the source file."""
+        source_file = Path(source_file)
+        return source_file.with_name(source_file.name + cls.SUFFIX)
+    
+    @classmethod
+    def build(
+        cls,
+        index_path: PathLike,
+        source_file: PathLike,
+        blocks: Iterable,
+        dependencies: Mapping[str, Set[str]],
+        exports: Mapping[str, str]
+    ) -> "SymbolIndex":
+        """
+        Write a new index, replacing any existing one atomically.
+        
+        Args:
+            index_path: Index file to write
+            source_file: Source the blocks were parsed from (for freshness checks)
+            blocks: Parsed code blocks
+            dependencies: Block name -> names of the blocks it depends on
+            exports: Exported name -> exported target
+        
+        Returns:
+            The new index, open read-only
+        """
+        index_path = Path(index_path)
+        temp_path = index_path.with_name(index_path.name + f".{os.getpid()}.tmp")
+        if temp_path.exists():
+            temp_path.unlink()
+        
+        connection = sqlite3.connect(str(temp_path))
+        try:
+            with connection:
+                connection.executescript(SCHEMA)
+                connection.executemany(
+                    "INSERT INTO meta (key, value) VALUES (?, ?)",
+                    cls._source_meta(source_file).items()
+                )
+                connection.executemany(
+                    "INSERT INTO blocks (name, type, start_line, end_line, start_offset,"
+                    " end_offset, exported, export_default) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        (block.name, block.type, block.start_line, block.end_line,
+                         block.start_offset, block.end_offset,
+                         int(block.is_exported), int(block.export_default))
+                        for block in blocks
+                    )
+                )
+                connection.executemany(
+                    "INSERT OR IGNORE INTO edges (source, target) VALUES (?, ?)",
+                    (
+                        (source, target)
+                        for source, targets in dependencies.items()
+                        for target in targets
+                    )
+                )
+                connection.executemany(
+                    "INSERT INTO exports (name, target) VALUES (?, ?)",
+                    exports.items()
+                )
+        finally:
+            connection.close()
+        
+        os.replace(temp_path, index_path)
+        return cls.open(index_path)
+    
+    @classmethod
+    def open(
+        cls,
+        index_path: PathLike,
+        source_file: Optional[PathLike] = None
+    ) -> Optional["SymbolIndex"]:
+        """
+        Open an index read-only.
+        
+        Args:
+            index_path: Index file to open
+            source_file: When given, the index is only returned if it was built
+                from this file at its current size and modification time
+        
+        Returns:
+            The index, or None if it is missing, unreadable, from another
+            schema version, or stale
+        """
+        index_path = Path(index_path)
+        if not index_path.is_file():
+            return None
+        try:
+            connection = sqlite3.connect(
+                index_path.resolve().as_uri() + "?mode=ro", uri=True
+            )
+        except sqlite3.Error:
+            return None
+        index = cls(connection, index_path)
+        try:
+            meta = index.get_meta()
+        except sqlite3.Error:
+            index.close()
+            return None
+        
+        if meta.get("schema_version") != str(cls.SCHEMA_VERSION):
+            index.close()
+            return None
+        if source_file is not None and not index.is_fresh(source_file):
+            index.close()
+            return None
+        return index
+    
+    @classmethod
+    def _source_meta(cls, source_file: PathLike) -> Dict[str, str]:
+        """Describe the source file state recorded in the index."""
+        source_file = Path(source_file)
+        stat = source_file.stat()
+        return {
+            "schema_version": str(cls.SCHEMA_VERSION),
+            "source_path": str(source_file.resolve()),
+            "source_size": str(stat.st_size),
+            "source_mtime_ns": str(stat.st_mtime_ns),
+        }
+    
+    def get_meta(self) -> Dict[str, str]:
+        """Return the index metadata (schema version and source file state)."""
+        return dict(self.connection.execute("SELECT key, value FROM meta"))
+    
+    def is_fresh(self, source_file: PathLike) -> bool:
+        """Check that the index was built from source_file as it is now."""
+        try:
+            current = self._source_meta(source_file)
+        except OSError:
+            return False
+        meta = self.get_meta()
+        return all(meta.get(key) == value for key, value in current.items())
+    
+    def get_blocks_info(self) -> List[Dict]:
+        """Get information about all indexed blocks (same shape as ``ScriptSpliter.get_blocks_info``)."""
+        dependencies: Dict[str, List[str]] = {}
+        for source, target in self.connection.execute(
+            "SELECT source, target FROM edges ORDER BY source, target"
+        ):
+            dependencies.setdefault(source, []).append(target)
+        
+        return [
+            {
+                "name": name,
+                "type": block_type,
+                "lines": f"{start_line + 1}-{end_line + 1}",
+                "offsets": f"{start_offset}-{end_offset}",
+                "dependencies": dependencies.get(name, []),
+                "exported": bool(exported)
+            }
+            for name, block_type, start_line, end_line, start_offset, end_offset, exported
+            in self.connection.execute(
+                "SELECT name, type, start_line, end_line, start_offset, end_offset, exported"
+                " FROM blocks ORDER BY id"
+            )
+        ]
+    
+    def has_block(self, name: str) -> bool:
+        """Check whether a block with the given name is indexed."""
+        row = self.connection.execute(
+            "SELECT 1 FROM blocks WHERE name = ? LIMIT 1", (name,)
+        ).fetchone()
+        return row is not None
+    
+    def get_dependencies(self, name: str) -> List[str]:
+        """Get the direct dependencies of a block, sorted by name."""
+        return [
+            target for (target,) in self.connection.execute(
+                "SELECT target FROM edges WHERE source = ? ORDER BY target", (name,)
+            )
+        ]
+    
+    def get_dependents(self, name: str) -> List[str]:
+        """Get the blocks that directly depend on a block, sorted by name."""
+        return [
+            source for (source,) in self.connection.execute(
+                "SELECT source FROM edges WHERE target = ? ORDER BY source", (name,)
+            )
+        ]
+    
+    def get_all_dependents(self, name: str) -> List[str]:
+        """Get all direct and transitive dependents of a block, sorted by name."""
+        return [
+            source for (source,) in self.connection.execute(
+                "WITH RECURSIVE dependents (name) AS ("
+                " SELECT source FROM edges WHERE target = ?"
+                " UNION SELECT edges.source FROM edges JOIN dependents ON edges.target = dependents.name"
+                ") SELECT name FROM dependents WHERE name != ? ORDER BY name",
+                (name, name)
+            )
+        ]
+    
+    def get_exports(self) -> Dict[str, str]:
+        """Get the exported names and their targets."""
+        return dict(self.connection.execute("SELECT name, target FROM exports"))
+    
+    def get_dependency_tree(self, block_name: str) -> Dict:
+        """Get dependency tree for a specific block (same shape as ``ScriptSpliter.get_dependency_tree``)."""
+        if not self.has_block(block_name):
+            return {}
+        return dependency_tree(block_name, self.get_dependencies)
+    
+    def close(self) -> None:
+        """Close the index connection."""
+        self.connection.close()
+    
+    def __enter__(self) -> "SymbolIndex":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
@@ -3,8 +3,19 @@ JavaScript code parser to identify functions, classes, and code blocks.
 """
 
 import re
-from typing import List, Dict, Tuple, Optional, Set
+from array import array
+from bisect import bisect_right
+from heapq import merge
+from itertools import accumulate
+from typing import TYPE_CHECKING, List, Dict, Tuple, Optional, Set
 from dataclasses import dataclass, field
+from . import patterns
+from .events import EventBus, BLOCK_PARSED
+from .profiling import Profiler, profile_stage
+from .symbols import SymbolTable
+
+if TYPE_CHECKING:
+    from .filters import BlockFilter
 
 
 @dataclass
@@ -18,6 +29,10 @@ class CodeBlock:
     dependencies: Set[str] = field(default_factory=set)
     is_exported: bool = False
     export_default: bool = False
+    start_offset: int = 0  # Character offset of the block start in the source
+    end_offset: int = 0  # Character offset just past the block end
+    start_column: int = 0  # Source column of the first content character (0 unless minified)
+    merged_names: List[str] = field(default_factory=list)  # Small blocks merged into this one
     
     def __hash__(self):
         return hash(self.name or id(self))
@@ -31,204 +46,483 @@ class CodeBlock:
 class JavaScriptParser:
     """Parses JavaScript code to extract functions, classes, and dependencies."""
     
-    # Regex patterns for parsing
-    FUNCTION_PATTERN = r'(?:^|\s)(?:async\s+)?function\s+(\w+)\s*\('
-    ARROW_FUNCTION_PATTERN = r'(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s*)?\([^)]*\)\s*(?:=>|=\s*async\s*\()'
-    CLASS_PATTERN = r'class\s+(\w+)(?:\s+extends\s+(\w+))?\s*\{'
-    CONST_PATTERN = r'(?:^|\s)(?:const|let|var)\s+(\w+)\s*=\s*(?!(?:async\s*)?\()'
-    EXPORT_PATTERN = r'export\s+(?:default\s+)?(?:(?:async\s+)?function|class)\s+(\w+)|export\s*\{\s*([^}]+)\s*\}'
-    IMPORT_PATTERN = r'import\s+(?:(?:\{[^}]+\})|(?:\*\s+as\s+\w+)|(?:\w+))\s+from\s+[\'"]([^\'"]+)[\'"]'
-    REQUIRE_PATTERN = r'require\s*\(\s*[\'"]([^\'"]+)[\'"]\s*\)'
-    
-    def __init__(self, source: str):
-        """Initialize parser with JavaScript source code."""
+    # Declaration, export and import patterns, precompiled once per process.
+    # These can backtrack on pathological input, so they go through
+    # ``patterns.compile``; the second argument is the atomic/possessive
+    # variant used when the ``regex`` backend is available.
+    FUNCTION_PATTERN = patterns.compile(
+        r'(?:^|(?<=\s))(?:async\s+)?function\s+(\w+)\s*\(', re.MULTILINE,
+        r'(?:^|(?<=\s))(?:async\s++)?function\s++(\w++)\s*+\('
+    )
+    ARROW_FUNCTION_PATTERN = patterns.compile(
+        r'\b(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s*)?\([^)]*\)\s*(?:=>|=\s*async\s*\()', 0,
+        r'\b(?:const|let|var)\s++(\w++)\s*+=\s*+(?:async\s*+)?\([^)]*+\)\s*+(?:=>|=\s*+async\s*+\()'
+    )
+    ARROW_TAIL_PATTERN = patterns.compile(
+        r'\s*(?:=>|=\s*async\s*\()', 0,
+        r'\s*+(?:=>|=\s*+async\s*+\()'
+    )
+    CLASS_PATTERN = patterns.compile(
+        r'\bclass\s+(\w+)(?:\s+extends\s+(\w+))?\s*\{', 0,
+        r'\bclass\s++(\w++)(?:\s++extends\s++(\w++))?\s*+\{'
+    )
+    CONST_PATTERN = patterns.compile(
+        r'(?:^|(?<=\s))(?:const|let|var)\s+(\w+)\s*=\s*(?!(?:async\s*)?\()', re.MULTILINE
+    )
+    EXPORT_PATTERN = patterns.compile(
+        r'export\s+(?:default\s+)?(?:(?:async\s+)?function|class)\s+(\w+)|export\s*\{\s*([^}]+)\s*\}', 0,
+        r'export\s++(?:default\s++)?(?:(?:async\s++)?function|class)\s++(\w++)|export\s*+\{\s*+([^}]+)\s*\}'
+    )
+    IMPORT_PATTERN = patterns.compile(
+        r'import\s+(?:(?:\{[^}]+\})|(?:\*\s+as\s+\w+)|(?:\w+))\s+from\s+[\'"]([^\'"]+)[\'"]', 0,
+        r'import\s++(?:(?:\{[^}]++\})|(?:\*\s++as\s++\w++)|(?:\w++))\s++from\s++[\'"]([^\'"]++)[\'"]'
+    )
+    REQUIRE_PATTERN = patterns.compile(
+        r'require\s*\(\s*[\'"]([^\'"]+)[\'"]\s*\)', 0,
+        r'require\s*+\(\s*+[\'"]([^\'"]++)[\'"]\s*+\)'
+    )
+    EXPORT_LINE_PATTERN = patterns.compile(r'export\s+.*')
+    EXPORT_DEFAULT_PATTERN = patterns.compile(r'export\s+default\s+(\w+)')
+    EXPORT_DECLARATION_PATTERN = patterns.compile(r'export\s+(?:(?:async\s+)?function|class)\s+(\w+)')
+    IDENTIFIER_PATTERN = re.compile(r'\w+')
+    
+    # Single-pass alternation of the declaration patterns above; the matching
+    # named group selects the handler. The arrow branch stops at the opening
+    # parenthesis; the rest of ARROW_FUNCTION_PATTERN is checked separately so
+    # an unclosed parameter list is not rescanned from every candidate.
+    TOP_LEVEL_PATTERN = patterns.compile(
+        r'(?P<function>(?:^|(?<=\s))(?:async\s+)?function\s+(?P<function_name>\w+)\s*\()'
+        r'|(?P<arrow>\b(?:const|let|var)\s+(?P<arrow_name>\w+)\s*=\s*(?:async\s*)?\()'
+        r'|(?P<class>\bclass\s+(?P<class_name>\w+)(?:\s+extends\s+(?P<class_parent>\w+))?\s*\{)'
+        r'|(?P<assignment>(?:^|(?<=\s))(?:const|let|var)\s+(?P<assignment_name>\w+)\s*=\s*(?!(?:async\s*)?\())',
+        re.MULTILINE,
+        r'(?P<function>(?:^|(?<=\s))(?:async\s++)?function\s++(?P<function_name>\w++)\s*+\()'
+        r'|(?P<arrow>\b(?:const|let|var)\s++(?P<arrow_name>\w++)\s*+=\s*+(?:async\s*+)?\()'
+        r'|(?P<class>\bclass\s++(?P<class_name>\w++)(?:\s++extends\s++(?P<class_parent>\w++))?\s*+\{)'
+        r'|(?P<assignment>(?:^|(?<=\s))(?:const|let|var)\s+(?P<assignment_name>\w+)\s*=\s*(?!(?:async\s*)?\())'
+    )
+    
+    # Average characters per line above which the source is treated as minified
+    MINIFIED_LINE_LENGTH = 500
+    
+    # Automatic semicolon insertion: a newline does not end a statement after
+    # a token in CONTINUES_AFTER or before a token in CONTINUES_BEFORE.
+    CONTINUES_AFTER = frozenset(',([{=+-*/%&|^!~?:<>.')
+    CONTINUES_BEFORE = frozenset('.,)]}?:=+-*/%&|^<>([`')
+    
+    # Compaction: a newline between two tokens can be dropped after a token in
+    # JOIN_AFTER or before one in JOIN_BEFORE. These are CONTINUES_AFTER and
+    # CONTINUES_BEFORE minus the tokens where dropping it could change the
+    # parse: '++'/'--' and '/' (a regex end), and '(', '[' and '`' after
+    # restricted productions such as `return`.
+    JOIN_AFTER = frozenset(',([{;=*%&|^!~?:<>')
+    JOIN_BEFORE = frozenset('.,)]};?:=*%&|^<>')
+    # Adjacent characters that would form a different token without a space
+    FUSING_PAIRS = frozenset(['++', '--', '//', '/*', '<!', '->'])
+    # HTML-like comment opener (classic scripts) that can also form across a
+    # gap from more than two characters, e.g. `a <! --b` or `a<!- -b`
+    HTML_COMMENT_OPEN = '<!--'
+    # Whitespace runs worth compacting: single characters between two word
+    # characters are left alone (they stay as they are). Plain ``re``: a
+    # character class cannot backtrack, and this runs once per gap.
+    CODE_WHITESPACE = re.compile(
+        r'[ \t\r\n\v\f]{2,}|(?<![\w$])[ \t\r\n\v\f]|[ \t\r\n\v\f](?![\w$\\])'
+    )
+    
+    # A '/' after one of these tokens (or keywords) starts a regex literal,
+    # not a division.
+    REGEX_PRECEDERS = frozenset(['', '(', ',', '=', ':', '[', '!', '&', '|',
+                                 '?', '{', '}', ';', '+', '-', '*', '%',
+                                 '<', '>', '~', '^'])
+    REGEX_KEYWORDS = frozenset(['return', 'typeof', 'instanceof', 'in', 'of',
+                                'new', 'delete', 'void', 'throw', 'case', 'do',
+                                'else', 'yield', 'await'])
+    
+    # Scanner tokens: characters that can change the scan state. Newlines
+    # only matter outside any nesting, where they may end a statement. The
+    # scanner patterns are character classes and unrolled loops that cannot
+    # backtrack, so they use plain ``re``, which is several times faster here
+    # than the ``regex`` backend.
+    TOP_LEVEL_TOKENS = re.compile(r'[\n"\'`/{}()\[\];]')
+    NESTED_TOKENS = re.compile(r'["\'`/{}()\[\];]')
+    NON_SPACE = re.compile(r'\S')
+    # String bodies up to and including the closing quote (or end of input)
+    STRING_BODIES = {
+        '"': re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"?', re.DOTALL),
+        "'": re.compile(r"[^'\\]*(?:\\.[^'\\]*)*'?", re.DOTALL),
+    }
+    # Template literal text up to the closing backtick or the next ${
+    TEMPLATE_CHUNK = re.compile(r'[^`\\$]*(?:(?:\\.|\$(?!\{))[^`\\$]*)*', re.DOTALL)
+    
+    def __init__(
+        self,
+        source: str,
+        profiler: Optional[Profiler] = None,
+        events: Optional[EventBus] = None,
+        minified: Optional[bool] = None
+    ):
+        """
+        Initialize parser with JavaScript source code.
+        
+        Args:
+            source: JavaScript source code
+            profiler: Optional profiler for per-stage measurements
+            events: Optional event bus for instrumentation events
+            minified: Force minified mode on or off (default: detect from
+                average line length). In minified mode block content is sliced
+                by character offsets instead of whole lines.
+        """
         self.source = source
+        self.profiler = profiler
+        self.events = events
+        self.matches_scanned = 0
         self.lines = source.split('\n')
+        self.minified = self._looks_minified() if minified is None else minified
         self.blocks: List[CodeBlock] = []
         self.imports: Set[str] = set()
+        self.symbols = SymbolTable()
         self.exports: Dict[str, str] = {}
-        self._depth_at: List[int] = []
-        self._code_at: List[bool] = []
-        self._build_position_maps()
+        self.excluded_blocks: List[CodeBlock] = []
+        self._aliases: Dict[str, str] = {}  # Merged block name -> name of the block holding it
+        self._line_starts: List[int] = [0]
+        self._line_starts.extend(accumulate(len(line) + 1 for line in self.lines[:-1]))
+        self._depth_at = array('i')
+        self._code_at = bytearray()
+        self._nested_starts: List[int] = []
+        self._nested_ends: List[int] = []
+        self._comment_starts: List[int] = []
+        self._comment_ends: List[int] = []
+        self._statement_ends: List[int] = []
+        self._block_keys: Set[Tuple[Optional[str], str]] = set()
+        self._block_names: Set[str] = set()
+        self._paren_cache: Tuple[int, int] = (-1, -1)
+        with profile_stage(profiler, "scan", events):
+            self._build_position_maps()
+        
+    def _looks_minified(self) -> bool:
+        """Detect minified input from the average line length."""
+        return len(self.source) / len(self.lines) > self.MINIFIED_LINE_LENGTH
+    
+    def parse(self, block_filter: Optional["BlockFilter"] = None) -> List[CodeBlock]:
+        """
+        Parse the JavaScript source and extract all code blocks.
+        
+        Args:
+            block_filter: Optional filter applied before dependency extraction;
+                excluded blocks end up in ``excluded_blocks``, small blocks are
+                merged into neighbors
+        """
+        with profile_stage(self.profiler, "extract", self.events):
+            self._extract_top_level()
+        
+        # Sort blocks by source position (a minified source is one long line)
+        # and intern their names in that order, so symbol IDs follow the source
+        if self.minified:
+            self.blocks.sort(key=lambda b: b.start_offset)
+        else:
+            self.blocks.sort(key=lambda b: b.start_line)
+        if block_filter:
+            with profile_stage(self.profiler, "filter", self.events):
+                self._apply_filter(block_filter)
+        for block in self.blocks:
+            if block.name:
+                block.name = self.symbols.names[self.symbols.intern(block.name)]
         
-    def parse(self) -> List[CodeBlock]:
-        """Parse the JavaScript source and extract all code blocks."""
-        self._extract_functions()
-        self._extract_classes()
-        self._extract_assignments()
-        self._extract_dependencies()
-        self._extract_exports_imports()
+        with profile_stage(self.profiler, "dependencies", self.events):
+            self._extract_dependencies()
+            self._extract_exports_imports()
         
-        # Sort blocks by start line
-        self.blocks.sort(key=lambda b: b.start_line)
+        if self.profiler is not None:
+            self.profiler.count("matches_scanned", self.matches_scanned)
+            self.profiler.count("blocks", len(self.blocks))
         
         return self.blocks
     
-    def _extract_functions(self):
-        """Extract function declarations."""
-        # Standard function declarations
-        for match in re.finditer(self.FUNCTION_PATTERN, self.source, re.MULTILINE):
-            if not self._is_top_level(match.start()):
+    def _apply_filter(self, block_filter: "BlockFilter"):
+        """Drop excluded blocks and merge small ones into their neighbors."""
+        groups, self.excluded_blocks = block_filter.plan(self.blocks, size_by_bytes=self.minified)
+        blocks = []
+        merged_count = 0
+        kept_names = {host.name for host, _ in groups}
+        for host, members in groups:
+            if len(members) == 1:
+                blocks.append(host)
                 continue
-            func_name = match.group(1)
-            start_pos = match.start()
-            start_line = self.source[:start_pos].count('\n')
             
-            # Find matching closing brace
-            brace_pos = self.source.find('{', match.end())
-            end_line = self._find_closing_brace(brace_pos) if brace_pos != -1 else None
-            if end_line is not None:
-                content = '\n'.join(self.lines[start_line:end_line + 1])
-                block = CodeBlock(
-                    name=func_name,
-                    type="function",
-                    start_line=start_line,
-                    end_line=end_line,
-                    content=content
-                )
-                self._add_unique_block(block)
+            # One block spanning the members, keeping the host's name and type;
+            # the other names resolve to it during dependency extraction
+            merged = self._make_block(
+                host.name, host.type,
+                members[0].start_offset, max(member.end_offset for member in members)
+            )
+            for member in members:
+                if member is not host and member.name and member.name not in kept_names:
+                    merged.merged_names.append(member.name)
+                    self._aliases[member.name] = host.name
+            merged_count += len(members) - 1
+            blocks.append(merged)
+        self.blocks = blocks
         
-        # Arrow function assignments
-        for match in re.finditer(self.ARROW_FUNCTION_PATTERN, self.source, re.MULTILINE):
-            if not self._is_top_level(match.start()):
-                continue
-            func_name = match.group(1)
-            start_pos = match.start()
-            start_line = self.source[:start_pos].count('\n')
-            
-            # Find end of statement (semicolon or newline)
-            end_pos = self.source.find(';', start_pos)
-            if end_pos == -1:
-                end_pos = self.source.find('\n', start_pos)
-            
-            end_line = self.source[:end_pos].count('\n')
-            if end_line < len(self.lines):
-                content = '\n'.join(self.lines[start_line:end_line + 1])
-                block = CodeBlock(
-                    name=func_name,
-                    type="function",
-                    start_line=start_line,
-                    end_line=end_line,
-                    content=content
-                )
-                self._add_unique_block(block)
+        if self.profiler is not None:
+            self.profiler.count("excluded_blocks", len(self.excluded_blocks))
+            self.profiler.count("merged_blocks", merged_count)
     
-    def _extract_classes(self):
-        """Extract class declarations."""
-        for match in re.finditer(self.CLASS_PATTERN, self.source, re.MULTILINE):
-            if not self._is_top_level(match.start()):
-                continue
-            class_name = match.group(1)
-            parent_class = match.group(2)
+    def _extract_top_level(self):
+        """
+        Extract top-level functions, classes, and assignments in a single pass.
+        
+        One combined pattern is searched over the source; whenever a candidate
+        falls inside a nested brace span, the scan jumps past the whole span.
+        Blocks are then added in the same precedence as separate passes would:
+        function declarations, arrow functions, classes, then assignments.
+        """
+        declarations: List[CodeBlock] = []
+        arrows: List[CodeBlock] = []
+        classes: List[CodeBlock] = []
+        assignments: List[Tuple[str, int]] = []
+        
+        search = self.TOP_LEVEL_PATTERN.search
+        pos = 0
+        
+        while True:
+            match = search(self.source, pos)
+            if match is None:
+                break
+            self.matches_scanned += 1
             start_pos = match.start()
-            start_line = self.source[:start_pos].count('\n')
             
-            # Find matching closing brace
-            brace_pos = self.source.find('{', start_pos)
-            end_line = self._find_closing_brace(brace_pos)
+            if self._depth_at[start_pos]:
+                pos = self._nested_span_end(start_pos)
+                continue
+            pos = match.end()
+            if not self._code_at[start_pos]:
+                continue
             
-            if end_line is not None:
-                content = '\n'.join(self.lines[start_line:end_line + 1])
-                block = CodeBlock(
-                    name=class_name,
-                    type="class",
-                    start_line=start_line,
-                    end_line=end_line,
-                    content=content,
-                    dependencies={parent_class} if parent_class else set()
+            kind = match.lastgroup
+            if kind == "function":
+                block = self._function_block(match.group("function_name"), start_pos, match.end())
+                if block is not None:
+                    declarations.append(block)
+            elif kind == "arrow":
+                tail = None
+                close = self._next_close_paren(match.end())
+                if close != -1:
+                    tail = self.ARROW_TAIL_PATTERN.match(self.source, close + 1)
+                if tail is not None:
+                    pos = tail.end()
+                    block = self._arrow_block(match.group("arrow_name"), start_pos)
+                    if block is not None:
+                        arrows.append(block)
+                    continue
+                # Not an arrow function: fall back to the assignment branch at
+                # the same position, as the full alternation would.
+                fallback = self.CONST_PATTERN.match(self.source, start_pos)
+                if fallback is None:
+                    pos = start_pos + 1
+                else:
+                    pos = fallback.end()
+                    assignments.append((fallback.group(1), start_pos))
+            elif kind == "class":
+                block = self._class_block(
+                    match.group("class_name"), match.group("class_parent"), start_pos
                 )
-                self._add_unique_block(block)
-    
-    def _extract_assignments(self):
-        """Extract variable assignments (const, let, var)."""
-        for match in re.finditer(self.CONST_PATTERN, self.source, re.MULTILINE):
-            if not self._is_top_level(match.start()):
-                continue
-            var_name = match.group(1)
+                if block is not None:
+                    classes.append(block)
+            else:
+                assignments.append((match.group("assignment_name"), start_pos))
+        
+        for block in declarations + arrows + classes:
+            self._add_unique_block(block)
+        
+        for var_name, start_pos in assignments:
             if self._has_block_named(var_name):
                 continue
-            start_pos = match.start()
-            start_line = self.source[:start_pos].count('\n')
-            
-            # Find end of statement
-            end_pos = self.source.find(';', start_pos)
-            if end_pos == -1:
-                # Find next newline
-                end_pos = self.source.find('\n', start_pos)
-            
-            if end_pos != -1:
-                end_line = self.source[:end_pos].count('\n')
-                if end_line < len(self.lines):
-                    content = '\n'.join(self.lines[start_line:end_line + 1])
-                    block = CodeBlock(
-                        name=var_name,
-                        type="assignment",
-                        start_line=start_line,
-                        end_line=end_line,
-                        content=content
-                    )
-                    self._add_unique_block(block)
+            block = self._assignment_block(var_name, start_pos)
+            if block is not None:
+                self._add_unique_block(block)
+    
+    def _next_close_paren(self, pos: int) -> int:
+        """
+        Return the position of the first ')' at or after pos, or -1.
+        
+        Candidates are visited left to right, so the last answer is reused
+        while pos has not passed it; total work stays linear in the source.
+        """
+        last_pos, found = self._paren_cache
+        if 0 <= last_pos <= pos and (found == -1 or pos <= found):
+            return found
+        found = self.source.find(')', pos)
+        self._paren_cache = (pos, found)
+        return found
+    
+    def _nested_span_end(self, pos: int) -> int:
+        """Return the position just past the top-level brace span containing pos."""
+        index = bisect_right(self._nested_starts, pos) - 1
+        if index < 0:
+            return pos + 1
+        return max(self._nested_ends[index], pos + 1)
+    
+    def _function_block(self, func_name: str, start_pos: int, header_end: int) -> Optional[CodeBlock]:
+        """Build a block for a function declaration."""
+        # Find matching closing brace
+        brace_pos = self.source.find('{', header_end)
+        close_pos = self._matching_brace(brace_pos) if brace_pos != -1 else None
+        if close_pos is None:
+            return None
+        return self._make_block(func_name, "function", start_pos, close_pos + 1)
+    
+    def _arrow_block(self, func_name: str, start_pos: int) -> Optional[CodeBlock]:
+        """Build a block for an arrow function assignment."""
+        end_pos = self._statement_end(start_pos)
+        return self._make_block(func_name, "function", start_pos, end_pos)
+    
+    def _class_block(self, class_name: str, parent_class: Optional[str], start_pos: int) -> Optional[CodeBlock]:
+        """Build a block for a class declaration."""
+        # Find matching closing brace
+        brace_pos = self.source.find('{', start_pos)
+        close_pos = self._matching_brace(brace_pos)
+        if close_pos is None:
+            return None
+        return self._make_block(
+            class_name, "class", start_pos, close_pos + 1,
+            dependencies={parent_class} if parent_class else set()
+        )
+    
+    def _assignment_block(self, var_name: str, start_pos: int) -> Optional[CodeBlock]:
+        """Build a block for a variable assignment (const, let, var)."""
+        end_pos = self._statement_end(start_pos)
+        return self._make_block(var_name, "assignment", start_pos, end_pos)
+    
+    def _statement_end(self, start_pos: int) -> int:
+        """
+        Return the end offset of the top-level statement starting at start_pos.
+        
+        Looks up the boundary index built by the scan, so semicolons and
+        newlines inside nested braces, brackets, parens, strings and comments
+        are never mistaken for the end. Runs to the end of the source when no
+        boundary follows.
+        """
+        index = bisect_right(self._statement_ends, start_pos)
+        if index < len(self._statement_ends):
+            return self._statement_ends[index]
+        return len(self.source)
+    
+    def _make_block(
+        self,
+        name: str,
+        block_type: str,
+        start_pos: int,
+        end_pos: int,
+        dependencies: Optional[Set[str]] = None
+    ) -> CodeBlock:
+        """
+        Build a block spanning [start_pos, end_pos).
+        
+        Normal sources take whole lines as content; minified sources slice the
+        exact character range, since one line may hold the entire bundle.
+        """
+        start_line = self._line_of(start_pos)
+        end_line = self._line_of(max(start_pos, end_pos - 1))
+        if self.minified:
+            content = self.source[start_pos:end_pos]
+        else:
+            content = '\n'.join(self.lines[start_line:end_line + 1])
+        return CodeBlock(
+            name=name,
+            type=block_type,
+            start_line=start_line,
+            end_line=end_line,
+            content=content,
+            dependencies=dependencies if dependencies is not None else set(),
+            start_offset=start_pos,
+            end_offset=end_pos,
+            start_column=start_pos - self._line_starts[start_line] if self.minified else 0
+        )
+    
+    def _line_of(self, pos: int) -> int:
+        """Return the 0-based line number containing the character offset pos."""
+        return bisect_right(self._line_starts, pos) - 1
+    
+    def position_of(self, pos: int) -> Tuple[int, int]:
+        """Return the 0-based (line, column) of the character offset pos."""
+        line = self._line_of(pos)
+        return line, pos - self._line_starts[line]
     
     def _extract_dependencies(self):
         """Extract dependencies between code blocks."""
-        # Build identifier pattern
         identifiers = {block.name for block in self.blocks if block.name}
+        find_identifiers = self.IDENTIFIER_PATTERN.findall
+        canonical = self.symbols.canonical
+        aliases = self._aliases
+        identifiers.update(aliases)
         
         for block in self.blocks:
-            dependencies = set()
-            
-            # Find all identifiers used in this block
-            for identifier in identifiers:
-                if identifier != block.name:
-                    # Simple pattern: word boundary around identifier
-                    pattern = r'\b' + re.escape(identifier) + r'\b'
-                    if re.search(pattern, block.content):
-                        dependencies.add(identifier)
-            
+            # Word tokens are maximal runs of \w, so a token equals a block
+            # name exactly where a \b-delimited search for that name matches.
+            found = identifiers.intersection(find_identifiers(block.content))
+            if aliases:
+                found = {aliases.get(name, name) for name in found}
+            dependencies = canonical(found)
+            dependencies.discard(block.name)
             block.dependencies = dependencies
     
     def _extract_exports_imports(self):
         """Extract export and import statements."""
         # Extract imports
-        for match in re.finditer(self.IMPORT_PATTERN, self.source, re.MULTILINE):
+        for match in self.IMPORT_PATTERN.finditer(self.source):
             module_path = match.group(1)
             self.imports.add(module_path)
         
         # Also check for require
-        for match in re.finditer(self.REQUIRE_PATTERN, self.source, re.MULTILINE):
+        for match in self.REQUIRE_PATTERN.finditer(self.source):
             module_path = match.group(1)
             self.imports.add(module_path)
         
         # Extract exports
-        export_lines = re.findall(r'export\s+.*', self.source)
+        export_lines = self.EXPORT_LINE_PATTERN.findall(self.source)
         
         for line in export_lines:
             if 'default' in line:
                 # Extract default export
-                match = re.search(r'export\s+default\s+(\w+)', line)
+                match = self.EXPORT_DEFAULT_PATTERN.search(line)
                 if match:
                     self.exports['default'] = match.group(1)
             else:
                 # Extract named exports
-                match = re.search(r'export\s+(?:(?:async\s+)?function|class)\s+(\w+)', line)
+                match = self.EXPORT_DECLARATION_PATTERN.search(line)
                 if match:
                     self.exports[match.group(1)] = match.group(1)
                 else:
                     # Extract from export { ... }
-                    items = re.findall(r'\w+', line)
+                    items = self.IDENTIFIER_PATTERN.findall(line)
                     for item in items:
                         if item != 'export':
                             self.exports[item] = item
         
         # Mark exported blocks
         for block in self.blocks:
-            if block.name in self.exports:
+            if block.name in self.exports or any(name in self.exports for name in block.merged_names):
                 block.is_exported = True
                 if self.exports.get('default') == block.name:
                     block.export_default = True
     
+    def _matching_brace(self, start_pos: int) -> Optional[int]:
+        """
+        Find the position of the closing brace matching the one at start_pos.
+        
+        Top-level braces are looked up in the span index built by the scan;
+        any other brace falls back to a forward scan.
+        """
+        index = bisect_right(self._nested_starts, start_pos + 1) - 1
+        if index >= 0 and self._nested_starts[index] == start_pos + 1:
+            close_pos = self._nested_ends[index] - 1
+            if self.source[close_pos] == '}':
+                return close_pos
+            return None
+        return self._find_closing_brace(start_pos)
+    
     def _find_closing_brace(self, start_pos: int) -> Optional[int]:
-        """Find the line number of closing brace matching the one at start_pos."""
+        """Find the position of the closing brace matching the one at start_pos."""
         if start_pos >= len(self.source) or self.source[start_pos] != '{':
             return None
         
@@ -260,100 +554,339 @@ class JavaScriptParser:
                 elif char == '}':
                     brace_count -= 1
                     if brace_count == 0:
-                        return self.source[:i].count('\n')
+                        return i
         
         return None
     
     def _add_unique_block(self, block: CodeBlock):
         """Add block if it doesn't already exist with the same name and type."""
-        for existing in self.blocks:
-            if existing.name == block.name and existing.type == block.type:
-                return
+        key = (block.name, block.type)
+        if key in self._block_keys:
+            return
+        self._block_keys.add(key)
+        if block.name:
+            self._block_names.add(block.name)
         self.blocks.append(block)
+        if self.events:
+            self.events.emit(
+                BLOCK_PARSED,
+                name=block.name,
+                type=block.type,
+                start_line=block.start_line,
+                end_line=block.end_line
+            )
 
     def _has_block_named(self, name: Optional[str]) -> bool:
         """Check if any block already uses the given name."""
         if not name:
             return False
-        return any(block.name == name for block in self.blocks)
+        return name in self._block_names
 
     def _build_position_maps(self):
-        """Track brace depth and code positions to identify top-level matches."""
-        length = len(self.source)
-        self._depth_at = [0] * length
-        self._code_at = [True] * length
+        """
+        Track brace depth and code positions to identify top-level matches.
+        
+        The scan jumps between the characters that can change state (quotes,
+        comment and regex openers, brackets, ';' and top-level newlines), so
+        runs of plain code are skipped in one search. Template literals are
+        tracked through their ``${ ... }`` substitutions, which are code and
+        may nest further templates; a '/' starts a regex literal or a division
+        depending on the token before it.
+        
+        The same pass records the end offsets of top-level statements: ';'
+        outside any (), [] or {} nesting, and newlines where automatic
+        semicolon insertion ends the statement (the previous token cannot be
+        continued and the next one does not continue it).
+        """
+        source = self.source
+        length = len(source)
+        depth_at = self._depth_at = array('i', [0]) * length
+        code_at = self._code_at = bytearray(b'\x01') * length
+        nested_starts = self._nested_starts
+        nested_ends = self._nested_ends
+        statement_ends = self._statement_ends
 
-        depth = 0
-        in_string = False
-        string_char = None
-        escape_next = False
-        in_single_comment = False
-        in_multi_comment = False
+        depth = 0  # Brace depth, the value recorded in _depth_at
+        depth_mark = 0  # _depth_at is filled up to here
+        nest = 0  # Depth across (), [], {} and template substitutions
+        substitutions: List[int] = []  # nest level of each open ${
+        last_significant = ''
+        last_pos = -1
+        pending_newline = -1
 
         i = 0
-        while i < length:
-            self._depth_at[i] = depth
-            char = self.source[i]
+        while True:
+            tokens = self.TOP_LEVEL_TOKENS if nest == 0 else self.NESTED_TOKENS
+            match = tokens.search(source, i)
+            j = match.start() if match else length
 
-            if in_single_comment:
-                self._code_at[i] = False
-                if char == '\n':
-                    in_single_comment = False
-                i += 1
+            # Plain code between i and j: settle a pending newline with its
+            # first character and remember its last one.
+            if i < j:
+                k = j - 1
+                while k >= i and source[k].isspace():
+                    k -= 1
+                if k >= i:
+                    if pending_newline >= 0:
+                        first = self.NON_SPACE.search(source, i, j)
+                        if source[first.start()] not in self.CONTINUES_BEFORE:
+                            statement_ends.append(pending_newline)
+                        pending_newline = -1
+                    last_significant = source[k]
+                    last_pos = k
+            if match is None:
+                break
+
+            char = source[j]
+            if char == '\n':
+                if pending_newline < 0 and last_significant not in self.CONTINUES_AFTER:
+                    pending_newline = j
+                i = j + 1
                 continue
 
-            if in_multi_comment:
-                self._code_at[i] = False
-                if char == '*' and i + 1 < length and self.source[i + 1] == '/':
-                    self._code_at[i + 1] = False
-                    in_multi_comment = False
-                    i += 2
-                    continue
-                i += 1
+            if char == '/' and j + 1 < length and source[j + 1] in '/*':
+                if source[j + 1] == '/':
+                    end = source.find('\n', j + 2)
+                    end = length if end == -1 else end
+                else:
+                    end = source.find('*/', j + 2)
+                    end = length if end == -1 else end + 2
+                code_at[j:end] = bytes(end - j)
+                self._comment_starts.append(j)
+                self._comment_ends.append(end)
+                i = end
                 continue
 
-            if in_string:
-                self._code_at[i] = False
-                if escape_next:
-                    escape_next = False
-                elif char == '\\':
-                    escape_next = True
-                elif char == string_char:
-                    in_string = False
-                    string_char = None
-                i += 1
+            # A significant token: settle a pending newline first.
+            if pending_newline >= 0:
+                if char not in self.CONTINUES_BEFORE:
+                    statement_ends.append(pending_newline)
+                pending_newline = -1
+
+            if char == '/':
+                if self._regex_allowed(last_significant, last_pos):
+                    # Regex literal, not division: its body may hold quotes,
+                    # braces and semicolons that are not code.
+                    end = self._skip_regex_literal(j)
+                else:
+                    end = j + 1
+                last_significant = '/'
+                last_pos = end - 1
+                i = end
                 continue
 
-            if char == '/' and i + 1 < length:
-                next_char = self.source[i + 1]
-                if next_char == '/':
-                    self._code_at[i] = False
-                    self._code_at[i + 1] = False
-                    in_single_comment = True
-                    i += 2
-                    continue
-                if next_char == '*':
-                    self._code_at[i] = False
-                    self._code_at[i + 1] = False
-                    in_multi_comment = True
-                    i += 2
-                    continue
+            if char == '"' or char == "'":
+                body = self.STRING_BODIES[char].match(source, j + 1)
+                end = body.end()
+                code_at[j:end] = bytes(end - j)
+                last_significant = char
+                last_pos = end - 1
+                i = end
+                continue
 
-            if char in ('"', "'", '`'):
-                self._code_at[i] = False
-                in_string = True
-                string_char = char
-                i += 1
+            if char == '`' or (char == '}' and substitutions and nest == substitutions[-1]):
+                if char == '}':
+                    substitutions.pop()
+                    nest -= 1
+                end = self.TEMPLATE_CHUNK.match(source, j + 1).end()
+                if source.startswith('${', end):
+                    end += 2
+                    nest += 1
+                    substitutions.append(nest)
+                    last_significant = '{'
+                else:
+                    end = min(end + 1, length)
+                    last_significant = '`'
+                code_at[j:end] = bytes(end - j)
+                last_pos = end - 1
+                i = end
                 continue
 
             if char == '{':
+                if depth == 0:
+                    nested_starts.append(j + 1)
+                else:
+                    depth_at[depth_mark:j + 1] = array('i', [depth]) * (j + 1 - depth_mark)
+                depth_mark = j + 1
                 depth += 1
+                nest += 1
             elif char == '}':
                 if depth > 0:
+                    depth_at[depth_mark:j + 1] = array('i', [depth]) * (j + 1 - depth_mark)
+                    depth_mark = j + 1
                     depth -= 1
+                    if depth == 0:
+                        nested_ends.append(j + 1)
+                if nest > 0:
+                    nest -= 1
+            elif char == '(' or char == '[':
+                nest += 1
+            elif char == ')' or char == ']':
+                if nest > 0:
+                    nest -= 1
+            elif char == ';' and nest == 0:
+                statement_ends.append(j + 1)
 
-            i += 1
+            last_significant = char
+            last_pos = j
+            i = j + 1
+
+        if pending_newline >= 0:
+            statement_ends.append(pending_newline)
+        if depth > 0:
+            depth_at[depth_mark:length] = array('i', [depth]) * (length - depth_mark)
+        if len(nested_ends) < len(nested_starts):
+            nested_ends.append(length)
+
+    def _regex_allowed(self, last_significant: str, last_pos: int) -> bool:
+        """Whether a '/' after the given token starts a regex literal."""
+        if last_significant in self.REGEX_PRECEDERS:
+            # A postfix '++' or '--' ends an operand: the '/' divides
+            return not (
+                last_significant in '+-' and last_pos > 0
+                and self.source[last_pos - 1] == last_significant
+            )
+        if not (last_significant.isalnum() or last_significant in '_$'):
+            return False
+        start = last_pos
+        while start > 0 and (self.source[start - 1].isalnum() or self.source[start - 1] in '_$'):
+            start -= 1
+        return self.source[start:last_pos + 1] in self.REGEX_KEYWORDS
 
+    def _skip_regex_literal(self, start: int) -> int:
+        """Mark the regex literal at start as non-code and return the offset past it."""
+        source = self.source
+        length = len(source)
+        in_class = False
+        i = start + 1
+        while i < length:
+            char = source[i]
+            if char == '\\':
+                i += 2
+                continue
+            if char == '\n':
+                break
+            if in_class:
+                if char == ']':
+                    in_class = False
+            elif char == '[':
+                in_class = True
+            elif char == '/':
+                i += 1
+                break
+            i += 1
+        i = min(i, length)
+        self._code_at[start:i] = bytes(i - start)
+        return i
+    
+    def block_span(self, block: CodeBlock) -> Tuple[int, int]:
+        """Return the source offsets [start, end) of a block's content."""
+        start = block.start_offset if self.minified else self._line_starts[block.start_line]
+        return start, start + len(block.content)
+    
+    def compact(self, start: int, end: int) -> Tuple[str, List[Tuple[int, int, int]]]:
+        """
+        Strip comments and collapse whitespace in source[start:end].
+        
+        Works from the scan's classification instead of tokenizing again:
+        whitespace runs at code positions (``_code_at``) and the recorded
+        comment spans are merged into gaps, in one linear pass. Each gap
+        becomes nothing, one space where the neighbors would otherwise fuse
+        into another token, or one newline where it held a newline that
+        automatic semicolon insertion may depend on. Strings, templates and
+        regex literals are never touched, and ``/*!`` comments are kept.
+        
+        Args:
+            start: First source offset
+            end: Source offset past the last character
+        
+        Returns:
+            (text, runs): the compacted text, and (text offset, source offset,
+            length) for every run of it copied verbatim from the source
+        """
+        source = self.source
+        code_at = self._code_at
+        comment_starts, comment_ends = self._comment_starts, self._comment_ends
+        
+        first = bisect_right(comment_ends, start)
+        last = bisect_right(comment_starts, end - 1)
+        gaps = [
+            match.span() for match in self.CODE_WHITESPACE.finditer(source, start, end)
+            if code_at[match.start()]
+        ]
+        if first < last:
+            # Touching spans (a comment and the indentation after it) form one gap
+            comments = [
+                (max(comment_starts[i], start), min(comment_ends[i], end))
+                for i in range(first, last)
+                if not source.startswith('/*!', comment_starts[i])
+            ]
+            merged: List[Tuple[int, int]] = []
+            for span in merge(comments, gaps):
+                if merged and span[0] <= merged[-1][1]:
+                    merged[-1] = (merged[-1][0], max(merged[-1][1], span[1]))
+                else:
+                    merged.append(span)
+            gaps = merged
+        
+        pieces: List[str] = []
+        runs: List[Tuple[int, int, int]] = []
+        length = 0
+        pos = start
+        is_word = self._is_word_char
+        join_after, join_before = self.JOIN_AFTER, self.JOIN_BEFORE
+        fusing_pairs = self.FUSING_PAIRS
+        for gap_start, gap_end in gaps:
+            if gap_start > pos:
+                runs.append((length, pos, gap_start - pos))
+                pieces.append(source[pos:gap_start])
+                length += gap_start - pos
+            pos = gap_end
+            if gap_start == start or gap_end == end:
+                continue
+            
+            # Keep one space (or newline) where the neighbors would fuse into
+            # another token, and a newline where it may end a statement
+            before, after = source[gap_start - 1], source[gap_end]
+            newline = source.find('\n', gap_start, gap_end) != -1
+            if (
+                (is_word(before) and (is_word(after) or after == '\\'))
+                or before + after in fusing_pairs
+                or (before in '<!-' and after in '!-' and self._opens_html_comment(pieces, gap_end))
+                or (before == '/' and is_word(after))
+                or (before.isdigit() and after == '.')
+            ):
+                separator = "\n" if newline else " "
+            elif not newline or before in join_after or (
+                after in join_before
+                and not (after == '.' and source[gap_end + 1:gap_end + 2].isdigit())
+            ):
+                continue
+            else:
+                separator = "\n"
+            pieces.append(separator)
+            length += 1
+        if end > pos:
+            runs.append((length, pos, end - pos))
+            pieces.append(source[pos:end])
+        return "".join(pieces), runs
+    
+    def _opens_html_comment(self, pieces: List[str], gap_end: int) -> bool:
+        """Check if joining the compacted text so far to source[gap_end:] forms '<!--'."""
+        tail = "".join(pieces[-3:])[-3:]
+        window = tail + self.source[gap_end:gap_end + 3]
+        found = window.find(self.HTML_COMMENT_OPEN)
+        while found != -1:
+            if found < len(tail) < found + 4:
+                return True
+            found = window.find(self.HTML_COMMENT_OPEN, found + 1)
+        return False
+    
+    @staticmethod
+    def _is_word_char(char: str) -> bool:
+        """Check if a character can be part of an identifier, keyword or number."""
+        return char.isalnum() or char in '_$' or char > '\x7f'
+    
     def _is_top_level(self, pos: int) -> bool:
         """Return True if the position is at top-level code (depth 0)."""
         if pos < 0 or pos >= len(self._depth_at):
@@ -0,0 +1,143 @@
+"""
+Regular expression backend for the parser.
+
+Uses the third-party ``regex`` module when it is installed, which allows
+atomic/possessive pattern variants and a per-call timeout that bounds the
+time spent on pathological input. Falls back to the standard ``re`` module
+otherwise (no timeout; the stdlib-compatible pattern text is used).
+
+Patterns are compiled on first use, and ``regex`` is imported with the
+first of them, so importing the parser (and the CLI) does not load it.
+"""
+
+import re
+from importlib.util import find_spec
+from typing import Iterator, List, Optional
+
+# Optional accelerator; ``re`` is always available.
+BACKEND = "regex" if find_spec("regex") is not None else "re"
+_regex = None  # The ``regex`` module, imported by _regex_module()
+
+# Seconds a single search may run before it is abandoned (regex backend only).
+DEFAULT_TIMEOUT = 10.0
+
+
+class PatternTimeoutError(ValueError):
+    """Raised when a pattern search exceeds its timeout."""
+
+
+class CompiledPattern:
+    """A compiled pattern that dispatches to the active backend."""
+    
+    def __init__(
+        self,
+        pattern: str,
+        flags: int = 0,
+        atomic: Optional[str] = None,
+        timeout: Optional[float] = DEFAULT_TIMEOUT
+    ):
+        """
+        Compile a pattern.
+        
+        Args:
+            pattern: Pattern text understood by the stdlib ``re`` module
+            flags: ``re`` flags (``re.MULTILINE`` etc.)
+            atomic: Equivalent pattern using atomic groups / possessive
+                quantifiers, used with the ``regex`` backend
+            timeout: Per-call timeout in seconds for the ``regex`` backend
+        """
+        self.pattern = pattern
+        self.flags = flags
+        self.atomic = atomic
+        self.timeout = timeout
+        self.backend = BACKEND
+    
+    def __getattr__(self, name: str):
+        # Only reached while ``_compiled`` is unset: compile on first use
+        if name != "_compiled":
+            raise AttributeError(name)
+        if self.backend == "regex":
+            module = _regex_module()
+            compiled = module.compile(self.atomic or self.pattern, _to_regex_flags(module, self.flags))
+        else:
+            compiled = re.compile(self.pattern, self.flags)
+        self._compiled = compiled
+        return compiled
+    
+    def search(self, string: str, pos: int = 0, endpos: Optional[int] = None):
+        """Search for the first match at or after pos."""
+        if endpos is None:
+            endpos = len(string)
+        if self.backend == "re":
+            return self._compiled.search(string, pos, endpos)
+        try:
+            return self._compiled.search(string, pos, endpos, timeout=self.timeout)
+        except TimeoutError:
+            raise self._timeout_error(pos) from None
+    
+    def match(self, string: str, pos: int = 0, endpos: Optional[int] = None):
+        """Match anchored at pos."""
+        if endpos is None:
+            endpos = len(string)
+        if self.backend == "re":
+            return self._compiled.match(string, pos, endpos)
+        try:
+            return self._compiled.match(string, pos, endpos, timeout=self.timeout)
+        except TimeoutError:
+            raise self._timeout_error(pos) from None
+    
+    def finditer(self, string: str, pos: int = 0, endpos: Optional[int] = None) -> Iterator:
+        """Iterate over non-overlapping matches."""
+        if endpos is None:
+            endpos = len(string)
+        if self.backend == "re":
+            yield from self._compiled.finditer(string, pos, endpos)
+            return
+        try:
+            yield from self._compiled.finditer(string, pos, endpos, timeout=self.timeout)
+        except TimeoutError:
+            raise self._timeout_error(pos) from None
+    
+    def findall(self, string: str, pos: int = 0, endpos: Optional[int] = None) -> List:
+        """Return all non-overlapping matches."""
+        if endpos is None:
+            endpos = len(string)
+        if self.backend == "re":
+            return self._compiled.findall(string, pos, endpos)
+        try:
+            return self._compiled.findall(string, pos, endpos, timeout=self.timeout)
+        except TimeoutError:
+            raise self._timeout_error(pos) from None
+    
+    def _timeout_error(self, pos: int) -> PatternTimeoutError:
+        return PatternTimeoutError(
+            f"Pattern matching timed out after {self.timeout}s near offset {pos}; "
+            f"the input may be pathological for pattern {self.pattern[:40]!r}"
+        )
+
+
+def compile(
+    pattern: str,
+    flags: int = 0,
+    atomic: Optional[str] = None,
+    timeout: Optional[float] = DEFAULT_TIMEOUT
+) -> CompiledPattern:
+    """Compile a pattern for the active backend."""
+    return CompiledPattern(pattern, flags, atomic, timeout)
+
+
+def _regex_module():
+    """Import the ``regex`` module on first use."""
+    global _regex
+    if _regex is None:
+        import regex
+        _regex = regex
+    return _regex
+
+
+def _to_regex_flags(module, flags: int) -> int:
+    result = 0
+    for name in ("IGNORECASE", "MULTILINE", "DOTALL", "VERBOSE", "ASCII"):
+        if flags & getattr(re, name):
+            result |= getattr(module, name)
+    return result
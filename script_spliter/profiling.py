@@ -0,0 +1,141 @@
+"""
+Per-stage timing and memory instrumentation for ScriptSpliter.
+"""
+
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, asdict
+from typing import Callable, ContextManager, Dict, Iterator, List, Optional
+from .events import EventBus
+
+
+@dataclass
+class StageStats:
+    """Measurements collected for one pipeline stage."""
+    name: str
+    wall_time: float = 0.0  # seconds
+    cpu_time: float = 0.0  # seconds
+    peak_memory: int = 0  # bytes allocated at peak, 0 when memory is not traced
+    calls: int = 0
+
+
+class Profiler:
+    """Records wall time, CPU time, peak memory and counters per stage."""
+    
+    def __init__(
+        self,
+        trace_memory: bool = True,
+        cprofile_stage: Optional[str] = None,
+        cprofile_path: Optional[str] = None
+    ):
+        """
+        Initialize the profiler.
+        
+        Args:
+            trace_memory: Measure peak memory per stage with tracemalloc
+            cprofile_stage: Name of a stage to run under cProfile
+            cprofile_path: File to dump cProfile stats for that stage to
+        """
+        self.trace_memory = trace_memory
+        self.cprofile_stage = cprofile_stage
+        self.cprofile_path = cprofile_path
+        self.stages: Dict[str, StageStats] = {}
+        self.counters: Dict[str, int] = {}
+        self.hooks: List[Callable[[StageStats], None]] = []
+    
+    def add_hook(self, hook: Callable[[StageStats], None]) -> None:
+        """Register a callback invoked with the stage stats after each stage ends."""
+        self.hooks.append(hook)
+    
+    def count(self, name: str, amount: int = 1) -> None:
+        """Increase a named counter."""
+        self.counters[name] = self.counters.get(name, 0) + amount
+    
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageStats]:
+        """Measure the enclosed code as the named stage (repeated stages accumulate)."""
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats(name)
+        
+        # tracemalloc and cProfile are imported only when a stage uses them
+        owns_tracing = False
+        if self.trace_memory:
+            import tracemalloc
+            owns_tracing = not tracemalloc.is_tracing()
+            if owns_tracing:
+                tracemalloc.start()
+        profile = None
+        if self.cprofile_stage == name and self.cprofile_path:
+            import cProfile
+            profile = cProfile.Profile()
+            profile.enable()
+        
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield stats
+        finally:
+            stats.wall_time += time.perf_counter() - wall_start
+            stats.cpu_time += time.process_time() - cpu_start
+            stats.calls += 1
+            if profile is not None:
+                profile.disable()
+                profile.dump_stats(self.cprofile_path)
+            if owns_tracing:
+                stats.peak_memory = max(stats.peak_memory, tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+            for hook in self.hooks:
+                hook(stats)
+    
+    def as_dict(self) -> Dict:
+        """Return stages and counters as plain data."""
+        return {
+            "stages": [asdict(stats) for stats in self.stages.values()],
+            "counters": dict(self.counters),
+        }
+    
+    def format_summary(self) -> str:
+        """Format a human-readable profile table."""
+        lines = []
+        lines.append("PROFILE")
+        lines.append("-" * 60)
+        lines.append(f"{'stage':16} {'wall ms':>10} {'cpu ms':>10} {'peak MB':>10} {'calls':>6}")
+        total_wall = 0.0
+        for stats in self.stages.values():
+            total_wall += stats.wall_time
+            lines.append(
+                f"{stats.name:16} {stats.wall_time * 1000:10.1f} {stats.cpu_time * 1000:10.1f} "
+                f"{stats.peak_memory / (1024 * 1024):10.2f} {stats.calls:6}"
+            )
+        lines.append(f"{'total':16} {total_wall * 1000:10.1f}")
+        if self.counters:
+            lines.append("")
+            for name, value in self.counters.items():
+                lines.append(f"{name:16} {value:>10}")
+        return "\n".join(lines)
+
+
+def profile_stage(
+    profiler: Optional[Profiler],
+    name: str,
+    events: Optional[EventBus] = None
+) -> ContextManager:
+    """
+    Measure a stage with the profiler and emit stage events to the bus.
+    
+    Returns a no-op context when neither is active.
+    """
+    if events:
+        if profiler is None:
+            return events.span(name)
+        return _profiled_span(profiler, events, name)
+    if profiler is None:
+        return nullcontext()
+    return profiler.stage(name)
+
+
+@contextmanager
+def _profiled_span(profiler: Profiler, events: EventBus, name: str) -> Iterator[None]:
+    with profiler.stage(name), events.span(name):
+        yield
@@ -0,0 +1,498 @@
+"""
+Project mode: split several bundles over one dependency graph.
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from .analyzer import DependencyGraph, strongly_connected_components
+from .events import EventBus, MODULE_WRITTEN
+from .parser import CodeBlock, JavaScriptParser
+from .profiling import Profiler, profile_stage
+from .targets import OutputTarget, open_target
+
+if TYPE_CHECKING:
+    from .filters import BlockFilter
+
+
+# Hex digits kept from block keys and chunk name hashes
+KEY_LENGTH = 16
+CHUNK_HASH_LENGTH = 8
+
+
+@dataclass
+class ProjectBlock:
+    """A block found in one or more bundles, stored once."""
+    key: str  # Hash of the block's content and, transitively, its dependencies
+    block: CodeBlock  # First occurrence
+    bundles: List[str] = field(default_factory=list)  # Bundles containing it, in input order
+    dependencies: Set[str] = field(default_factory=set)  # Keys of the blocks it uses
+    
+    @property
+    def shared(self) -> bool:
+        return len(self.bundles) > 1
+
+
+@dataclass
+class Bundle:
+    """One input bundle of a project."""
+    name: str  # Entry module name: the file stem, made unique
+    path: Path
+    size: int  # Source size in bytes
+    keys: List[str] = field(default_factory=list)  # Its distinct blocks, in source order
+
+
+def block_keys(blocks: List[CodeBlock]) -> List[str]:
+    """
+    Key each block of one bundle by its content and its dependencies.
+    
+    The same text can refer to different helpers in different bundles, so a
+    key covers the block's whole dependency closure: strongly connected
+    components are hashed dependencies first, each over its members' content
+    and the hashes of the components it depends on. Equal keys therefore mean
+    equal code all the way down.
+    """
+    by_name: Dict[str, List[int]] = {}
+    for i, block in enumerate(blocks):
+        by_name.setdefault(block.name, []).append(i)
+    successors = [
+        sorted({j for dep in block.dependencies for j in by_name.get(dep, ())})
+        for block in blocks
+    ]
+    content = [hashlib.sha1(block.content.encode("utf-8")).hexdigest() for block in blocks]
+    
+    component_hash = [""] * len(blocks)
+    for component in strongly_connected_components(range(len(blocks)), successors.__getitem__):
+        members = set(component)
+        digest = hashlib.sha1()
+        for part in sorted(content[i] for i in component):
+            digest.update(part.encode("ascii"))
+        digest.update(b"->")
+        external = {component_hash[j] for i in component for j in successors[i] if j not in members}
+        for part in sorted(external):
+            digest.update(part.encode("ascii"))
+        value = digest.hexdigest()
+        for i in component:
+            component_hash[i] = value
+    
+    return [
+        hashlib.sha1(f"{content[i]}:{component_hash[i]}".encode("ascii")).hexdigest()[:KEY_LENGTH]
+        for i in range(len(blocks))
+    ]
+
+
+def parse_bundle(
+    path: Union[str, Path],
+    block_filter: Optional["BlockFilter"] = None
+) -> Tuple[List[CodeBlock], List[str], int]:
+    """
+    Read, parse and key one bundle (runs in a worker process).
+    
+    Returns:
+        (blocks, keys, size): the parsed blocks, their ``block_keys`` and the
+        source size in bytes
+    """
+    data = Path(path).read_bytes()
+    try:
+        source = data.decode("utf-8")
+    except UnicodeDecodeError:
+        source = data.decode("utf-8", errors="replace")
+    blocks = JavaScriptParser(source).parse(block_filter=block_filter)
+    return blocks, block_keys(blocks), len(data)
+
+
+class ProjectSpliter:
+    """
+    Splits several bundles together, shipping the code they share once.
+    
+    Bundles are parsed in parallel worker processes. Blocks that are
+    identical across bundles (same content, same dependencies) become one
+    node of a project-wide ``DependencyGraph`` keyed by content hash. Shared
+    blocks are emitted in chunks, one per set of bundles using them, so a page
+    loads exactly the chunks of its bundle; each bundle gets an entry module
+    holding its own blocks and re-exporting its chunks, which exposes the same
+    names as the original bundle.
+    """
+    
+    def __init__(
+        self,
+        source_files: Iterable[Union[str, Path]],
+        jobs: Optional[int] = None,
+        profiler: Optional[Profiler] = None,
+        events: Optional[EventBus] = None,
+        block_filter: Optional["BlockFilter"] = None
+    ):
+        """
+        Parse and deduplicate the bundles.
+        
+        Args:
+            source_files: Paths of the JavaScript bundles
+            jobs: Worker processes for parsing (default: one per bundle, up
+                to the CPU count; 1 parses in this process)
+            profiler: Optional profiler that records per-stage timings and counters
+            events: Optional event bus that receives instrumentation events
+            block_filter: Optional filter applied to every bundle
+        """
+        paths = [Path(source_file) for source_file in source_files]
+        if not paths:
+            raise ValueError("No source files given")
+        for path in paths:
+            if not path.exists():
+                raise FileNotFoundError(f"Source file not found: {path}")
+        
+        self.profiler = profiler
+        self.events = events if events is not None else EventBus()
+        self.bundles: Dict[str, Bundle] = {}
+        self.blocks: Dict[str, ProjectBlock] = {}
+        self.modules: Dict[str, str] = {}
+        self.module_files: Dict[str, str] = {}
+        self.bytes_written = 0
+        
+        with profile_stage(profiler, "parse", self.events):
+            parsed = self._parse_all(paths, jobs, block_filter)
+        with profile_stage(profiler, "dedupe", self.events):
+            for path, (blocks, keys, size) in zip(paths, parsed):
+                self._add_bundle(path, blocks, keys, size)
+            self.graph = DependencyGraph(
+                {key: entry.dependencies for key, entry in self.blocks.items()}
+            )
+            self.chunks = self._build_chunks()
+            self.chunk_order = self._order_chunks()
+        
+        if profiler is not None:
+            profiler.count("bundles", len(self.bundles))
+            profiler.count("blocks", sum(len(bundle.keys) for bundle in self.bundles.values()))
+            profiler.count("distinct_blocks", len(self.blocks))
+            profiler.count("shared_blocks", sum(entry.shared for entry in self.blocks.values()))
+            profiler.count("chunks", len(self.chunks))
+    
+    @staticmethod
+    def _parse_all(
+        paths: List[Path],
+        jobs: Optional[int],
+        block_filter: Optional["BlockFilter"]
+    ) -> List[Tuple[List[CodeBlock], List[str], int]]:
+        """Parse every bundle, in worker processes when there are several."""
+        workers = jobs if jobs is not None else min(len(paths), os.cpu_count() or 1)
+        if workers <= 1 or len(paths) == 1:
+            return [parse_bundle(path, block_filter) for path in paths]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(parse_bundle, paths, [block_filter] * len(paths)))
+    
+    def _add_bundle(self, path: Path, blocks: List[CodeBlock], keys: List[str], size: int):
+        """Merge one parsed bundle into the project's blocks."""
+        name = path.stem
+        suffix = 2
+        while name in self.bundles:
+            name = f"{path.stem}_{suffix}"
+            suffix += 1
+        bundle = self.bundles[name] = Bundle(name, path, size)
+        
+        keys_by_name: Dict[str, List[str]] = {}
+        for block, key in zip(blocks, keys):
+            keys_by_name.setdefault(block.name, []).append(key)
+        
+        for block, key in zip(blocks, keys):
+            entry = self.blocks.get(key)
+            if entry is None:
+                dependencies = {
+                    dep_key for dep in block.dependencies for dep_key in keys_by_name.get(dep, ())
+                }
+                dependencies.discard(key)
+                entry = self.blocks[key] = ProjectBlock(key, block, dependencies=dependencies)
+            # A block repeated within one bundle is kept once
+            if not entry.bundles or entry.bundles[-1] != name:
+                entry.bundles.append(name)
+                bundle.keys.append(key)
+    
+    def _build_chunks(self) -> Dict[str, List[str]]:
+        """
+        Group shared blocks into chunks, one per set of bundles using them.
+        
+        A block used by a set of bundles only depends on blocks that all of
+        them contain, so chunks only import other chunks. Blocks whose name
+        is already taken in a chunk go to another chunk for the same bundles.
+        
+        Returns:
+            Chunk name -> block keys, in first-seen source order
+        """
+        by_bundles: Dict[Tuple[str, ...], List[List[str]]] = {}
+        taken: Dict[Tuple[str, ...], List[Set[str]]] = {}
+        for key, entry in self.blocks.items():
+            if not entry.shared:
+                continue
+            users = tuple(entry.bundles)
+            parts = by_bundles.setdefault(users, [])
+            names = taken.setdefault(users, [])
+            declared = self._declared_names(entry)
+            for part, part_names in zip(parts, names):
+                if part_names.isdisjoint(declared):
+                    break
+            else:
+                part, part_names = [], set()
+                parts.append(part)
+                names.append(part_names)
+            part.append(key)
+            part_names.update(declared)
+        
+        chunks = {}
+        for parts in by_bundles.values():
+            for keys in parts:
+                digest = hashlib.sha1(",".join(keys).encode("ascii")).hexdigest()
+                chunks[f"chunk_{digest[:CHUNK_HASH_LENGTH]}"] = keys
+        return chunks
+    
+    @staticmethod
+    def _declared_names(entry: ProjectBlock) -> List[str]:
+        """Names a block declares: its own and those of blocks merged into it."""
+        return [entry.block.name] + entry.block.merged_names
+    
+    def _order_chunks(self) -> List[str]:
+        """Order the chunks for loading, dependencies first."""
+        module_of = self._module_of()
+        graph = self.graph
+        chunk_deps = {
+            chunk: sorted({
+                module_of[graph.names[dep]]
+                for key in keys
+                for dep in graph.successors(graph.ids[key])
+            } - {chunk})
+            for chunk, keys in self.chunks.items()
+        }
+        components = strongly_connected_components(self.chunks, chunk_deps.__getitem__)
+        return [chunk for component in components for chunk in component]
+    
+    def get_bundle_chunks(self, bundle_name: str) -> List[str]:
+        """Get the chunks a bundle loads, in load order."""
+        return [
+            chunk for chunk in self.chunk_order
+            if bundle_name in self.blocks[self.chunks[chunk][0]].bundles
+        ]
+    
+    def _module_of(self) -> Dict[str, str]:
+        """Map each block key to the module emitting it."""
+        module_of = {}
+        for bundle in self.bundles.values():
+            for key in bundle.keys:
+                module_of[key] = bundle.name
+        for chunk, keys in self.chunks.items():
+            for key in keys:
+                module_of[key] = chunk
+        return module_of
+    
+    def split(
+        self,
+        output_dir: Union[str, Path, OutputTarget],
+        format: str = "esm",
+        include_comments: bool = True,
+        dry_run: bool = False
+    ) -> Dict[str, str]:
+        """
+        Write the shared chunks, one entry module per bundle and ``project.json``.
+        
+        Args:
+            output_dir: Directory to write output files, or an output target
+            format: Output format ("esm", "commonjs", or "scripts"); for
+                scripts each bundle also gets ``<bundle>.html`` loading its
+                chunks and entry in order
+            include_comments: Include comments in generated files
+            dry_run: Generate output in memory only; do not write files
+        
+        Returns:
+            Dictionary mapping module names (and "manifest", ...) to file paths
+            (target locations)
+        """
+        if format not in ("esm", "commonjs", "scripts"):
+            raise ValueError(f"Invalid format: {format}. Must be 'esm', 'commonjs', or 'scripts'")
+        
+        target = open_target(output_dir)
+        module_of = self._module_of()
+        
+        with profile_stage(self.profiler, "generate", self.events):
+            self.modules = {}
+            self.module_files = {}
+            for chunk in self.chunk_order:
+                self.module_files[chunk] = f"{chunk}.js"
+                self.modules[chunk] = self._generate_module(
+                    chunk, self.chunks[chunk], module_of, format, include_comments
+                )
+            for bundle in self.bundles.values():
+                own = [key for key in bundle.keys if module_of[key] == bundle.name]
+                self.module_files[bundle.name] = f"{bundle.name}.js"
+                self.modules[bundle.name] = self._generate_module(
+                    bundle.name, own, module_of, format, include_comments,
+                    reexports=self.get_bundle_chunks(bundle.name)
+                )
+            files = {
+                name: (self.module_files[name], content) for name, content in self.modules.items()
+            }
+            if format == "scripts":
+                for bundle in self.bundles.values():
+                    files[f"{bundle.name}.html"] = (
+                        f"{bundle.name}.html", self._generate_page(bundle.name, include_comments)
+                    )
+            files["manifest"] = ("project.json", json.dumps(self.get_manifest(), indent=2) + "\n")
+        
+        if dry_run:
+            return {name: target.location(file_name) for name, (file_name, _) in files.items()}
+        
+        file_paths = {}
+        self.bytes_written = 0
+        with profile_stage(self.profiler, "write", self.events):
+            for name, (file_name, content) in files.items():
+                data = content.encode("utf-8")
+                location = file_paths[name] = target.write(file_name, data)
+                self.bytes_written += len(data)
+                if name in self.modules:
+                    self.events.emit(MODULE_WRITTEN, module=name, path=location, bytes=len(data))
+        if self.profiler is not None:
+            self.profiler.count("bytes_written", self.bytes_written)
+        return file_paths
+    
+    def _generate_module(
+        self,
+        module_name: str,
+        keys: List[str],
+        module_of: Dict[str, str],
+        format: str,
+        include_comments: bool,
+        reexports: Iterable[str] = ()
+    ) -> str:
+        """
+        Generate one chunk or entry module.
+        
+        Args:
+            module_name: Chunk or bundle name
+            keys: Blocks of the module, in output order
+            module_of: Block key -> module emitting it
+            format: Output format
+            include_comments: Add a header comment
+            reexports: Chunks whose exports the module passes on (entries)
+        """
+        lines = []
+        if include_comments:
+            if module_name in self.bundles:
+                lines.append(f"// Bundle: {module_name} ({self.bundles[module_name].path.name})")
+            else:
+                users = ", ".join(self.blocks[keys[0]].bundles)
+                lines.append(f"// Shared chunk: {module_name} (used by {users})")
+            lines.append("// Auto-generated by ScriptSpliter")
+            lines.append("")
+        
+        members = set(keys)
+        declared = {name for key in keys for name in self._declared_names(self.blocks[key])}
+        
+        # One import per providing module; a name is imported once
+        imported: Dict[str, List[str]] = {}
+        seen = set(declared)
+        for key in keys:
+            for dep in sorted(self.blocks[key].dependencies - members):
+                for name in self._declared_names(self.blocks[dep]):
+                    if name not in seen:
+                        seen.add(name)
+                        imported.setdefault(module_of[dep], []).append(name)
+        if format != "scripts" and imported:
+            for provider in sorted(imported):
+                names = ", ".join(imported[provider])
+                path = f"./{self.module_files[provider]}"
+                if format == "esm":
+                    lines.append(f"import {{ {names} }} from '{path}';")
+                else:
+                    lines.append(f"const {{ {names} }} = require('{path}');")
+            lines.append("")
+        
+        for key in keys:
+            lines.append(self.blocks[key].block.content)
+            lines.append("")
+        
+        exported = [name for key in keys for name in self._declared_names(self.blocks[key])]
+        exported = list(dict.fromkeys(exported))
+        reexports = list(reexports)
+        if format == "esm":
+            lines.append("")
+            if exported:
+                lines.append(f"export {{ {', '.join(exported)} }};")
+            for chunk in reexports:
+                lines.append(f"export * from './{self.module_files[chunk]}';")
+        elif format == "commonjs" and (exported or reexports):
+            lines.append("")
+            lines.append("module.exports = {")
+            for chunk in reexports:
+                lines.append(f"  ...require('./{self.module_files[chunk]}'),")
+            for name in exported:
+                lines.append(f"  {name},")
+            lines.append("};")
+        
+        return "\n".join(lines).strip() + "\n"
+    
+    def _generate_page(self, bundle_name: str, include_comments: bool) -> str:
+        """Generate the script tags loading one bundle's chunks and entry (scripts format)."""
+        lines = []
+        if include_comments:
+            lines.append(f"<!-- Bundle {bundle_name}, auto-generated by ScriptSpliter -->")
+        # Deferred scripts run in document order, dependencies first
+        for module_name in self.get_bundle_chunks(bundle_name) + [bundle_name]:
+            lines.append(f"<script defer src=\"{self.module_files[module_name]}\"></script>")
+        return "\n".join(lines) + "\n"
+    
+    def get_manifest(self) -> Dict[str, Any]:
+        """
+        Describe the generated files: per-bundle entry and chunks, per-chunk
+        users and blocks, and byte totals.
+        
+        Requires ``split`` (the sizes are those of the generated modules).
+        """
+        sizes = {name: len(content.encode("utf-8")) for name, content in self.modules.items()}
+        bundles = {}
+        for bundle in self.bundles.values():
+            chunks = self.get_bundle_chunks(bundle.name)
+            bundles[bundle.name] = {
+                "source": str(bundle.path),
+                "entry": self.module_files[bundle.name],
+                "chunks": [self.module_files[chunk] for chunk in chunks],
+                "source_bytes": bundle.size,
+                "page_bytes": sizes[bundle.name] + sum(sizes[chunk] for chunk in chunks),
+            }
+        chunks = {
+            chunk: {
+                "file": self.module_files[chunk],
+                "bundles": self.blocks[keys[0]].bundles,
+                "blocks": [self.blocks[key].block.name for key in keys],
+                "bytes": sizes[chunk],
+            }
+            for chunk, keys in self.chunks.items()
+        }
+        return {
+            "bundles": bundles,
+            "chunks": chunks,
+            "stats": self.get_stats(),
+        }
+    
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Count blocks and bytes before and after deduplication.
+        
+        ``source_bytes`` totals the input bundles and ``output_bytes`` the
+        generated modules, each shared chunk counted once (0 before
+        ``split``). ``duplicate_bytes`` is the block content that the
+        bundles repeat.
+        """
+        sizes = {name: len(content.encode("utf-8")) for name, content in self.modules.items()}
+        return {
+            "bundles": len(self.bundles),
+            "blocks": sum(len(bundle.keys) for bundle in self.bundles.values()),
+            "distinct_blocks": len(self.blocks),
+            "shared_blocks": sum(entry.shared for entry in self.blocks.values()),
+            "chunks": len(self.chunks),
+            "duplicate_bytes": sum(
+                len(entry.block.content.encode("utf-8")) * (len(entry.bundles) - 1)
+                for entry in self.blocks.values()
+            ),
+            "source_bytes": sum(bundle.size for bundle in self.bundles.values()),
+            "output_bytes": sum(sizes.values()),
+        }
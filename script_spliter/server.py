@@ -0,0 +1,417 @@
+"""
+Long-running split daemon answering JSON requests over a local socket.
+"""
+
+import asyncio
+import io
+import json
+import os
+import signal
+import stat
+import sys
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, TextIO
+
+from .spliter import ScriptSpliter
+from .targets import ArchiveTarget, MemoryTarget
+
+
+# Largest request line (Unix socket) or body (HTTP) accepted, in bytes
+MAX_REQUEST_SIZE = 64 * 1024 * 1024
+
+# split() keyword arguments a request may set
+SPLIT_OPTIONS = (
+    "format", "auto_group", "custom_grouping", "include_comments", "include_report",
+    "target_module_lines", "max_blocks_per_module", "dry_run", "source_maps",
+    "input_source_map", "content_hash", "load_plan", "minify",
+)
+
+
+@dataclass
+class CacheEntry:
+    """A parsed source file and the file state it was parsed from."""
+    mtime_ns: int
+    size: int
+    spliter: Optional[ScriptSpliter] = None
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class SpliterCache:
+    """
+    LRU cache of parsed ``ScriptSpliter`` instances keyed by file path.
+    
+    An entry is reused while the file's mtime and size are unchanged, and
+    reparsed otherwise. Work on one entry is serialized by its lock (a
+    spliter keeps per-split state), while different files are parsed and
+    split concurrently in worker threads.
+    """
+    
+    def __init__(self, max_entries: int = 8):
+        """
+        Create an empty cache.
+        
+        Args:
+            max_entries: Number of parsed files to keep
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+    
+    async def run(self, path: str, work: Callable[[ScriptSpliter], Any]) -> Any:
+        """
+        Run work on the cached spliter for path, parsing the file if needed.
+        
+        Args:
+            path: JavaScript file (relative paths resolve against the daemon's
+                working directory)
+            work: Function called with the spliter in a worker thread
+        
+        Returns:
+            The result of work
+        """
+        file = Path(path).resolve()
+        if not file.is_file():
+            raise FileNotFoundError(f"Source file not found: {path}")
+        stat = file.stat()
+        key = str(file)
+        
+        entry = self._entries.get(key)
+        if entry is None or (entry.mtime_ns, entry.size) != (stat.st_mtime_ns, stat.st_size):
+            self.misses += 1
+            entry = self._entries[key] = CacheEntry(stat.st_mtime_ns, stat.st_size)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        else:
+            self.hits += 1
+        self._entries.move_to_end(key)
+        
+        loop = asyncio.get_running_loop()
+        async with entry.lock:
+            if entry.spliter is None:
+                entry.spliter = await loop.run_in_executor(None, ScriptSpliter, key)
+            return await loop.run_in_executor(None, work, entry.spliter)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters and the cached paths, most recently used last."""
+        return {
+            "entries": list(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def _split(spliter: ScriptSpliter, request: Dict[str, Any]) -> Dict[str, Any]:
+    """Split to the request's output directory or archive, or into memory."""
+    options = {name: request[name] for name in SPLIT_OPTIONS if name in request}
+    if request.get("archive"):
+        with ArchiveTarget(request["archive"]) as target:
+            return {"files": spliter.split(target, **options)}
+    if request.get("output"):
+        return {"files": spliter.split(request["output"], **options)}
+    
+    target = MemoryTarget()
+    files = spliter.split(target, **options)
+    return {
+        "files": files,
+        "contents": {name: data.decode("utf-8") for name, data in target.files.items()},
+    }
+
+
+def _analyze(spliter: ScriptSpliter, request: Dict[str, Any]) -> Dict[str, Any]:
+    """Get the analysis as JSON (default) or as the text report."""
+    output_format = request.get("output_format", "json")
+    if output_format not in ("json", "text"):
+        raise ValueError(f"Invalid output_format: {output_format}. Must be 'json' or 'text'")
+    stream = io.StringIO()
+    spliter.write_analysis(
+        stream,
+        output_format=output_format,
+        target_module_lines=request.get("target_module_lines", 2000),
+        max_blocks_per_module=request.get("max_blocks_per_module", 0)
+    )
+    if output_format == "text":
+        return {"report": stream.getvalue()}
+    return {"analysis": json.loads(stream.getvalue())}
+
+
+def _deps(spliter: ScriptSpliter, request: Dict[str, Any]) -> Dict[str, Any]:
+    """Get a block's direct and transitive dependencies (and optionally its tree)."""
+    block = _required(request, "block")
+    graph = spliter.analyzer.graph
+    result: Dict[str, Any] = {
+        "dependencies": sorted(graph.dependencies.get(block, ())),
+        "transitive": sorted(graph.get_all_dependencies(block)),
+    }
+    if request.get("tree"):
+        result["tree"] = spliter.get_dependency_tree(block)
+    return result
+
+
+def _impact(spliter: ScriptSpliter, request: Dict[str, Any]) -> Dict[str, Any]:
+    """Get the blocks and modules affected by a change."""
+    return spliter.get_impact(
+        _required(request, "target"),
+        custom_grouping=request.get("custom_grouping"),
+        target_module_lines=request.get("target_module_lines", 2000),
+        max_blocks_per_module=request.get("max_blocks_per_module", 0),
+        auto_group=request.get("auto_group", True),
+        content_hash=request.get("content_hash", False),
+        format=request.get("format", "esm"),
+        include_comments=request.get("include_comments", True),
+        minify=request.get("minify", False)
+    )
+
+
+def _required(request: Dict[str, Any], name: str) -> Any:
+    """Get a mandatory request field."""
+    if name not in request:
+        raise ValueError(f"Missing request field: {name}")
+    return request[name]
+
+
+# Operations on a source file: name -> function(spliter, request) -> result
+OPERATIONS: Dict[str, Callable[[ScriptSpliter, Dict[str, Any]], Any]] = {
+    "split": _split,
+    "analyze": _analyze,
+    "blocks": lambda spliter, request: {"blocks": spliter.get_blocks_info()},
+    "deps": _deps,
+    "dependents": lambda spliter, request: {
+        "dependents": spliter.get_dependents(
+            _required(request, "block"), transitive=request.get("transitive", True)
+        )
+    },
+    "impact": _impact,
+}
+
+
+class SplitServer:
+    """
+    Answers split/analyze/deps requests from a cache of parsed files.
+    
+    A request is a JSON object with an ``op`` (see ``OPERATIONS``, plus
+    ``stats``), the source ``path`` and the operation's options; an optional
+    ``id`` is echoed back. Responses are ``{"ok": true, "result": ...}`` or
+    ``{"ok": false, "error": "..."}``. Over a Unix socket, requests and
+    responses are newline-delimited JSON and a connection may send any
+    number of them; over HTTP, each POST body is one request (the ``op`` may
+    also be given as the URL path, e.g. ``POST /deps``).
+    
+    The HTTP listener only answers local tools: a request must name the
+    listening address (``127.0.0.1:<port>`` or ``localhost:<port>``) as its
+    Host, be sent as ``application/json`` and carry no ``Origin`` header.
+    Browsers cannot meet all three, so web pages cannot reach the daemon
+    through cross-site requests or DNS rebinding.
+    """
+    
+    def __init__(self, cache_size: int = 8, log: Optional[TextIO] = None):
+        """
+        Create a server.
+        
+        Args:
+            cache_size: Number of parsed files to keep
+            log: Stream for one line per request (default: no request log)
+        """
+        self.cache = SpliterCache(cache_size)
+        self.log = log
+        self._http_hosts: frozenset = frozenset()
+    
+    async def handle(self, request: Any) -> Dict[str, Any]:
+        """Answer one decoded request."""
+        response: Dict[str, Any] = {}
+        if isinstance(request, dict) and "id" in request:
+            response["id"] = request["id"]
+        try:
+            if not isinstance(request, dict):
+                raise ValueError("Request must be a JSON object")
+            op = _required(request, "op")
+            if op == "stats":
+                result = self.cache.stats()
+            elif op in OPERATIONS:
+                operation = OPERATIONS[op]
+                result = await self.cache.run(
+                    _required(request, "path"), lambda spliter: operation(spliter, request)
+                )
+            else:
+                raise ValueError(f"Unknown op: {op}. Must be one of: stats, {', '.join(OPERATIONS)}")
+        except (FileNotFoundError, ValueError, KeyError, TypeError) as e:
+            response.update(ok=False, error=str(e))
+        except Exception as e:
+            response.update(ok=False, error=f"Unexpected error: {e}")
+        else:
+            response.update(ok=True, result=result)
+        
+        if self.log is not None:
+            status = "ok" if response["ok"] else f"error: {response['error']}"
+            op = request.get("op") if isinstance(request, dict) else None
+            path = request.get("path", "") if isinstance(request, dict) else ""
+            print(f"{op} {path} -> {status}", file=self.log)
+        return response
+    
+    async def _handle_line(self, line: bytes) -> bytes:
+        """Answer one encoded request."""
+        try:
+            request = json.loads(line)
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            response = {"ok": False, "error": f"Invalid JSON request: {e}"}
+        else:
+            response = await self.handle(request)
+        return _encode(response)
+    
+    async def _serve_stream(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answer newline-delimited JSON requests until the client disconnects."""
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError as e:
+                    line = e.partial
+                if not line.strip():
+                    if reader.at_eof():
+                        break
+                    continue
+                writer.write(await self._handle_line(line))
+                await writer.drain()
+        except (asyncio.LimitOverrunError, ValueError):
+            writer.write(b'{"ok": false, "error": "Request too large"}\n')
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+    
+    async def _serve_http(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answer one HTTP request and close the connection."""
+        status, body = "200 OK", b""
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            headers = {}
+            while True:
+                header = (await reader.readline()).decode("latin-1")
+                if header in ("\r\n", "\n", ""):
+                    break
+                name, _, value = header.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            
+            if len(request_line) != 3:
+                status, body = "400 Bad Request", b'{"ok": false, "error": "Malformed request"}\n'
+            elif request_line[0] != "POST":
+                status, body = "405 Method Not Allowed", b'{"ok": false, "error": "Use POST"}\n'
+            elif headers.get("host", "").lower() not in self._http_hosts or "origin" in headers:
+                status, body = "403 Forbidden", b'{"ok": false, "error": "Only local clients are accepted"}\n'
+            elif headers.get("content-type", "").split(";")[0].strip().lower() != "application/json":
+                status = "415 Unsupported Media Type"
+                body = b'{"ok": false, "error": "Content-Type must be application/json"}\n'
+            else:
+                length = int(headers.get("content-length", "0"))
+                if length > MAX_REQUEST_SIZE:
+                    raise ValueError("Request too large")
+                payload = await reader.readexactly(length)
+                op = request_line[1].split("?")[0].strip("/")
+                try:
+                    request = json.loads(payload or b"{}")
+                except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                    response = {"ok": False, "error": f"Invalid JSON request: {e}"}
+                else:
+                    if op and isinstance(request, dict):
+                        request.setdefault("op", op)
+                    response = await self.handle(request)
+                if not response["ok"]:
+                    status = "400 Bad Request"
+                body = _encode(response)
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            status = "400 Bad Request"
+            body = json.dumps({"ok": False, "error": str(e) or "Incomplete request"}).encode("utf-8")
+        
+        try:
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: close\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+    
+    async def serve_unix(self, socket_path: str) -> None:
+        """Listen on a Unix domain socket (readable by the current user only)."""
+        try:
+            mode = os.lstat(socket_path).st_mode
+        except FileNotFoundError:
+            pass
+        else:
+            if not stat.S_ISSOCK(mode):
+                raise FileExistsError(f"Not a socket, refusing to replace: {socket_path}")
+            os.unlink(socket_path)
+        # Create the socket file without group/other access, so nobody else
+        # can connect between bind and chmod
+        umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(
+                self._serve_stream, path=socket_path, limit=MAX_REQUEST_SIZE
+            )
+        finally:
+            os.umask(umask)
+        os.chmod(socket_path, 0o600)
+        print(f"Listening on {socket_path}", file=sys.stderr)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+    
+    async def serve_http(self, port: int, host: str = "127.0.0.1") -> None:
+        """Listen for HTTP POST requests on a local TCP port."""
+        server = await asyncio.start_server(
+            self._serve_http, host, port, limit=MAX_REQUEST_SIZE
+        )
+        port = server.sockets[0].getsockname()[1]
+        self._http_hosts = frozenset(
+            f"{name}:{port}" for name in ("127.0.0.1", "localhost", host.lower())
+        )
+        print(f"Listening on http://{host}:{port}/", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+
+def _encode(response: Dict[str, Any]) -> bytes:
+    """Encode a response as one JSON line."""
+    try:
+        return json.dumps(response).encode("utf-8") + b"\n"
+    except (RecursionError, ValueError, TypeError) as e:
+        error = {"ok": False, "error": f"Cannot encode response: {e}"}
+        if "id" in response:
+            error["id"] = response["id"]
+        return json.dumps(error).encode("utf-8") + b"\n"
+
+
+def serve(
+    socket_path: Optional[str] = None,
+    port: Optional[int] = None,
+    cache_size: int = 8,
+    log: Optional[TextIO] = None
+) -> None:
+    """
+    Run a split daemon until interrupted.
+    
+    Args:
+        socket_path: Unix domain socket to listen on
+        port: Localhost HTTP port to listen on (when socket_path is not given)
+        cache_size: Number of parsed files to keep
+        log: Stream for one line per request (default: no request log)
+    """
+    # Stop on SIGTERM as on Ctrl-C, so the socket file is removed
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    server = SplitServer(cache_size=cache_size, log=log)
+    if socket_path is not None:
+        asyncio.run(server.serve_unix(socket_path))
+    elif port is not None:
+        asyncio.run(server.serve_http(port))
+    else:
+        raise ValueError("Give a socket path or an HTTP port")
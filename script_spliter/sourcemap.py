@@ -0,0 +1,376 @@
+"""
+Source Map v3 encoding, decoding and composition.
+"""
+
+import base64
+import json
+import re
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import unquote
+
+
+BASE64_DIGITS = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+_DIGIT_VALUES = {digit: value for value, digit in enumerate(BASE64_DIGITS)}
+
+# Trailing ``//# sourceMappingURL=...`` comment of a bundle
+SOURCE_MAPPING_URL_PATTERN = re.compile(r'[ \t]*//[#@][ \t]*sourceMappingURL=(\S+)\s*$')
+
+# A decoded segment: (generated column,) or (generated column, source,
+# original line, original column[, name]), all absolute and 0-based
+Segment = Tuple[int, ...]
+
+
+def encode_vlq(value: int) -> str:
+    """Encode one signed integer as a base64 VLQ."""
+    vlq = ((-value) << 1) | 1 if value < 0 else value << 1
+    digits = []
+    while True:
+        digit = vlq & 31
+        vlq >>= 5
+        if not vlq:
+            digits.append(BASE64_DIGITS[digit])
+            return "".join(digits)
+        digits.append(BASE64_DIGITS[digit | 32])
+
+
+# Most deltas in a mappings string are small; encode those by lookup
+_SMALL_VLQ = {value: encode_vlq(value) for value in range(-512, 512)}
+
+
+def decode_vlq(text: str) -> List[int]:
+    """Decode a run of base64 VLQs (one segment) into signed integers."""
+    values = []
+    value = shift = 0
+    for char in text:
+        digit = _DIGIT_VALUES.get(char)
+        if digit is None:
+            raise ValueError(f"Invalid base64 VLQ digit: {char!r}")
+        value += (digit & 31) << shift
+        if digit & 32:
+            shift += 5
+        else:
+            values.append(-(value >> 1) if value & 1 else value >> 1)
+            value = shift = 0
+    if shift:
+        raise ValueError(f"Truncated base64 VLQ: {text!r}")
+    return values
+
+
+def decode_mappings(mappings: str) -> List[List[Segment]]:
+    """
+    Decode a mappings string into absolute segments per generated line.
+    
+    Args:
+        mappings: The ``mappings`` field of a v3 source map
+    
+    Returns:
+        One list of segments per generated line, sorted by generated column
+    """
+    lines: List[List[Segment]] = []
+    source = original_line = original_column = name = 0
+    for line_text in mappings.split(";"):
+        segments: List[Segment] = []
+        column = 0
+        for segment_text in line_text.split(","):
+            if not segment_text:
+                continue
+            values = decode_vlq(segment_text)
+            column += values[0]
+            if len(values) == 1:
+                segments.append((column,))
+                continue
+            if len(values) < 4:
+                raise ValueError(f"Invalid source map segment: {segment_text!r}")
+            source += values[1]
+            original_line += values[2]
+            original_column += values[3]
+            if len(values) > 4:
+                name += values[4]
+                segments.append((column, source, original_line, original_column, name))
+            else:
+                segments.append((column, source, original_line, original_column))
+        segments.sort()
+        lines.append(segments)
+    return lines
+
+
+def find_source_mapping_url(source: str) -> Optional[str]:
+    """Return the URL of the bundle's trailing sourceMappingURL comment, if any."""
+    index = source.rfind("sourceMappingURL=")
+    if index < 0:
+        return None
+    match = SOURCE_MAPPING_URL_PATTERN.match(source, source.rfind("\n", 0, index) + 1)
+    return match.group(1) if match else None
+
+
+class SourceMap:
+    """
+    A decoded v3 source map.
+    
+    Only the flat form is supported; index maps with ``sections`` are
+    rejected. ``sourceRoot`` is folded into ``sources``.
+    """
+    
+    def __init__(
+        self,
+        sources: List[str],
+        lines: List[List[Segment]],
+        names: Optional[List[str]] = None,
+        sources_content: Optional[List[Optional[str]]] = None,
+        file: Optional[str] = None
+    ):
+        """
+        Wrap decoded mappings.
+        
+        Args:
+            sources: Original source paths or URLs
+            lines: Segments per generated line (see ``decode_mappings``)
+            names: Symbol names referenced by 5-field segments
+            sources_content: Optional original source texts, parallel to sources
+            file: Name of the generated file the map describes
+        """
+        self.sources = sources
+        self.lines = lines
+        self.names = names or []
+        self.sources_content = sources_content
+        self.file = file
+        self._columns = [[segment[0] for segment in segments] for segments in lines]
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SourceMap":
+        """Build a map from a parsed source map JSON object."""
+        if data.get("version") != 3:
+            raise ValueError(f"Unsupported source map version: {data.get('version')}")
+        if "sections" in data:
+            raise ValueError("Indexed source maps (with sections) are not supported")
+        
+        root = data.get("sourceRoot") or ""
+        if root and not root.endswith("/"):
+            root += "/"
+        sources = [root + (source or "") for source in data.get("sources", [])]
+        return cls(
+            sources,
+            decode_mappings(data.get("mappings", "")),
+            names=list(data.get("names", [])),
+            sources_content=data.get("sourcesContent"),
+            file=data.get("file")
+        )
+    
+    @classmethod
+    def from_json(cls, text: str) -> "SourceMap":
+        """Parse a source map from JSON text."""
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid source map JSON: {e}") from e
+        return cls.from_dict(data)
+    
+    @classmethod
+    def from_data_uri(cls, uri: str) -> "SourceMap":
+        """Parse an inline ``data:application/json[;base64],...`` source map."""
+        header, _, payload = uri.partition(",")
+        if header.endswith(";base64"):
+            text = base64.b64decode(payload).decode("utf-8")
+        else:
+            text = unquote(payload)
+        return cls.from_json(text)
+    
+    def segments_in_span(self, line: int, start: int, end: int) -> List[Segment]:
+        """
+        Get the segments that cover columns [start, end) of a generated line.
+        
+        A segment that begins before start but still covers it is returned
+        first, with its generated column moved to start.
+        """
+        if not 0 <= line < len(self.lines):
+            return []
+        columns = self._columns[line]
+        segments = self.lines[line]
+        first = bisect_left(columns, start)
+        last = bisect_left(columns, end, first)
+        if first > 0 and (first == last or columns[first] > start):
+            return [(start,) + segments[first - 1][1:]] + segments[first:last]
+        return segments[first:last]
+    
+    def original_position(self, line: int, column: int) -> Optional[Segment]:
+        """
+        Find the segment that covers a generated position.
+        
+        Returns:
+            The last segment on the line at or before column, or None
+        """
+        if not 0 <= line < len(self.lines):
+            return None
+        index = bisect_right(self._columns[line], column) - 1
+        if index < 0:
+            return None
+        return self.lines[line][index]
+
+
+class SourceMapBuilder:
+    """
+    Encodes a v3 source map incrementally.
+    
+    Segments must be added in generated order (line, then column). Each is
+    VLQ-encoded against the previous one as it is added, so the mappings
+    string is built in one pass and never re-scanned.
+    """
+    
+    def __init__(
+        self,
+        file: str,
+        sources: Sequence[str],
+        names: Sequence[str] = (),
+        sources_content: Optional[Sequence[Optional[str]]] = None
+    ):
+        """
+        Start an empty map.
+        
+        Args:
+            file: Name of the generated file
+            sources: Original sources that segments refer to by index
+            names: Symbol names that segments refer to by index
+            sources_content: Optional original source texts, parallel to sources
+        """
+        self.file = file
+        self.sources = list(sources)
+        self.names = list(names)
+        self.sources_content = list(sources_content) if sources_content is not None else None
+        self._parts: List[str] = []
+        self._line = 0
+        self._line_has_segments = False
+        self._column = 0
+        self._source = 0
+        self._original_line = 0
+        self._original_column = 0
+        self._name = 0
+    
+    def add(self, generated_line: int, generated_column: int, segment: Segment = ()) -> None:
+        """
+        Add one mapping.
+        
+        Args:
+            generated_line: 0-based line in the generated file
+            generated_column: 0-based column in the generated file
+            segment: (source, original line, original column[, name]) indices,
+                or empty for an unmapped position
+        """
+        parts = self._parts
+        if generated_line != self._line:
+            parts.append(";" * (generated_line - self._line))
+            self._line = generated_line
+            self._column = 0
+        elif self._line_has_segments:
+            parts.append(",")
+        self._line_has_segments = True
+        
+        small = _SMALL_VLQ
+        delta = generated_column - self._column
+        parts.append(small.get(delta) or encode_vlq(delta))
+        self._column = generated_column
+        if not segment:
+            return
+        
+        source, original_line, original_column = segment[0], segment[1], segment[2]
+        for delta in (
+            source - self._source,
+            original_line - self._original_line,
+            original_column - self._original_column
+        ):
+            parts.append(small.get(delta) or encode_vlq(delta))
+        self._source = source
+        self._original_line = original_line
+        self._original_column = original_column
+        if len(segment) > 3:
+            delta = segment[3] - self._name
+            parts.append(small.get(delta) or encode_vlq(delta))
+            self._name = segment[3]
+    
+    def add_lines(self, generated_line: int, original_line: int, count: int, source: int = 0) -> None:
+        """
+        Map count whole lines copied verbatim, each from column 0 to column 0.
+        
+        After the first line every segment encodes the same deltas (next
+        line, same source, next original line, same column), so the rest of
+        the run is appended as one repeated string.
+        """
+        if count <= 0:
+            return
+        self.add(generated_line, 0, (source, original_line, 0))
+        if count > 1:
+            self._parts.append(";AACA" * (count - 1))
+            self._line += count - 1
+            self._original_line += count - 1
+    
+    def add_span(
+        self,
+        generated_line: int,
+        generated_column: int,
+        original_line: int,
+        original_column: int,
+        length: int,
+        input_map: Optional[SourceMap] = None,
+        boundaries: Iterable[int] = ()
+    ) -> None:
+        """
+        Map a run of generated text copied verbatim from one original line.
+        
+        Without an input map the span start is mapped to source 0, plus one
+        segment per entry of boundaries (offsets into the span, ascending).
+        With an input map, the span is mapped through it: the input segment
+        covering the span start and every input segment inside the span are
+        re-emitted at their shifted generated columns.
+        
+        Args:
+            generated_line: Generated line of the copy
+            generated_column: Generated column where the copy starts
+            original_line: Line the text was copied from
+            original_column: Column the text was copied from
+            length: Number of characters copied
+            input_map: Map from the copied-from file to its own sources
+            boundaries: Extra offsets to map when there is no input map
+        """
+        if length <= 0:
+            return
+        if input_map is None:
+            self.add(generated_line, generated_column, (0, original_line, original_column))
+            # Boundary segments differ from the previous one only by the same
+            # column delta on both sides
+            small = _SMALL_VLQ
+            pieces = []
+            previous = 0
+            for offset in boundaries:
+                if previous < offset < length:
+                    delta = offset - previous
+                    vlq = small.get(delta) or encode_vlq(delta)
+                    pieces.append(f",{vlq}AA{vlq}")
+                    previous = offset
+            if pieces:
+                self._parts.append("".join(pieces))
+                self._column += previous
+                self._original_column += previous
+            return
+        
+        shift = generated_column - original_column
+        for segment in input_map.segments_in_span(
+            original_line, original_column, original_column + length
+        ):
+            self.add(generated_line, segment[0] + shift, segment[1:])
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the map as a v3 source map JSON object."""
+        data: Dict[str, Any] = {
+            "version": 3,
+            "file": self.file,
+            "sources": self.sources,
+            "names": self.names,
+            "mappings": "".join(self._parts),
+        }
+        if self.sources_content is not None:
+            data["sourcesContent"] = self.sources_content
+        return data
+    
+    def to_json(self) -> str:
+        """Return the map as compact JSON text."""
+        return json.dumps(self.to_dict(), separators=(",", ":"))
@@ -3,42 +3,122 @@ Main ScriptSpliter orchestrator.
 """
 
 import json
+import os
+import re
 from pathlib import Path
-from typing import Dict, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional, TextIO, Union
+from urllib.parse import unquote
 from .parser import JavaScriptParser
-from .analyzer import DependencyAnalyzer
-from .generator import ModuleGenerator, ModuleConfig, CodeAnalysisReport
+from .analyzer import DependencyAnalyzer, dependency_tree
+from .events import EventBus
+from .profiling import Profiler, profile_stage
+
+# Generation, source maps, output targets and the symbol index are imported
+# where they are used, so queries such as --deps do not load them.
+if TYPE_CHECKING:
+    from .filters import BlockFilter
+    from .index import SymbolIndex
+    from .sourcemap import SourceMap
+    from .targets import OutputTarget
 
 
 class ScriptSpliter:
     """Main orchestrator for splitting JavaScript files."""
     
-    def __init__(self, source_file: str):
-        """Initialize with a JavaScript source file."""
-        self.source_file = Path(source_file)
+    # Impact target given as a line range: [FILE:]START[-END]
+    LINE_RANGE_PATTERN = re.compile(r'(?:(?P<file>.+):)?(?P<start>\d+)(?:-(?P<end>\d+))?')
+    
+    def __init__(
+        self,
+        source_file: str,
+        profiler: Optional[Profiler] = None,
+        events: Optional[EventBus] = None,
+        source_code: Optional[str] = None,
+        block_filter: Optional["BlockFilter"] = None
+    ):
+        """
+        Initialize with a JavaScript source file.
         
-        if not self.source_file.exists():
-            raise FileNotFoundError(f"Source file not found: {source_file}")
+        Args:
+            source_file: Path to the JavaScript file (only a display name
+                when source_code is given)
+            profiler: Optional profiler that records per-stage timings and counters
+            events: Optional event bus that receives instrumentation events
+            source_code: Source text to split instead of reading source_file
+            block_filter: Optional filter that drops and merges blocks before
+                analysis
+        """
+        self.source_file = Path(source_file)
+        self.profiler = profiler
+        self.events = events if events is not None else EventBus()
+        self.in_memory = source_code is not None
         
-        # Read source (prefer UTF-8, tolerate invalid bytes if needed).
-        try:
-            self.source_code = self.source_file.read_text(encoding="utf-8")
-        except UnicodeDecodeError:
-            self.source_code = self.source_file.read_text(encoding="utf-8", errors="replace")
+        if self.in_memory:
+            self.source_code = source_code
+        else:
+            if not self.source_file.exists():
+                raise FileNotFoundError(f"Source file not found: {source_file}")
+            
+            # Read source (prefer UTF-8, tolerate invalid bytes if needed).
+            with profile_stage(profiler, "read", self.events):
+                try:
+                    self.source_code = self.source_file.read_text(encoding="utf-8")
+                except UnicodeDecodeError:
+                    self.source_code = self.source_file.read_text(encoding="utf-8", errors="replace")
         
         # Parse
-        self.parser = JavaScriptParser(self.source_code)
-        self.blocks = self.parser.parse()
+        self.parser = JavaScriptParser(self.source_code, profiler=profiler, events=self.events)
+        self.blocks = self.parser.parse(block_filter=block_filter)
         
         # Analyze
-        self.analyzer = DependencyAnalyzer(self.blocks)
+        with profile_stage(profiler, "analyze", self.events):
+            self.analyzer = DependencyAnalyzer(
+                self.blocks,
+                events=self.events,
+                size_by_bytes=self.parser.minified,
+                symbols=self.parser.symbols
+            )
+        if profiler is not None:
+            profiler.count("edges", sum(len(block.dependencies) for block in self.blocks))
         
         self.generator = None
         self.modules = {}
     
+    @classmethod
+    def from_source(
+        cls,
+        source: Union[str, bytes],
+        name: str = "<source>",
+        profiler: Optional[Profiler] = None,
+        events: Optional[EventBus] = None,
+        block_filter: Optional["BlockFilter"] = None
+    ) -> "ScriptSpliter":
+        """
+        Create a spliter for source text that is not (or not yet) on disk.
+        
+        Args:
+            source: JavaScript source; bytes are decoded as UTF-8, replacing
+                invalid sequences
+            name: Display name used in reports and source maps
+            profiler: Optional profiler that records per-stage timings and counters
+            events: Optional event bus that receives instrumentation events
+            block_filter: Optional filter that drops and merges blocks before
+                analysis
+        
+        Returns:
+            A spliter whose ``split`` can write to any output target
+        """
+        if isinstance(source, bytes):
+            try:
+                source = source.decode("utf-8")
+            except UnicodeDecodeError:
+                source = source.decode("utf-8", errors="replace")
+        return cls(name, profiler=profiler, events=events, source_code=source,
+                   block_filter=block_filter)
+    
     def split(
         self,
-        output_dir: str,
+        output_dir: Union[str, Path, "OutputTarget"],
         format: str = "esm",
         auto_group: bool = True,
         custom_grouping: Optional[Dict[str, list]] = None,
@@ -46,13 +126,20 @@ class ScriptSpliter:
         include_report: bool = True,
         target_module_lines: int = 2000,
         max_blocks_per_module: int = 0,
-        dry_run: bool = False
+        dry_run: bool = False,
+        source_maps: bool = False,
+        input_source_map: Optional[str] = None,
+        content_hash: bool = False,
+        load_plan: bool = False,
+        minify: bool = False
     ) -> Dict[str, str]:
         """
         Split the JavaScript file into modules.
         
         Args:
-            output_dir: Directory to write output files
+            output_dir: Directory to write output files, or an output target
+                (e.g. ``MemoryTarget`` or ``StreamTarget``); a target is left
+                open for the caller to close, best with a ``with`` block
             format: Output format ("esm", "commonjs", or "scripts")
             auto_group: Automatically group related code (if custom_grouping not provided)
             custom_grouping: Custom grouping of blocks into modules
@@ -61,21 +148,28 @@ class ScriptSpliter:
             target_module_lines: Target max lines per module (0 disables packing)
             max_blocks_per_module: Max blocks per module (0 disables limit)
             dry_run: Generate output in memory only; do not write files
+            source_maps: Write a v3 source map next to each module
+            input_source_map: Source map of the input bundle to compose with
+                (default: the one its sourceMappingURL comment points to)
+            content_hash: Name module files ``name.[hash].js`` and write
+                ``manifest.json`` (plus ``importmap.json`` for ESM); automatic
+                modules are named after their first block
+            load_plan: Write ``load-plan.json`` (modules by dependency depth)
+                and, for ESM, ``preload.html`` with modulepreload hints
+            minify: Strip comments and collapse whitespace in the block code
+                (and drop the module header comments); the bytes saved are in
+                ``generator.minify_input_bytes`` / ``minify_output_bytes``
         
         Returns:
-            Dictionary mapping module names to file paths
+            Dictionary mapping module names to file paths (target locations)
         """
-        # Determine grouping
-        if custom_grouping:
-            grouping = custom_grouping
-        elif auto_group:
-            grouping = self.analyzer.get_module_suggestions(
-                target_lines_per_module=target_module_lines,
-                max_blocks_per_module=max_blocks_per_module
-            )
-        else:
-            # One block per module
-            grouping = {block.name: [block.name] for block in self.blocks if block.name}
+        from .generator import ModuleGenerator, ModuleConfig, CodeAnalysisReport
+        from .targets import DirectoryTarget, open_target
+        
+        target = open_target(output_dir)
+        grouping = self._grouping(
+            auto_group, custom_grouping, target_module_lines, max_blocks_per_module, content_hash
+        )
         
         # Validate format
         if format not in ("esm", "commonjs", "scripts"):
@@ -84,46 +178,187 @@ class ScriptSpliter:
         # Generate modules
         config = ModuleConfig(
             format=format,
+            include_source_maps=source_maps,
             add_comments=include_comments,
-            preserve_original=True
+            preserve_original=True,
+            content_hash=content_hash,
+            load_plan=load_plan,
+            minify=minify,
+            source_name=self._source_name(target)
         )
+        input_map = None
+        if source_maps:
+            input_map = self.load_input_source_map(input_source_map)
+            if input_map is not None and isinstance(target, DirectoryTarget):
+                input_map.sources = [
+                    self._relative_path(source, target.path) if os.path.isabs(source) else source
+                    for source in input_map.sources
+                ]
         
-        self.generator = ModuleGenerator(self.blocks, self.analyzer, config)
-        self.modules = self.generator.generate_modules(grouping)
+        self.generator = ModuleGenerator(
+            self.blocks, self.analyzer, config, events=self.events, input_source_map=input_map,
+            parser=self.parser
+        )
+        with profile_stage(self.profiler, "generate", self.events):
+            self.modules = self.generator.generate_modules(grouping)
+        if self.profiler is not None:
+            self.profiler.count("modules", len(self.modules))
+            if minify:
+                self.profiler.count(
+                    "minify_saved_bytes",
+                    self.generator.minify_input_bytes - self.generator.minify_output_bytes
+                )
 
         if dry_run:
             file_paths = {}
-            output_path = Path(output_dir)
-            file_ext = self.generator.get_file_extension()
             for module_name in self.modules.keys():
-                file_paths[module_name] = str(output_path / f"{module_name}{file_ext}")
+                file_name = self.generator.module_files[module_name]
+                file_paths[module_name] = target.location(file_name)
+                if module_name in self.generator.source_maps:
+                    file_paths[f"{module_name}.map"] = target.location(f"{file_name}.map")
             index_name = "index.js" if format != "scripts" else "index.html"
-            file_paths["index"] = str(output_path / index_name)
+            file_paths["index"] = target.location(index_name)
+            if content_hash:
+                for name in self.generator.get_manifest_files():
+                    file_paths[name] = target.location(f"{name}.json")
+            if load_plan:
+                for name in self.generator.get_load_plan_files():
+                    file_paths[name.split(".")[0]] = target.location(name)
             if include_report:
-                file_paths["report"] = str(output_path / "ANALYSIS_REPORT.txt")
+                file_paths["report"] = target.location("ANALYSIS_REPORT.txt")
             return file_paths
 
         # Write files
-        file_paths = self.generator.write_files(output_dir)
+        with profile_stage(self.profiler, "write", self.events):
+            file_paths = self.generator.write_files(target)
+        if self.profiler is not None:
+            self.profiler.count("bytes_written", self.generator.bytes_written)
 
         # Generate report if requested
         if include_report:
-            report = CodeAnalysisReport(self.blocks, self.modules, self.analyzer)
-            report_content = report.generate_report()
+            with profile_stage(self.profiler, "report", self.events):
+                report = CodeAnalysisReport(self.blocks, self.modules, self.analyzer, grouping)
+                report_content = report.generate_report()
 
-            report_path = Path(output_dir) / "ANALYSIS_REPORT.txt"
-            with open(report_path, 'w') as f:
-                f.write(report_content)
+                report_path = target.write("ANALYSIS_REPORT.txt", report_content.encode("utf-8"))
 
-            file_paths["report"] = str(report_path)
+            file_paths["report"] = report_path
         
         return file_paths
     
+    def _grouping(
+        self,
+        auto_group: bool,
+        custom_grouping: Optional[Dict[str, list]],
+        target_module_lines: int,
+        max_blocks_per_module: int,
+        content_hash: bool
+    ) -> Dict[str, list]:
+        """Determine the modules of a split: module name -> block names."""
+        if custom_grouping:
+            return custom_grouping
+        if auto_group:
+            with profile_stage(self.profiler, "grouping", self.events):
+                grouping = self.analyzer.get_module_suggestions(
+                    target_lines_per_module=target_module_lines,
+                    max_blocks_per_module=max_blocks_per_module
+                )
+        else:
+            # One block per module
+            grouping = {block.name: [block.name] for block in self.blocks if block.name}
+        
+        if content_hash:
+            # Name modules after their first block so names survive repacking
+            grouping = {block_names[0]: block_names for block_names in grouping.values() if block_names}
+        return grouping
+    
+    def load_input_source_map(self, map_path: Optional[str] = None) -> Optional["SourceMap"]:
+        """
+        Load the source map of the input bundle.
+        
+        Args:
+            map_path: Map file to load; by default the bundle's trailing
+                sourceMappingURL comment is followed (a file or a data URI)
+        
+        Returns:
+            The map, with relative sources resolved to absolute paths, or None
+            if the bundle references no map or the referenced file is missing
+        """
+        from .sourcemap import SourceMap, find_source_mapping_url
+        
+        if map_path is not None:
+            map_file = Path(map_path)
+            if not map_file.exists():
+                raise FileNotFoundError(f"Source map not found: {map_path}")
+        else:
+            url = find_source_mapping_url(self.source_code)
+            if url is None:
+                return None
+            if url.startswith("data:"):
+                return self._resolve_sources(SourceMap.from_data_uri(url), self.source_file.parent)
+            map_file = self.source_file.parent / unquote(url.split("?")[0].split("#")[0])
+            if not map_file.is_file():
+                return None
+        
+        source_map = SourceMap.from_json(map_file.read_text(encoding="utf-8"))
+        return self._resolve_sources(source_map, map_file.parent)
+    
+    @staticmethod
+    def _resolve_sources(source_map: "SourceMap", base: Path) -> "SourceMap":
+        """Make relative source paths absolute; URLs (``webpack://...``) are kept."""
+        source_map.sources = [
+            source if "://" in source or os.path.isabs(source) else str((base / source).resolve())
+            for source in source_map.sources
+        ]
+        return source_map
+    
+    def _source_name(self, target: "OutputTarget") -> str:
+        """Name of the input bundle as seen from the generated files' source maps."""
+        from .targets import DirectoryTarget
+        
+        if self.in_memory or not isinstance(target, DirectoryTarget):
+            return self.source_file.name
+        return self._relative_path(self.source_file.resolve(), target.path)
+    
+    @staticmethod
+    def _relative_path(path, output_dir: Union[str, Path]) -> str:
+        """Express a file path relative to the output directory, with forward slashes."""
+        return Path(os.path.relpath(path, Path(output_dir).resolve())).as_posix()
+    
     def get_analysis(self) -> str:
         """Get code analysis without generating files."""
+        from .generator import CodeAnalysisReport
+        
         report = CodeAnalysisReport(self.blocks, {}, self.analyzer)
         return report.generate_report()
     
+    def write_analysis(
+        self,
+        stream: TextIO,
+        output_format: str = "text",
+        target_module_lines: int = 2000,
+        max_blocks_per_module: int = 0
+    ) -> None:
+        """
+        Write the code analysis to a stream without generating files.
+        
+        Args:
+            stream: Text stream to write to
+            output_format: "text", "json", or "ndjson"
+            target_module_lines: Target max lines per suggested module
+            max_blocks_per_module: Max blocks per suggested module
+        """
+        from .generator import CodeAnalysisReport
+        
+        grouping = None
+        if output_format != "text":
+            grouping = self.analyzer.get_module_suggestions(
+                target_lines_per_module=target_module_lines,
+                max_blocks_per_module=max_blocks_per_module
+            )
+        report = CodeAnalysisReport(self.blocks, {}, self.analyzer, grouping)
+        report.write(stream, output_format)
+    
     def get_blocks_info(self) -> list:
         """Get information about all parsed blocks."""
         return [
@@ -131,6 +366,7 @@ class ScriptSpliter:
                 "name": block.name,
                 "type": block.type,
                 "lines": f"{block.start_line + 1}-{block.end_line + 1}",
+                "offsets": f"{block.start_offset}-{block.end_offset}",
                 "dependencies": list(block.dependencies),
                 "exported": block.is_exported
             }
@@ -143,19 +379,155 @@ class ScriptSpliter:
         if not block:
             return {}
         
-        def build_tree(name: str, visited: set = None) -> Dict:
-            if visited is None:
-                visited = set()
-            
-            if name in visited:
-                return {"name": name, "circular": True}
-            
-            visited.add(name)
-            deps = self.analyzer.graph.dependencies.get(name, set())
+        dependencies = self.analyzer.graph.dependencies
+        return dependency_tree(block_name, lambda name: dependencies.get(name, set()))
+    
+    def get_dependents(self, block_name: str, transitive: bool = True) -> List[str]:
+        """
+        Get the blocks that depend on a block, sorted by name.
+        
+        Args:
+            block_name: Block to look up
+            transitive: Include indirect dependents (default), not just direct ones
+        """
+        if transitive:
+            dependents = self.analyzer.get_dependents(block_name)
+        else:
+            dependents = self.analyzer.graph.reverse_dependencies.get(block_name, set())
+        return sorted(dependents)
+    
+    def get_blocks_in_lines(self, start_line: int, end_line: int) -> List[str]:
+        """Get the names of blocks overlapping a 1-based, inclusive line range."""
+        return [
+            block.name for block in self.blocks
+            if block.name and block.start_line + 1 <= end_line and block.end_line + 1 >= start_line
+        ]
+    
+    def get_impact(
+        self,
+        target: str,
+        custom_grouping: Optional[Dict[str, list]] = None,
+        target_module_lines: int = 2000,
+        max_blocks_per_module: int = 0,
+        auto_group: bool = True,
+        content_hash: bool = False,
+        format: str = "esm",
+        include_comments: bool = True,
+        minify: bool = False
+    ) -> Dict:
+        """
+        Report which blocks and generated modules a change transitively affects.
+        
+        Module names and files are those ``split`` produces with the same
+        options; with ``content_hash`` the modules are generated in memory to
+        compute their hashed file names.
+        
+        Args:
+            target: Changed code, either a line range of the source
+                (``START[-END]`` or ``FILE:START[-END]``, 1-based) or a generated
+                module (``utils.js``, ``utils.3f2a9c1b.js``, ``output/utils.js``
+                or ``utils``)
+            custom_grouping: Grouping used for the split (default: the automatic
+                module suggestions for the limits below)
+            target_module_lines: Target max lines per suggested module
+            max_blocks_per_module: Max blocks per suggested module
+            auto_group: Whether the split grouped blocks automatically (else one
+                block per module)
+            content_hash: Whether the split named files ``name.[hash].js``
+            format: Output format of the split (affects the hashes)
+            include_comments: Whether the split included comments (affects the hashes)
+            minify: Whether the split was minified (affects the hashes)
+        
+        Returns:
+            Dictionary with the changed blocks, affected blocks, and affected
+            modules and their file names
+        
+        Raises:
+            ValueError: If the target matches neither a line range of this
+                source nor a module
+        """
+        grouping = self._grouping(
+            auto_group, custom_grouping, target_module_lines, max_blocks_per_module, content_hash
+        )
+        if content_hash:
+            from .generator import ModuleGenerator, ModuleConfig
             
-            return {
-                "name": name,
-                "dependencies": [build_tree(dep, visited.copy()) for dep in sorted(deps)]
-            }
+            if format not in ("esm", "commonjs", "scripts"):
+                raise ValueError(f"Invalid format: {format}. Must be 'esm', 'commonjs', or 'scripts'")
+            config = ModuleConfig(
+                format=format,
+                add_comments=include_comments,
+                preserve_original=True,
+                content_hash=True,
+                minify=minify
+            )
+            generator = ModuleGenerator(self.blocks, self.analyzer, config, parser=self.parser)
+            generator.generate_modules(grouping)
+            module_files = generator.module_files
+        else:
+            module_files = {module_name: f"{module_name}.js" for module_name in grouping}
         
-        return build_tree(block_name)
+        changed = self._resolve_impact_target(target, grouping, module_files)
+        affected = self.analyzer.get_affected(changed)
+        modules = [
+            module_name for module_name, block_names in grouping.items()
+            if any(name in affected for name in block_names)
+        ]
+        return {
+            "target": target,
+            "changed_blocks": changed,
+            "affected_blocks": sorted(affected),
+            "affected_modules": modules,
+            "affected_files": [module_files[module_name] for module_name in modules],
+        }
+    
+    def _resolve_impact_target(
+        self,
+        target: str,
+        grouping: Dict[str, list],
+        module_files: Dict[str, str]
+    ) -> List[str]:
+        """Resolve an impact target to the names of the changed blocks."""
+        match = self.LINE_RANGE_PATTERN.fullmatch(target)
+        if match:
+            file_part = match.group("file")
+            if file_part and Path(file_part).name != self.source_file.name:
+                raise ValueError(f"Line range refers to {file_part}, not {self.source_file}")
+            start = int(match.group("start"))
+            end = int(match.group("end") or start)
+            return self.get_blocks_in_lines(start, end)
+        
+        file_name = Path(target).name
+        for module_name, module_file in module_files.items():
+            if module_file == file_name:
+                return list(grouping[module_name])
+        module_name = Path(target).stem if target.endswith(".js") else file_name
+        if module_name in grouping:
+            return list(grouping[module_name])
+        raise ValueError(f"Impact target '{target}' is neither a line range nor a module")
+    
+    def build_index(self, index_path: Optional[str] = None) -> "SymbolIndex":
+        """
+        Write the parsed blocks, edges and exports to an on-disk symbol index.
+        
+        Args:
+            index_path: Index file (default: ``<source>.index.sqlite`` next to
+                the source file)
+        
+        Returns:
+            The index, open for queries
+        """
+        from .index import SymbolIndex
+        
+        if self.in_memory:
+            raise ValueError("A symbol index needs a source file on disk")
+        if index_path is None:
+            index_path = SymbolIndex.default_path(self.source_file)
+        with profile_stage(self.profiler, "index", self.events):
+            return SymbolIndex.build(
+                index_path,
+                self.source_file,
+                self.blocks,
+                self.analyzer.graph.dependencies,
+                self.parser.exports
+            )
@@ -0,0 +1,66 @@
+"""
+Interned symbol table shared by the parser, analyzer and generator.
+"""
+
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+
+class SymbolTable:
+    """
+    Maps block names to dense, stable integer IDs.
+    
+    Each name is stored once (as an interned string) and keeps its ID for the
+    lifetime of the table; IDs are never reused or reordered, so they can key
+    caches across stages. The parser interns block names in source order, so
+    comparing block IDs compares source positions.
+    """
+    
+    def __init__(self, names: Iterable[str] = ()):
+        """
+        Create a table, optionally pre-populated with names.
+        
+        Args:
+            names: Names to intern, in ID order
+        """
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = {}
+        for name in names:
+            self.intern(name)
+    
+    def intern(self, name: str) -> int:
+        """Return the ID of name, assigning the next ID if it is new."""
+        symbol_id = self.ids.get(name)
+        if symbol_id is None:
+            name = sys.intern(name)
+            symbol_id = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return symbol_id
+    
+    def get(self, name: str) -> Optional[int]:
+        """Return the ID of name, or None if it was never interned."""
+        return self.ids.get(name)
+    
+    def name_of(self, symbol_id: int) -> str:
+        """Return the name with the given ID."""
+        return self.names[symbol_id]
+    
+    def canonical(self, names: Iterable[str]) -> Set[str]:
+        """
+        Replace interned names by the table's own string objects.
+        
+        Names parsed out of source text are fresh string copies; storing the
+        canonical objects instead keeps one copy per name and makes later
+        dictionary lookups identity comparisons.
+        """
+        table_names, ids = self.names, self.ids
+        return {table_names[ids[name]] for name in names}
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    def __contains__(self, name: object) -> bool:
+        return name in self.ids
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
@@ -0,0 +1,201 @@
+"""
+Output targets that receive generated files.
+"""
+
+import gzip
+import io
+import json
+import tarfile
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional, TextIO, Union
+
+
+class OutputTarget:
+    """
+    Destination for generated files.
+    
+    ``ModuleGenerator.write_files`` and ``ScriptSpliter.split`` hand each
+    file to ``write`` as soon as it is generated; the target decides where
+    it goes. Targets are context managers; ``close`` finishes the output.
+    """
+    
+    def location(self, name: str) -> str:
+        """Return where a file with the given name is (or would be) written."""
+        return name
+    
+    def write(self, name: str, data: bytes) -> str:
+        """
+        Write one file.
+        
+        Args:
+            name: File name relative to the output root
+            data: File contents
+        
+        Returns:
+            The file's location (see ``location``)
+        """
+        raise NotImplementedError
+    
+    def close(self) -> None:
+        """Finish the output. Does nothing unless a target buffers data."""
+    
+    def __enter__(self) -> "OutputTarget":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+class DirectoryTarget(OutputTarget):
+    """Writes each file into a directory, creating it on first write."""
+    
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._created = False
+    
+    def location(self, name: str) -> str:
+        return str(self.path / name)
+    
+    def write(self, name: str, data: bytes) -> str:
+        if not self._created:
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._created = True
+        file_path = self.path / name
+        with open(file_path, 'wb') as f:
+            f.write(data)
+        return str(file_path)
+
+
+class MemoryTarget(OutputTarget):
+    """Keeps the generated files in memory, in ``files`` (name -> bytes)."""
+    
+    def __init__(self):
+        self.files: Dict[str, bytes] = {}
+    
+    def write(self, name: str, data: bytes) -> str:
+        self.files[name] = data
+        return name
+    
+    def text(self, name: str) -> str:
+        """Return a generated file decoded as UTF-8."""
+        return self.files[name].decode("utf-8")
+
+
+class StreamTarget(OutputTarget):
+    """
+    Writes each file as one NDJSON record to a text stream.
+    
+    Records look like ``{"record": "file", "name": "utils.js", "content": "..."}``,
+    matching the record style of ``--analyze --output-format ndjson``.
+    """
+    
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+    
+    def write(self, name: str, data: bytes) -> str:
+        record = {"record": "file", "name": name, "content": data.decode("utf-8")}
+        self.stream.write(json.dumps(record))
+        self.stream.write("\n")
+        return name
+    
+    def close(self) -> None:
+        self.stream.flush()
+
+
+class ArchiveTarget(OutputTarget):
+    """
+    Writes all files into one zip, tar or tar.gz archive.
+    
+    Each file is added to the archive as soon as it is written, so nothing
+    but the archive itself touches the filesystem. Member timestamps and
+    permissions are fixed, so identical output gives an identical archive.
+    The archive is created on first write and finished by ``close``.
+    """
+    
+    FORMATS = ("zip", "tar", "tar.gz")
+    
+    # Fixed member timestamps (zip cannot store dates before 1980)
+    ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+    TAR_MTIME = 0
+    
+    def __init__(self, path: Union[str, Path], format: Optional[str] = None):
+        """
+        Prepare an archive.
+        
+        Args:
+            path: Archive file to write
+            format: "zip", "tar" or "tar.gz" (default: from the file extension)
+        """
+        self.path = Path(path)
+        self.format = format or self.format_of(self.path)
+        if self.format not in self.FORMATS:
+            raise ValueError(
+                f"Invalid archive format: {self.format}. Must be 'zip', 'tar', or 'tar.gz'"
+            )
+        self._file: Optional[BinaryIO] = None
+        self._gzip: Optional[gzip.GzipFile] = None
+        self._archive: Union[zipfile.ZipFile, tarfile.TarFile, None] = None
+    
+    @classmethod
+    def format_of(cls, path: Union[str, Path]) -> str:
+        """Guess the archive format from a file name."""
+        name = str(path).lower()
+        if name.endswith((".tar.gz", ".tgz")):
+            return "tar.gz"
+        if name.endswith(".tar"):
+            return "tar"
+        if name.endswith(".zip"):
+            return "zip"
+        raise ValueError(f"Cannot tell the archive format of {path}; use .zip, .tar or .tar.gz")
+    
+    def location(self, name: str) -> str:
+        return f"{self.path}:{name}"
+    
+    def write(self, name: str, data: bytes) -> str:
+        if self._archive is None:
+            self._open()
+        if self.format == "zip":
+            info = zipfile.ZipInfo(name, date_time=self.ZIP_DATE_TIME)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            self._archive.writestr(info, data)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = self.TAR_MTIME
+            info.mode = 0o644
+            self._archive.addfile(info, io.BytesIO(data))
+        return self.location(name)
+    
+    def close(self) -> None:
+        if self._archive is None:
+            return
+        self._archive.close()
+        if self._gzip is not None:
+            self._gzip.close()
+        self._file.close()
+        self._archive = self._gzip = self._file = None
+    
+    def _open(self) -> None:
+        """Create the archive file and start the archive."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'wb')
+        if self.format == "zip":
+            self._archive = zipfile.ZipFile(self._file, 'w')
+        elif self.format == "tar":
+            self._archive = tarfile.open(fileobj=self._file, mode='w', format=tarfile.PAX_FORMAT)
+        else:
+            # Zero header mtime keeps the archive reproducible; level 6 (zlib's
+            # default) is much faster than gzip's 9 for a few percent in size
+            self._gzip = gzip.GzipFile(
+                filename="", mode='wb', fileobj=self._file, compresslevel=6, mtime=0
+            )
+            self._archive = tarfile.open(fileobj=self._gzip, mode='w', format=tarfile.PAX_FORMAT)
+
+
+def open_target(output: Union[str, Path, OutputTarget]) -> OutputTarget:
+    """Return output as a target; a path becomes a DirectoryTarget."""
+    if isinstance(output, OutputTarget):
+        return output
+    return DirectoryTarget(output)
@@ -17,7 +17,7 @@ setup(
         "Documentation": "https://github.com/jomardyan/ScriptSpliter#readme",
     },
     python_requires=">=3.8",
-    packages=find_packages(exclude=["tests", "test_*", "*_test", "examples"]),
+    packages=find_packages(exclude=["tests", "test_*", "*_test", "examples", "benchmarks", "benchmarks.*"]),
     include_package_data=True,
     install_requires=[
         "regex>=2023.0.0",
@@ -0,0 +1,13 @@
+"""
+Shared pytest configuration.
+
+The tests use the synthetic bundle generator from ``benchmarks``, which is
+not installed with the package, so the repository root is put on the path.
+"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
@@ -0,0 +1,44 @@
+"""
+Growth bounds for the analyzer on large synthetic block lists and for the
+parser on adversarial input.
+
+Timing a single size says little across machines, so each test compares
+the best of a few runs at N and 4N blocks (or repetitions): linear work grows about 4x,
+quadratic work about 16x. The bound sits between the two with room for
+noise.
+"""
+
+import pytest
+
+from benchmarks.adversarial import CASES, time_parse
+from benchmarks.scaling import make_blocks, time_analysis
+
+SMALL = 5000
+PARSE_SMALL = 2000
+FACTOR = 4
+MAX_GROWTH = 9.0
+RUNS = 3
+
+
+def best_total(count: int) -> float:
+    """Fastest of a few analyzer runs on count blocks."""
+    blocks = make_blocks(count, dependencies=2, seed=0)
+    return min(time_analysis(blocks, target_lines=200)["total"] for _ in range(RUNS))
+
+
+def test_analyzer_scales_linearly():
+    small = best_total(SMALL)
+    large = best_total(SMALL * FACTOR)
+    assert large / small < MAX_GROWTH, (
+        f"{SMALL} blocks: {small:.3f}s, {SMALL * FACTOR} blocks: {large:.3f}s"
+    )
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+def test_adversarial_parse_scales_linearly(case):
+    generate = CASES[case]
+    small = min(time_parse(generate(PARSE_SMALL)) for _ in range(RUNS))
+    large = min(time_parse(generate(PARSE_SMALL * FACTOR)) for _ in range(RUNS))
+    assert large / small < MAX_GROWTH, (
+        f"{case}: {PARSE_SMALL}: {small:.4f}s, {PARSE_SMALL * FACTOR}: {large:.4f}s"
+    )
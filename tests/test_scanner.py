@@ -0,0 +1,130 @@
+"""
+Property tests for the parser's position scanner.
+
+A fixed corpus of tricky snippets (regex literals, nested template
+substitutions, comments and strings holding braces or semicolons) is run
+alongside randomly generated bundles seeded with the same constructs. For
+every source the scanner must find exactly the declared top-level symbols,
+in order, end at brace depth 0, and close every top-level block where the
+source does. ``compact`` (used by ``--minify``) is checked on snippets whose
+tokens could fuse once the whitespace between them is removed.
+"""
+
+from typing import List, Tuple
+
+import pytest
+
+from benchmarks.generate import BundleSpec, generate_bundle
+from script_spliter.parser import JavaScriptParser
+
+
+# (description, source, expected top-level names in order)
+CORPUS: List[Tuple[str, str, List[str]]] = [
+    ("regex with closing brace",
+     "const a = s.replace(/\\}/g, '');\nfunction b() { return 1; }\n", ["a", "b"]),
+    ("regex with quote and class",
+     "const a = /[\"'{]/;\nconst b = 2;\n", ["a", "b"]),
+    ("regex with slash in class",
+     "const a = /[/{]/.test(x);\nconst b = 2;\n", ["a", "b"]),
+    ("regex after return",
+     "function a() { return /\\{/.test(x); }\nconst b = 1;\n", ["a", "b"]),
+    ("division is not a regex",
+     "const a = x / 2 / y;\nconst b = { c: 1 };\n", ["a", "b"]),
+    ("division after postfix increment",
+     "const a = i++ / 2; const s = '/';\nfunction b() { return j-- / 2 + '{'; }\nconst c = 3;\n",
+     ["a", "s", "b", "c"]),
+    ("division after call",
+     "const a = f(x) / g(y) / 2;\nfunction b() {}\n", ["a", "b"]),
+    ("template with braces in substitution",
+     "const a = `${ { k: 1 }.k }`;\nconst b = 2;\n", ["a", "b"]),
+    ("nested templates",
+     "const a = `x${`y${'}'}`}z`;\nclass B {}\n", ["a", "B"]),
+    ("backtick inside substitution string",
+     "const a = `${'`'}{`;\nconst b = 2;\n", ["a", "b"]),
+    ("template closing brace text",
+     "const a = `}}}`;\nfunction b() {}\n", ["a", "b"]),
+    ("template spanning lines",
+     "const a = `line {\nconst hidden = 1;\n`;\nconst b = 2;\n", ["a", "b"]),
+    ("escaped dollar in template",
+     "const a = `\\${ {`;\nconst b = 2;\n", ["a", "b"]),
+    ("comment with braces",
+     "/* { */\nfunction a() { // }\n  return 1;\n}\nconst b = 2;\n", ["a", "b"]),
+    ("string with escaped quote and brace",
+     "const a = \"{\\\" }\";\nconst b = '}\\'';\nconst c = 3;\n", ["a", "b", "c"]),
+    ("multi-line arrow without semicolons",
+     "const a = () => {\n  return 1\n}\nconst b = [\n  1,\n  2\n]\nconst c = 3\n", ["a", "b", "c"]),
+    ("continued expression",
+     "const a = 1 +\n  2\nconst b = x\n  .y()\nconst c = 3\n", ["a", "b", "c"]),
+]
+
+
+# (description, source, expected ``compact`` output)
+COMPACT_CORPUS: List[Tuple[str, str, str]] = [
+    ("less-than, not, pre-decrement",
+     "var x = a <! --b;", "var x=a<! --b;"),
+    ("less-than, not-decrement",
+     "var x = a < !--b;", "var x=a< !--b;"),
+    ("negated pre-decrement compare",
+     "var x = a <!- -b;", "var x=a<!- -b;"),
+    ("post-decrement then greater-than",
+     "var x = a-- > b;", "var x=a-- >b;"),
+    ("unary minus after minus",
+     "var y = a - -b;", "var y=a- -b;"),
+    ("keywords and identifiers",
+     "return typeof  x;", "return typeof x;"),
+    ("newline kept before a parenthesis",
+     "a = b\n(c)", "a=b\n(c)"),
+]
+
+
+def check_source(source: str, expected: List[str]) -> List[str]:
+    """Return property violations for one source (empty when it passes)."""
+    problems = []
+    parser = JavaScriptParser(source)
+    blocks = parser.parse()
+    names = [block.name for block in blocks]
+    if names != expected:
+        missing = [name for name in expected if name not in names]
+        extra = [name for name in names if name not in expected]
+        problems.append(f"blocks {names[:8]}... missing={missing[:5]} extra={extra[:5]}")
+    if parser._depth_at and parser._depth_at[-1] != 0:
+        problems.append(f"final brace depth {parser._depth_at[-1]}")
+    for block in blocks:
+        content = block.content.rstrip()
+        if block.type in ("function", "class") and not content.endswith(("}", ";", ")")):
+            problems.append(f"{block.name} content ends with {content[-20:]!r}")
+    return problems
+
+
+@pytest.mark.parametrize(
+    "source, expected", [(source, expected) for _, source, expected in CORPUS],
+    ids=[description for description, _, _ in CORPUS]
+)
+def test_corpus(source, expected):
+    assert check_source(source, expected) == []
+
+
+@pytest.mark.parametrize(
+    "source, expected", [(source, expected) for _, source, expected in COMPACT_CORPUS],
+    ids=[description for description, _, _ in COMPACT_CORPUS]
+)
+def test_compact(source, expected):
+    parser = JavaScriptParser(source)
+    parser.parse()
+    text, _ = parser.compact(0, len(source))
+    assert text == expected
+    assert text.count("<!--") == source.count("<!--")
+
+
+@pytest.mark.parametrize("minify", [False, True], ids=["plain", "minified"])
+@pytest.mark.parametrize("seed", range(20))
+def test_random_bundle(seed, minify):
+    spec = BundleSpec(
+        symbols=60,
+        nesting_depth=seed % 4,
+        minify=minify,
+        literal_noise=0.4,
+        seed=seed,
+    )
+    expected = [f"sym{i}" for i in range(spec.symbols)]
+    assert check_source(generate_bundle(spec), expected) == []